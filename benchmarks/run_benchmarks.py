@@ -0,0 +1,200 @@
+"""
+Benchmark suite for the surface generators and the STL exporters.
+
+Sweeps grid sizes, parametric mode counts N and batch sizes, and records per
+case the best wall time over a few repeats, the peak traced memory
+(tracemalloc, measured in a separate run so tracing does not slow down the
+timings) and the throughput in surfaces/s or triangles/s. Results are
+written as JSON and can be compared against a stored baseline; the run
+fails (exit status 1) when a case is slower or uses more memory than the
+baseline by more than the given thresholds. Everything runs offline on the
+CPU.
+
+    python -m benchmarks.run_benchmarks --sizes 64 256 1024 --output results.json
+    python -m benchmarks.run_benchmarks --baseline results.json --time-threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.parametric_surface import generate_parametric_surface_batch
+from src.spectral_surface import generate_random_gaussian_surface, generate_random_gaussian_surface_batch
+from src.stl_export import export_to_stl, export_to_stl_streaming
+
+DEFAULT_SIZES = (64, 128, 256, 512, 1024, 2048, 4096)
+DEFAULT_MODES = (10, 50)
+DEFAULT_BATCHES = (1, 8)
+DEFAULT_MAX_ELEMENTS = 2**25
+
+def _case(name, func, units, unit, **params):
+    label = ','.join(f'{k}={v}' for k, v in params.items())
+    return {'name': f'{name}[{label}]', 'func': func, 'units': units, 'unit': unit, 'params': params}
+
+def _triangles(n):
+    """Triangles in the closed STL mesh of an n x n surface."""
+    return 4 * (n - 1)**2 + 8 * (n - 1)
+
+def benchmark_cases(sizes=DEFAULT_SIZES, modes=DEFAULT_MODES, batches=DEFAULT_BATCHES,
+                    max_elements=DEFAULT_MAX_ELEMENTS, tmpdir=None):
+    """
+    Return the benchmark cases of a sweep.
+
+    Cases whose batch holds more than max_elements heights are skipped.
+    """
+    tmpdir = tmpdir or tempfile.gettempdir()
+    cases = []
+    for n in sizes:
+        for batch in batches:
+            if batch * n * n > max_elements:
+                continue
+            for N in modes:
+                cases.append(_case(
+                    'parametric', lambda n=n, N=N, batch=batch: generate_parametric_surface_batch(
+                        batch, N=N, num_points=n, seed=0),
+                    batch, 'surfaces', n=n, N=N, batch=batch,
+                ))
+            cases.append(_case(
+                'spectral', lambda n=n, batch=batch: generate_random_gaussian_surface_batch(
+                    batch, N_x=n, seed=0),
+                batch, 'surfaces', n=n, batch=batch,
+            ))
+
+        if n * n > max_elements // 8:  # the in-memory exporter needs ~50 bytes per triangle
+            continue
+        surface, x, y = generate_random_gaussian_surface(N_x=n, seed=0)
+        X, Y = np.meshgrid(x, y)
+        path = os.path.join(tmpdir, f'benchmark_{n}.stl')
+        cases.append(_case(
+            'export_to_stl', lambda X=X, Y=Y, surface=surface, path=path: export_to_stl(
+                X, Y, surface, path, writer='binary'),
+            _triangles(n), 'triangles', n=n,
+        ))
+        cases.append(_case(
+            'export_to_stl_streaming', lambda x=x, y=y, surface=surface, path=path: export_to_stl_streaming(
+                x, y, surface, path),
+            _triangles(n), 'triangles', n=n,
+        ))
+    return cases
+
+def measure(func, repeat=3):
+    """
+    Return (best wall time in s, peak traced memory in bytes) of func().
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+def run_benchmarks(cases, repeat=3, verbose=True):
+    """
+    Run the cases and return their results as a list of dicts.
+    """
+    results = []
+    for case in cases:
+        wall_time, peak = measure(case['func'], repeat)
+        result = {
+            'name': case['name'],
+            'params': case['params'],
+            'wall_time': wall_time,
+            'peak_memory': peak,
+            'throughput': case['units'] / wall_time,
+            'unit': f"{case['unit']}/s",
+        }
+        results.append(result)
+        if verbose:
+            print(f"{result['name']:<55} {wall_time * 1e3:10.2f} ms {peak / 2**20:10.1f} MiB "
+                  f"{result['throughput']:12.4g} {result['unit']}", flush=True)
+    return results
+
+def environment():
+    """Metadata describing the machine and library versions."""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def write_results(results, path):
+    with open(path, 'w') as fh:
+        json.dump({'environment': environment(), 'results': results}, fh, indent=2)
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)['results']
+
+def compare(results, baseline, time_threshold=0.2, memory_threshold=0.2):
+    """
+    Compare results with a baseline.
+
+    Parameters:
+        results, baseline: Lists of result dicts
+        time_threshold: Allowed relative increase of the wall time
+        memory_threshold: Allowed relative increase of the peak memory
+
+    Returns:
+        List of (name, metric, baseline value, new value) regressions
+    """
+    reference = {r['name']: r for r in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get(result['name'])
+        if base is None:
+            continue
+        for metric, threshold in (('wall_time', time_threshold), ('peak_memory', memory_threshold)):
+            if result[metric] > base[metric] * (1.0 + threshold):
+                regressions.append((result['name'], metric, base[metric], result[metric]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="grid sizes")
+    parser.add_argument('--modes', type=int, nargs='+', default=DEFAULT_MODES, help="parametric mode counts N")
+    parser.add_argument('--batches', type=int, nargs='+', default=DEFAULT_BATCHES, help="batch sizes")
+    parser.add_argument('--max-elements', type=int, default=DEFAULT_MAX_ELEMENTS,
+                        help="skip cases with more heights per call")
+    parser.add_argument('--filter', default='', help="only run cases whose name contains this string")
+    parser.add_argument('--repeat', type=int, default=3, help="timed repeats per case")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against this results file")
+    parser.add_argument('--time-threshold', type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument('--memory-threshold', type=float, default=0.2, help="allowed relative memory increase")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cases = benchmark_cases(args.sizes, args.modes, args.batches, args.max_elements, tmpdir)
+        cases = [case for case in cases if args.filter in case['name']]
+        results = run_benchmarks(cases, args.repeat)
+
+    if args.output:
+        write_results(results, args.output)
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.time_threshold, args.memory_threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name}: {metric} {old:.4g} -> {new:.4g} ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print("No regressions against", args.baseline)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,10 +5,49 @@ This package provides tools for generating and analyzing random rough surfaces
 using various methods including parametric (double-sum) and spectral (FFT-based) approaches.
 """
 
-from .parametric_surface import generate_parametric_surface
-from .spectral_surface import generate_random_gaussian_surface
-from .visualization import plot_surface_3d, plot_surface_2d
-from .stl_export import export_to_stl
+import importlib
+
+from .parametric_surface import generate_parametric_surface, generate_parametric_surface_batch
+from .spectral_surface import generate_random_gaussian_surface, generate_random_gaussian_surface_batch
+from .tiled_surface import generate_random_gaussian_surface_tiled
+from .random_state import realization_seeds
+from .surface import Surface
+from .ensemble import parameter_grid, run_ensemble
+from .analysis import autocorrelation, correlation_length, radial_psd, surface_statistics
+from .ensemble_stats import EnsembleStatistics
+from .surface_store import SurfaceStore
+from .mesh_export import export_heightmap, export_to_obj, export_to_ply
+from .mesh_simplify import simplified_mesh
+from .surface_stream import SurfaceStream
+from .progressive import ProgressiveSurface, progressive_parametric_surface, progressive_random_gaussian_surface
+
+# Plotting and export pull in plotly, matplotlib and numpy-stl; they are only
+# imported on first access so that headless workers start quickly.
+_LAZY = {
+    'plot_surface_3d': '.visualization',
+    'plot_surface_2d': '.visualization',
+    'export_to_stl': '.stl_export',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = [
+    'generate_parametric_surface', 'generate_parametric_surface_batch',
+    'generate_random_gaussian_surface', 'generate_random_gaussian_surface_batch',
+    'generate_random_gaussian_surface_tiled', 'Surface', 'realization_seeds', 'parameter_grid', 'run_ensemble',
+    'autocorrelation', 'correlation_length', 'radial_psd', 'surface_statistics', 'EnsembleStatistics',
+    'SurfaceStore', 'export_to_ply', 'export_to_obj', 'export_heightmap',
+    'simplified_mesh', 'ProgressiveSurface', 'progressive_random_gaussian_surface',
+    'progressive_parametric_surface', 'SurfaceStream',
+] + list(_LAZY)
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __version__ = '0.1.0'
 __author__ = 'Heming Qin' 
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Statistical analysis of rough surfaces.
+
+Every function takes heights z of shape (..., N_y, N_x): a single surface or
+a stack of realizations from either generator (e.g. the output of the batch
+functions). Statistics are computed over the last two axes and returned with
+the leading batch shape, so whole ensembles are analyzed in one vectorized
+call. Grid spacings dx, dy are in physical units (see grid_spacing); dy
+defaults to dx. float32 input is analyzed in float32 (complex64 FFTs);
+other input is converted to float64.
+"""
+
+import numpy as np
+
+from .fft_backend import get_backend
+
+def grid_spacing(x, y):
+    """
+    Return the sample spacings dx, dy of 1-D axes or meshgrids.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    x = x[0, :] if x.ndim == 2 else x
+    y = y[:, 0] if y.ndim == 2 else y
+    dx = (x[-1] - x[0]) / (len(x) - 1) if len(x) > 1 else 1.0
+    dy = (y[-1] - y[0]) / (len(y) - 1) if len(y) > 1 else 1.0
+    return float(dx), float(dy)
+
+def _real(z):
+    z = np.asarray(z)
+    if z.dtype in (np.float32, np.float64):
+        return z
+    return z.astype(np.float64)
+
+def _centered(z):
+    z = _real(z)
+    if z.ndim < 2:
+        raise ValueError("z must have shape (..., N_y, N_x)")
+    return z - z.mean(axis=(-2, -1), keepdims=True)
+
+def rms_height(z):
+    """
+    RMS height about the mean plane (Sq).
+    """
+    return np.sqrt(np.mean(_centered(z)**2, axis=(-2, -1)))
+
+def skewness(z):
+    """
+    Height skewness (Ssk); 0 for a Gaussian surface.
+    """
+    zc = _centered(z)
+    return np.mean(zc**3, axis=(-2, -1)) / np.mean(zc**2, axis=(-2, -1))**1.5
+
+def kurtosis(z):
+    """
+    Height kurtosis (Sku, not excess); 3 for a Gaussian surface.
+    """
+    zc = _centered(z)
+    return np.mean(zc**4, axis=(-2, -1)) / np.mean(zc**2, axis=(-2, -1))**2
+
+def slope_rms(z, dx=1.0, dy=None):
+    """
+    RMS of the gradient magnitude (Sdq), from central differences.
+    """
+    dy = dx if dy is None else dy
+    gy, gx = np.gradient(_real(z), dy, dx, axis=(-2, -1))
+    return np.sqrt(np.mean(gx**2 + gy**2, axis=(-2, -1)))
+
+def curvature_rms(z, dx=1.0, dy=None):
+    """
+    RMS mean curvature, (z_xx + z_yy) / 2, over the interior of the grid.
+    """
+    dy = dx if dy is None else dy
+    z = _real(z)
+    zxx = (z[..., 1:-1, 2:] - 2.0 * z[..., 1:-1, 1:-1] + z[..., 1:-1, :-2]) / dx**2
+    zyy = (z[..., 2:, 1:-1] - 2.0 * z[..., 1:-1, 1:-1] + z[..., :-2, 1:-1]) / dy**2
+    return np.sqrt(np.mean((0.5 * (zxx + zyy))**2, axis=(-2, -1)))
+
+def autocorrelation(z, dx=1.0, dy=None, normalize=True, fft_backend=None):
+    """
+    2-D autocorrelation function via the Wiener-Khinchin theorem.
+
+    The mean plane is removed and the surface is zero-padded to twice its size,
+    so the result is the (non-circular) biased estimate over all lags.
+
+    Parameters:
+        z: Heights, shape (..., N_y, N_x)
+        dx, dy: Grid spacings
+        normalize: Divide by the zero-lag value so that the ACF starts at 1
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+
+    Returns:
+        acf: ACF, shape (..., 2 N_y - 1, 2 N_x - 1), zero lag at the center
+        lag_x, lag_y: Lag axes
+    """
+    dy = dx if dy is None else dy
+    backend = get_backend(fft_backend)
+    zc = _centered(z)
+    N_y, N_x = zc.shape[-2:]
+    s = (2 * N_y, 2 * N_x)
+    spectrum = backend.rfft2(zc, s=s)
+    acf = backend.irfft2(spectrum.real**2 + spectrum.imag**2, s=s) / (N_x * N_y)
+    acf = np.fft.fftshift(acf, axes=(-2, -1))[..., 1:, 1:]
+    if normalize:
+        acf /= acf[..., N_y - 1, N_x - 1][..., None, None]
+    lag_x = dx * np.arange(-(N_x - 1), N_x)
+    lag_y = dy * np.arange(-(N_y - 1), N_y)
+    return acf, lag_x, lag_y
+
+def _first_crossing(profile, lags, threshold):
+    """
+    Interpolated first lag at which profiles (..., n) drop below threshold; nan if never.
+    """
+    below = profile < threshold
+    i = np.argmax(below, axis=-1)
+    found = below.any(axis=-1)
+    i = np.maximum(i, 1)
+    p0 = np.take_along_axis(profile, (i - 1)[..., None], axis=-1)[..., 0]
+    p1 = np.take_along_axis(profile, i[..., None], axis=-1)[..., 0]
+    t = (p0 - threshold) / (p0 - p1)
+    return np.where(found, lags[i - 1] + t * (lags[i] - lags[i - 1]), np.nan)
+
+def correlation_length(z, dx=1.0, dy=None, threshold=np.exp(-1), fft_backend=None):
+    """
+    Correlation lengths along x and y: the lag where the ACF first drops below threshold.
+
+    With the default 1/e threshold a Gaussian ACF exp(-(x/cl)^2) gives cl.
+
+    Returns:
+        clx, cly: Correlation lengths, nan where the ACF never drops below threshold
+    """
+    dy = dx if dy is None else dy
+    acf, lag_x, lag_y = autocorrelation(z, dx, dy, fft_backend=fft_backend)
+    N_y, N_x = np.shape(z)[-2:]
+    clx = _first_crossing(acf[..., N_y - 1, N_x - 1:], lag_x[N_x - 1:], threshold)
+    cly = _first_crossing(acf[..., N_y - 1:, N_x - 1], lag_y[N_y - 1:], threshold)
+    return clx, cly
+
+def radial_psd(z, dx=1.0, dy=None, n_bins=None, fft_backend=None):
+    """
+    Radially averaged power spectral density.
+
+    The 2-D PSD |FFT(z)|^2 dx dy / (N_x N_y) is averaged over rings of equal
+    angular wavenumber |k| with a single np.bincount over all realizations.
+
+    Parameters:
+        z: Heights, shape (..., N_y, N_x)
+        dx, dy: Grid spacings
+        n_bins: Number of radial bins (default min(N_x, N_y) // 2)
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+
+    Returns:
+        k: Bin center wavenumbers (rad per unit length), shape (n_bins,)
+        psd: Radial PSD, shape (..., n_bins); nan for empty bins
+    """
+    dy = dx if dy is None else dy
+    backend = get_backend(fft_backend)
+    zc = _centered(z)
+    batch_shape = zc.shape[:-2]
+    N_y, N_x = zc.shape[-2:]
+    n_bins = n_bins or max(min(N_x, N_y) // 2, 1)
+
+    spectrum = backend.fft2(zc)
+    power = (spectrum.real**2 + spectrum.imag**2) * (dx * dy / (N_x * N_y))
+    kx = 2.0 * np.pi * np.fft.fftfreq(N_x, dx)
+    ky = 2.0 * np.pi * np.fft.fftfreq(N_y, dy)
+    k = np.hypot(kx[None, :], ky[:, None]).ravel()
+
+    k_max = min(np.abs(kx).max(), np.abs(ky).max()) if N_x > 1 and N_y > 1 else k.max()
+    inside = k <= k_max
+    bins = np.minimum((k[inside] * (n_bins / k_max)).astype(np.intp), n_bins - 1)
+    weights = power.reshape(-1, N_x * N_y)[:, inside]
+
+    # One bincount for the whole batch: realization i uses bins i * n_bins + bin
+    n_batch = weights.shape[0]
+    index = bins[None, :] + (np.arange(n_batch) * n_bins)[:, None]
+    sums = np.bincount(index.ravel(), weights=weights.ravel(), minlength=n_batch * n_bins)
+    counts = np.bincount(bins, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        psd = sums.reshape(n_batch, n_bins) / counts
+    k_centers = (np.arange(n_bins) + 0.5) * (k_max / n_bins)
+    return k_centers, psd.reshape(batch_shape + (n_bins,)).astype(zc.dtype, copy=False)
+
+def surface_statistics(z, dx=1.0, dy=None):
+    """
+    Summary statistics of one surface or a stack of realizations.
+
+    Returns:
+        Dict with 'mean', 'rms', 'peak_to_valley', 'skewness', 'kurtosis',
+        'slope_rms' and 'curvature_rms', each of the batch shape
+    """
+    z = _real(z)
+    return {
+        'mean': z.mean(axis=(-2, -1)),
+        'rms': rms_height(z),
+        'peak_to_valley': z.max(axis=(-2, -1)) - z.min(axis=(-2, -1)),
+        'skewness': skewness(z),
+        'kurtosis': kurtosis(z),
+        'slope_rms': slope_rms(z, dx, dy),
+        'curvature_rms': curvature_rms(z, dx, dy),
+    }
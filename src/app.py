@@ -1,27 +1,103 @@
 """
 Streamlit app for interactive rough surface generation and visualization.
+
+Generated surfaces are kept in st.session_state so that reruns (e.g. the
+export buttons) show the same surface, and the STL bytes are cached per
+surface. Spectral generation is cached with st.cache_data on the parameters
+plus an explicit seed. The parametric surface is a ParametricSurface kept in
+the session and updated incrementally, so factor, b and N changes only
+rescale, reweight or add/remove mode rings of the same realization.
+
+Generating shows coarse previews first (see progressive): they are the same
+realization as the full-resolution surface, which replaces them when ready.
 """
 
 import streamlit as st
-import numpy as np
 import plotly.graph_objects as go
-from parametric_surface import generate_parametric_surface
-from spectral_surface import generate_random_gaussian_surface
-from stl_export import export_to_stl
-import tempfile
 import os
+import sys
+
+# `streamlit run src/app.py` puts src/ on the path; import through the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.parametric_surface import ParametricSurface
+from src.progressive import ProgressiveSurface, progressive_parametric_surface
+from src.stl_export import stl_bytes
+from src.mesh_export import ply_bytes
+from src.level_of_detail import DEFAULT_MAX_VERTICES, crop_surface, decimate_surface
+from src.analysis import autocorrelation, grid_spacing, radial_psd, surface_statistics
 
 st.set_page_config(page_title="Rough Surface Generator", layout="wide")
 
 st.title("Rough Surface Generator")
 
+def parametric_surface(N, b, factor, num_points, seed):
+    """Session parametric surface, updated in place; returns S1, S2, surface."""
+    surface = st.session_state.get('parametric')
+    if surface is None or (surface.num_points, surface.seed.entropy) != (num_points, seed):
+        surface = ParametricSurface(N=N, b=b, factor=factor, num_points=num_points, seed=seed)
+        st.session_state['parametric'] = surface
+    else:
+        surface.update(N=N, b=b, factor=factor)
+    return surface.S1, surface.S2, surface.heights
+
+@st.cache_data(max_entries=32)
+def spectral_surface(N_x, N_y, rL_x, rL_y, h, clx, cly, seed):
+    """Cached full-resolution spectral surface on a meshgrid; returns X, Y, surface."""
+    surface = ProgressiveSurface(N_x=N_x, N_y=N_y, rL_x=rL_x, rL_y=rL_y, h=h, clx=clx, cly=cly, model=None,
+                                 seed=seed).level()
+    X, Y = surface.meshgrid()
+    return X, Y, surface.heights
+
+def spectral_previews(N_x, N_y, rL_x, rL_y, h, clx, cly, seed):
+    """Coarse levels of spectral_surface, coarsest first."""
+    progressive = ProgressiveSurface(N_x=N_x, N_y=N_y, rL_x=rL_x, rL_y=rL_y, h=h, clx=clx, cly=cly, model=None,
+                                     seed=seed)
+    return progressive.levels(final=False)
+
+def parametric_previews(N, b, factor, num_points, seed):
+    """Coarse levels of parametric_surface, coarsest first."""
+    return progressive_parametric_surface(N=N, b=b, factor=factor, num_points=num_points, seed=seed, final=False)
+
+GENERATORS = {
+    "Parametric (Double-Sum)": parametric_surface,
+    "Spectral (FFT-Based)": spectral_surface,
+}
+
+PREVIEWS = {
+    "Parametric (Double-Sum)": parametric_previews,
+    "Spectral (FFT-Based)": spectral_previews,
+}
+
+def surface_figure(X, Y, Z, title):
+    """3D surface plot of a (decimated) surface."""
+    fig = go.Figure(data=[go.Surface(x=X, y=Y, z=Z)])
+    fig.update_layout(
+        title=title,
+        scene=dict(
+            xaxis_title="X",
+            yaxis_title="Y",
+            zaxis_title="Height"
+        )
+    )
+    return fig
+
+EXPORTERS = {
+    "STL": (stl_bytes, "rough_surface.stl"),
+    "PLY (indexed, smaller)": (ply_bytes, "rough_surface.ply"),
+}
+
+@st.cache_data(max_entries=8)
+def surface_file(file_format, tolerance, method, params, _X, _Y, _surface):
+    """Exported file bytes of a surface, cached on the format, tolerance, method and parameters."""
+    return EXPORTERS[file_format][0](_X, _Y, _surface, tolerance=tolerance or None)
+
 # Sidebar for parameters
 st.sidebar.header("Generation Parameters")
 
 # Method selection
 method = st.sidebar.radio(
     "Surface Generation Method",
-    ["Parametric (Double-Sum)", "Spectral (FFT-Based)"]
+    list(GENERATORS)
 )
 
 if method == "Parametric (Double-Sum)":
@@ -30,50 +106,7 @@ if method == "Parametric (Double-Sum)":
     b = st.sidebar.slider("Spectral Exponent (β)", 1.0, 3.0, 1.8)
     factor = st.sidebar.slider("Scale Factor", 0.001, 0.1, 0.01)
     num_points = st.sidebar.slider("Grid Points", 50, 200, 101)
-    
-    if st.sidebar.button("Generate Surface"):
-        with st.spinner("Generating surface..."):
-            S1, S2, surface = generate_parametric_surface(
-                N=N,
-                b=b,
-                factor=factor,
-                num_points=num_points
-            )
-            
-            # Create 3D surface plot
-            fig = go.Figure(data=[go.Surface(x=S1, y=S2, z=surface)])
-            fig.update_layout(
-                title="Generated Rough Surface (Parametric Method)",
-                scene=dict(
-                    xaxis_title="X",
-                    yaxis_title="Y",
-                    zaxis_title="Height"
-                )
-            )
-            
-            # Display the plot
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Statistics
-            st.subheader("Surface Statistics")
-            col1, col2, col3 = st.columns(3)
-            col1.metric("RMS Height", f"{np.std(surface):.6f}")
-            col2.metric("Mean Height", f"{np.mean(surface):.6f}")
-            col3.metric("Peak-to-Valley", f"{np.max(surface) - np.min(surface):.6f}")
-            
-            # Export options
-            st.subheader("Export Options")
-            if st.button("Export to STL"):
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.stl') as tmp:
-                    export_to_stl(S1, S2, surface, tmp.name)
-                    with open(tmp.name, 'rb') as f:
-                        st.download_button(
-                            label="Download STL file",
-                            data=f,
-                            file_name="rough_surface.stl",
-                            mime="application/octet-stream"
-                        )
-                    os.unlink(tmp.name)
+    params = dict(N=N, b=b, factor=factor, num_points=num_points)
 
 else:  # Spectral (FFT-Based) method
     # Parameters for spectral method
@@ -81,10 +114,10 @@ else:  # Spectral (FFT-Based) method
     rL_x = st.sidebar.slider("Surface Length (X)", 1.0, 20.0, 10.0)
     h = st.sidebar.slider("RMS Height", 0.0001, 0.01, 0.001)
     clx = st.sidebar.slider("Correlation Length", 0.1, 5.0, 2.0)
-    
+
     # Option for isotropic/anisotropic
     isotropic = st.sidebar.checkbox("Isotropic Surface", value=True)
-    
+
     if not isotropic:
         N_y = st.sidebar.slider("Grid Points (Y)", 50, 200, 128)
         rL_y = st.sidebar.slider("Surface Length (Y)", 1.0, 20.0, 10.0)
@@ -93,56 +126,99 @@ else:  # Spectral (FFT-Based) method
         N_y = None
         rL_y = None
         cly = None
-    
-    if st.sidebar.button("Generate Surface"):
-        with st.spinner("Generating surface..."):
-            surface, x, y = generate_random_gaussian_surface(
-                N_x=N_x,
-                N_y=N_y,
-                rL_x=rL_x,
-                rL_y=rL_y,
-                h=h,
-                clx=clx,
-                cly=cly
-            )
-            
-            # Create meshgrid for plotting
-            X, Y = np.meshgrid(x, y)
-            
-            # Create 3D surface plot
-            fig = go.Figure(data=[go.Surface(x=X, y=Y, z=surface)])
-            fig.update_layout(
-                title="Generated Rough Surface (Spectral Method)",
-                scene=dict(
-                    xaxis_title="X",
-                    yaxis_title="Y",
-                    zaxis_title="Height"
-                )
-            )
-            
-            # Display the plot
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Statistics
-            st.subheader("Surface Statistics")
-            col1, col2, col3 = st.columns(3)
-            col1.metric("RMS Height", f"{np.std(surface):.6f}")
-            col2.metric("Mean Height", f"{np.mean(surface):.6f}")
-            col3.metric("Peak-to-Valley", f"{np.max(surface) - np.min(surface):.6f}")
-            
-            # Export options
-            st.subheader("Export Options")
-            if st.button("Export to STL"):
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.stl') as tmp:
-                    export_to_stl(X, Y, surface, tmp.name)
-                    with open(tmp.name, 'rb') as f:
-                        st.download_button(
-                            label="Download STL file",
-                            data=f,
-                            file_name="rough_surface.stl",
-                            mime="application/octet-stream"
-                        )
-                    os.unlink(tmp.name)
+    params = dict(N_x=N_x, N_y=N_y, rL_x=rL_x, rL_y=rL_y, h=h, clx=clx, cly=cly)
+
+seed = int(st.sidebar.number_input("Random Seed", min_value=0, value=0, step=1))
+params['seed'] = seed
+
+# Level of detail for the 3D view (statistics and export use the full data)
+with st.sidebar.expander("Display"):
+    max_vertices = int(st.number_input("Max Plot Vertices", min_value=1_000,
+                                       value=DEFAULT_MAX_VERTICES, step=10_000))
+    lod_method = st.radio("Decimation", ["minmax", "stride"])
+    zoom = st.checkbox("Full-Resolution Window", value=False)
+    if zoom:
+        zoom_x = st.slider("Window X (fraction)", 0.0, 1.0, (0.4, 0.6))
+        zoom_y = st.slider("Window Y (fraction)", 0.0, 1.0, (0.4, 0.6))
+
+if st.sidebar.button("Generate Surface"):
+    # Show the coarse levels of the same realization while the full grid is computed
+    preview = st.empty()
+    for level in PREVIEWS[method](**params):
+        rows, cols = level.shape
+        preview.plotly_chart(surface_figure(level.X, level.Y, level.heights, f"Preview ({cols} x {rows})"),
+                             use_container_width=True)
+    with st.spinner("Refining surface..."):
+        GENERATORS[method](**params)
+    preview.empty()
+    st.session_state['generated'] = (method, params)
+elif st.session_state.get('generated', (None,))[0] == method == "Parametric (Double-Sum)":
+    # Incremental updates are cheap, so the parametric view follows the sliders
+    st.session_state['generated'] = (method, params)
+
+if 'generated' in st.session_state:
+    shown_method, shown_params = st.session_state['generated']
+    S1, S2, surface = GENERATORS[shown_method](**shown_params)
+    short_name = "Parametric" if shown_method.startswith("Parametric") else "Spectral"
+
+    # Create 3D surface plot from a decimated (optionally cropped) copy
+    X_plot, Y_plot, Z_plot = S1, S2, surface
+    if zoom:
+        x_min, x_max = S1.min(), S1.max()
+        y_min, y_max = S2.min(), S2.max()
+        X_plot, Y_plot, Z_plot = crop_surface(
+            X_plot, Y_plot, Z_plot,
+            x_range=[x_min + f * (x_max - x_min) for f in zoom_x],
+            y_range=[y_min + f * (y_max - y_min) for f in zoom_y],
+        )
+    X_plot, Y_plot, Z_plot = decimate_surface(X_plot, Y_plot, Z_plot, max_vertices, lod_method)
+    fig = surface_figure(X_plot, Y_plot, Z_plot, f"Generated Rough Surface ({short_name} Method)")
+
+    # Display the plot
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Statistics
+    st.subheader("Surface Statistics")
+    dx, dy = grid_spacing(S1, S2)
+    stats = surface_statistics(surface, dx, dy)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("RMS Height", f"{stats['rms']:.6f}")
+    col2.metric("Mean Height", f"{stats['mean']:.6f}")
+    col3.metric("Peak-to-Valley", f"{stats['peak_to_valley']:.6f}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Skewness", f"{stats['skewness']:.3f}")
+    col2.metric("Kurtosis", f"{stats['kurtosis']:.3f}")
+    col3.metric("RMS Slope", f"{stats['slope_rms']:.6f}")
+
+    with st.expander("Autocorrelation and Power Spectral Density"):
+        acf, lag_x, lag_y = autocorrelation(surface, dx, dy)
+        k, psd = radial_psd(surface, dx, dy)
+        n_y, n_x = surface.shape
+        acf_fig = go.Figure()
+        acf_fig.add_scatter(x=lag_x[n_x - 1:], y=acf[n_y - 1, n_x - 1:], name="X")
+        acf_fig.add_scatter(x=lag_y[n_y - 1:], y=acf[n_y - 1:, n_x - 1], name="Y")
+        acf_fig.update_layout(title="Autocorrelation", xaxis_title="Lag", yaxis_title="ACF")
+        psd_fig = go.Figure(go.Scatter(x=k, y=psd))
+        psd_fig.update_layout(title="Radial PSD", xaxis_title="Wavenumber", yaxis_title="PSD",
+                              xaxis_type="log", yaxis_type="log")
+        col1, col2 = st.columns(2)
+        col1.plotly_chart(acf_fig, use_container_width=True)
+        col2.plotly_chart(psd_fig, use_container_width=True)
+
+    # Export options
+    st.subheader("Export Options")
+    file_format = st.selectbox("Mesh format", list(EXPORTERS))
+    tolerance = st.number_input("Simplification tolerance (max height error, 0 = full resolution)",
+                                min_value=0.0, value=0.0, format="%.3g")
+    if st.button("Export mesh"):
+        st.session_state['export'] = (file_format, tolerance, shown_method, shown_params)
+    if st.session_state.get('export') == (file_format, tolerance, shown_method, shown_params):
+        st.download_button(
+            label=f"Download {file_format.split()[0]} file",
+            data=surface_file(file_format, tolerance, shown_method, shown_params, S1, S2, surface),
+            file_name=EXPORTERS[file_format][1],
+            mime="application/octet-stream"
+        )
 
 # Add documentation in the sidebar
 with st.sidebar.expander("Documentation"):
@@ -152,11 +228,15 @@ with st.sidebar.expander("Documentation"):
     - **N**: Summation limit for modes
     - **β**: Spectral exponent controlling roughness
     - **Scale Factor**: Overall amplitude scaling
-    
+
     ### Spectral (FFT-Based) Method
     Uses inverse Fourier transform with Gaussian correlation function.
     - **RMS Height**: Root mean square height of the surface
     - **Correlation Length**: Distance over which heights become uncorrelated
     - **Surface Length**: Physical size of the surface
     - **Grid Points**: Resolution of the surface
-    """) 
\ No newline at end of file
+
+    ### Random Seed
+    The same parameters and seed always give the same surface; change the
+    seed for a new realization.
+    """)
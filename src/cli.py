@@ -0,0 +1,164 @@
+"""
+Command-line interface.
+
+    python -m src sweep spectral --param N_x=256 --param clx=1.0,2.0 -n 100 --seed 0 --out runs/clx
+    python -m src sweep parametric --param N=10,20 --param b=1.5,1.8 -n 10 --out runs/nb --workers 4
+    python -m src info runs/clx
+    python -m src export runs/clx p0001_r000003 surface.stl
+    python -m src export runs/clx p0001_r000003 surface.ply
+    python -m src export runs/clx p0001_r000003 small.stl --tolerance 1e-5
+    python -m src serve --port 8765 --warm spectral:N_x=512,clx=0.5
+
+sweep runs run_ensemble over the Cartesian product of the --param values and
+writes every surface with its parameters and seed into a SurfaceStore; the
+store is written on a background thread while the next surfaces are
+generated.
+"""
+
+import argparse
+import ast
+import sys
+
+from .ensemble import GENERATORS, generator_axes, parameter_grid, run_ensemble
+from .surface_store import DEFAULT_CHUNK, SurfaceStore
+
+def _value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+def parse_params(items):
+    """
+    Parse ['N_x=128,256', 'clx=2.0'] into {'N_x': [128, 256], 'clx': [2.0]}.
+    """
+    values = {}
+    for item in items:
+        name, sep, text = item.partition('=')
+        if not sep or not name:
+            raise argparse.ArgumentTypeError(f"expected NAME=VALUE[,VALUE...], got {item!r}")
+        values[name.strip()] = [_value(v.strip()) for v in text.split(',')]
+    return values
+
+def surface_name(params_index, realization):
+    return f'p{params_index:04d}_r{realization:06d}'
+
+def sweep(args):
+    grid = parameter_grid(**parse_params(args.param))
+    axes = [generator_axes(args.generator, p) for p in grid]
+    with SurfaceStore(args.out, mode='a' if args.append else 'w', chunk=args.chunk,
+                      compress=not args.no_compress) as store, store.writer(args.max_pending) as writer:
+        count = 0
+        for result in run_ensemble(args.generator, grid, args.realizations, seed=args.seed,
+                                   max_workers=args.workers,
+                                   realizations_per_task=args.realizations_per_task):
+            x, y = axes[result.params_index]
+            writer.submit(surface_name(result.params_index, result.realization), result.heights, x, y,
+                          params=result.params, seed=result.seed, generator=args.generator,
+                          params_index=result.params_index, realization=result.realization)
+            count += 1
+            if not args.quiet:
+                print(f"\r{count} / {len(grid) * args.realizations} surfaces", end='', file=sys.stderr)
+    if not args.quiet:
+        print(file=sys.stderr)
+    return 0
+
+def info(args):
+    store = SurfaceStore(args.store)
+    names = store.names()
+    print(f"{args.store}: {len(names)} surfaces, chunk {store.chunk}, "
+          f"{'compressed' if store.compress else 'uncompressed'}")
+    for name in names:
+        meta = store.metadata(name)
+        print(f"  {name}  {meta['shape'][0]}x{meta['shape'][1]} {meta['dtype']}  {meta['params']}")
+    return 0
+
+def export(args):
+    from .mesh_export import export_heightmap, export_to_obj, export_to_ply
+    from .stl_export import export_to_stl, export_to_stl_streaming
+
+    extension = args.filename.rsplit('.', 1)[-1].lower()
+    if extension not in ('stl', 'ply', 'obj', 'png', 'raw'):
+        raise SystemExit(f"unknown export format {extension!r} (stl, ply, obj, png or raw)")
+    surface = SurfaceStore(args.store).read(args.name)
+    if extension in ('png', 'raw'):
+        export_heightmap(surface, args.filename)
+        return 0
+    if extension == 'stl' and args.tolerance is None:
+        export_to_stl_streaming(surface, args.filename, base_thickness=args.base_thickness)
+        return 0
+    if extension == 'stl':
+        error = export_to_stl(surface, args.filename, base_thickness=args.base_thickness, writer='binary',
+                              tolerance=args.tolerance)
+    else:
+        exporter = export_to_ply if extension == 'ply' else export_to_obj
+        error = exporter(surface, args.filename, base_thickness=args.base_thickness, tolerance=args.tolerance)
+    if error is not None:
+        print(f"maximum height error {error:.6g}")
+    return 0
+
+def serve(args):
+    from .service import serve as run_service
+
+    warm = []
+    for item in args.warm:
+        generator, _, params = item.partition(':')
+        if generator not in GENERATORS:
+            raise SystemExit(f"unknown generator {generator!r} in --warm {item!r}")
+        warm.append((generator, {name: values[0] for name, values in
+                                 parse_params(params.split(',') if params else []).items()}))
+    print(f"serving on http://{args.host}:{args.port}", file=sys.stderr)
+    run_service(args.host, args.port, window=args.window, max_batch=args.max_batch,
+                kernel_cache_size=args.kernel_cache_size, warm=warm, max_points=args.max_points,
+                verbose=args.verbose)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src', description="Rough surface generation")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('sweep', help="generate a parameter sweep into a surface store")
+    p.add_argument('generator', choices=sorted(GENERATORS))
+    p.add_argument('--param', action='append', default=[], metavar='NAME=V1[,V2...]',
+                   help="generator parameter values (repeatable)")
+    p.add_argument('-n', '--realizations', type=int, default=1, help="realizations per parameter set")
+    p.add_argument('--seed', type=int, help="root seed (default: fresh entropy)")
+    p.add_argument('--out', required=True, help="store directory")
+    p.add_argument('--append', action='store_true', help="add to an existing store")
+    p.add_argument('--workers', type=int, default=0, help="worker processes (0: in-process)")
+    p.add_argument('--realizations-per-task', type=int, default=1)
+    p.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help="tile edge length")
+    p.add_argument('--no-compress', action='store_true', help="store uncompressed tiles")
+    p.add_argument('--max-pending', type=int, default=4, help="surfaces queued for writing")
+    p.add_argument('-q', '--quiet', action='store_true')
+    p.set_defaults(func=sweep)
+
+    p = commands.add_parser('info', help="list the surfaces of a store")
+    p.add_argument('store')
+    p.set_defaults(func=info)
+
+    p = commands.add_parser('export', help="export a stored surface (STL, PLY, OBJ, PNG or RAW heightmap)")
+    p.add_argument('store')
+    p.add_argument('name')
+    p.add_argument('filename', help="output file; the format follows the extension")
+    p.add_argument('--base-thickness', type=float, default=1.0)
+    p.add_argument('--tolerance', type=float,
+                   help="simplify the mesh to this maximum height error (STL, PLY, OBJ)")
+    p.set_defaults(func=export)
+
+    p = commands.add_parser('serve', help="run the local HTTP generation service")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--window', type=float, default=0.005, help="seconds to wait for requests to batch")
+    p.add_argument('--max-batch', type=int, default=32, help="largest batched generation")
+    p.add_argument('--kernel-cache-size', type=int, help="number of cached spectral kernels")
+    p.add_argument('--max-points', type=int, default=2**24, help="largest grid (rows * cols) per surface")
+    p.add_argument('--warm', action='append', default=[], metavar='GENERATOR:NAME=V,...',
+                   help="parameters to generate once at startup (repeatable)")
+    p.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    p.set_defaults(func=serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,176 @@
+"""
+Parameter sweeps over the surface generators on a process pool.
+
+Every (parameter set, realization) pair gets its own SeedSequence derived
+from the run seed as child_seed(child_seed(seed, params_index), realization),
+so a result does not depend on the number of workers, on how realizations
+are chunked into tasks, or on the order in which tasks finish. It is also
+identical to a single generator call made with that seed.
+
+Results are yielded as soon as their task finishes, and only a bounded
+number of tasks is in flight, so a sweep never holds more than a few chunks
+of surfaces in memory. With output_dir set, workers write each surface to
+its own .npy file and only the path travels back.
+"""
+
+import itertools
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .fft_backend import set_default_workers
+from .parametric_surface import generate_parametric_surface_batch
+from .random_state import child_seed
+from .spectral_surface import generate_random_gaussian_surface_batch
+
+EnsembleResult = namedtuple(
+    'EnsembleResult', ['params_index', 'params', 'realization', 'seed', 'heights', 'path']
+)
+EnsembleResult.__doc__ = """
+One generated surface: its parameter set, realization number, SeedSequence,
+and either the height array or the .npy path it was written to.
+"""
+
+def _parametric_heights(n_realizations, seed, **params):
+    return generate_parametric_surface_batch(n_realizations, seed=seed, **params)[2]
+
+def _spectral_heights(n_realizations, seed, **params):
+    return generate_random_gaussian_surface_batch(n_realizations, seed=seed, **params)[0]
+
+GENERATORS = {
+    'parametric': _parametric_heights,
+    'spectral': _spectral_heights,
+}
+
+def _parametric_axes(num_points=101, s1=None, s2=None, **params):
+    s = np.linspace(0, 1, num_points)
+    return (s if s1 is None else np.asarray(s1)), (s if s2 is None else np.asarray(s2))
+
+def _spectral_axes(N_x=128, N_y=None, rL_x=10.0, rL_y=None, **params):
+    N_y = N_x if N_y is None else N_y
+    rL_y = rL_x if rL_y is None else rL_y
+    return np.linspace(-rL_x/2, rL_x/2, N_x), np.linspace(-rL_y/2, rL_y/2, N_y)
+
+AXES = {
+    'parametric': _parametric_axes,
+    'spectral': _spectral_axes,
+}
+
+def generator_axes(generator, params):
+    """
+    Return the 1-D x and y axes of the surfaces a generator makes with params.
+    """
+    return AXES[generator](**params)
+
+def parameter_grid(**values):
+    """
+    Return the Cartesian product of parameter values as a list of dicts.
+
+    Scalars are treated as single-valued lists, e.g.
+    parameter_grid(N=[10, 20], b=[1.5, 1.8], factor=0.01) gives four dicts.
+    """
+    names = list(values)
+    lists = [v if isinstance(v, (list, tuple, np.ndarray)) else [v] for v in values.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*lists)]
+
+def task_seed(seed, params_index, realization):
+    """
+    Return the SeedSequence of one (parameter set, realization) pair.
+    """
+    return child_seed(child_seed(seed, params_index), realization)
+
+def _run_task(generator, params, seeds, paths):
+    """
+    Worker entry point: generate one chunk of realizations of one parameter set.
+    """
+    heights = GENERATORS[generator](len(seeds), list(seeds), **params)
+    if paths is None:
+        return list(heights)
+    for path, z in zip(paths, heights):
+        np.save(path, z)
+    return list(paths)
+
+def run_ensemble(generator, params, n_realizations, seed=None, max_workers=None,
+                 output_dir=None, realizations_per_task=1, max_pending=None):
+    """
+    Run a parameter sweep and yield results as they finish.
+
+    Parameters:
+        generator: 'parametric' or 'spectral'
+        params: A dict of generator keyword arguments or a list of them (see parameter_grid)
+        n_realizations: Number of realizations per parameter set
+        seed: Root seed (int or SeedSequence); None draws fresh entropy, which
+            is available afterwards as result.seed.entropy
+        max_workers: Number of worker processes (None: os.cpu_count(), 0: run
+            in the calling process without a pool)
+        output_dir: If given, each surface is saved there as
+            '<generator>_<params_index>_<realization>.npy' and only the path is returned
+        realizations_per_task: Number of realizations generated per task with
+            the batch generators
+        max_pending: Maximum number of tasks in flight (default: 2 * workers)
+
+    Yields:
+        EnsembleResult, in completion order
+    """
+    if generator not in GENERATORS:
+        raise ValueError(f"generator must be one of {tuple(GENERATORS)}, got {generator!r}")
+    if isinstance(params, dict):
+        params = [params]
+    if realizations_per_task < 1:
+        raise ValueError("realizations_per_task must be at least 1")
+    if seed is None:
+        seed = np.random.SeedSequence()
+    elif not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def tasks():
+        for index, p in enumerate(params):
+            for r0 in range(0, n_realizations, realizations_per_task):
+                realizations = range(r0, min(r0 + realizations_per_task, n_realizations))
+                seeds = [task_seed(seed, index, r) for r in realizations]
+                paths = None
+                if output_dir is not None:
+                    paths = [os.path.join(output_dir, f"{generator}_{index:04d}_{r:06d}.npy")
+                             for r in realizations]
+                yield index, p, realizations, seeds, paths
+
+    def results(task, values):
+        index, p, realizations, seeds, paths = task
+        for r, s, v in zip(realizations, seeds, values):
+            if paths is None:
+                yield EnsembleResult(index, p, r, s, v, None)
+            else:
+                yield EnsembleResult(index, p, r, s, None, v)
+
+    if max_workers == 0:
+        for task in tasks():
+            _, p, _, seeds, paths = task
+            yield from results(task, _run_task(generator, p, seeds, paths))
+        return
+
+    workers = max_workers or os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    # The processes already use every core: keep scipy.fft single-threaded in them
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_default_workers, initargs=(1,)) as executor:
+        pending = {}
+        queue = tasks()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                task = next(queue, None)
+                if task is None:
+                    exhausted = True
+                    break
+                _, p, _, seeds, paths = task
+                pending[executor.submit(_run_task, generator, p, seeds, paths)] = task
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from results(pending.pop(future), future.result())
@@ -0,0 +1,216 @@
+"""
+Streaming statistics over large ensembles of surfaces.
+
+EnsembleStatistics consumes surfaces one at a time or in batches and keeps
+only running sums: Welford means and variances of the per-realization
+statistics of analysis.surface_statistics, of the radial PSD and of the
+ACF, plus a fixed-range height histogram. Accumulators built by different
+workers are combined with merge (Chan et al.'s parallel update), so
+realizations can be split over processes in any way. Confidence intervals
+of every mean are available at any point, e.g. to stop a run once they are
+narrow enough:
+
+    stats = EnsembleStatistics(dx, dy, hist_range=(-5e-3, 5e-3))
+    for result in run_ensemble('spectral', params, 100_000, seed=0):
+        stats.update(result.heights)
+        if stats.count >= 100 and stats.converged('rms', rtol=1e-3):
+            break
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+from .analysis import autocorrelation, radial_psd, surface_statistics
+
+class RunningMoments:
+    """
+    Running count, mean and sum of squared deviations (M2) of array-valued samples.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+
+    def update(self, samples):
+        """
+        Add samples stacked along the first axis.
+        """
+        samples = np.asarray(samples, dtype=float)
+        n = samples.shape[0]
+        if n == 0:
+            return
+        mean = samples.mean(axis=0)
+        m2 = ((samples - mean)**2).sum(axis=0)
+        self._combine(n, mean, m2)
+
+    def merge(self, other):
+        """
+        Add the samples summarized by another RunningMoments.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, n, mean, m2):
+        if self.count == 0:
+            self.count, self.mean, self.m2 = n, np.array(mean, dtype=float), np.array(m2, dtype=float)
+            return
+        if np.shape(mean) != self.mean.shape:
+            raise ValueError(f"sample shape {np.shape(mean)} does not match {self.mean.shape}")
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += m2 + delta**2 * (self.count * n / total)
+        self.count = total
+
+    @property
+    def variance(self):
+        """Unbiased sample variance."""
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return self.m2 / (self.count - 1)
+
+    def confidence_interval(self, level=0.95):
+        """
+        Normal-approximation confidence interval (low, high) of the mean.
+        """
+        z = NormalDist().inv_cdf(0.5 + level / 2.0)
+        half = z * np.sqrt(self.variance / self.count)
+        return self.mean - half, self.mean + half
+
+class EnsembleStatistics:
+    """
+    Mergeable accumulator of ensemble statistics.
+
+    Parameters:
+        dx, dy: Grid spacings (dy defaults to dx)
+        hist_range: (min, max) of the height histogram; None disables it
+        hist_bins: Number of histogram bins
+        psd_bins: Number of radial PSD bins (see analysis.radial_psd)
+        acf: Also accumulate the full 2-D ACF
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+    """
+
+    def __init__(self, dx=1.0, dy=None, hist_range=None, hist_bins=100, psd_bins=None,
+                 acf=True, fft_backend=None):
+        self.dx = dx
+        self.dy = dx if dy is None else dy
+        self.hist_bins = hist_bins
+        self.psd_bins = psd_bins
+        self.fft_backend = fft_backend
+        self.statistics = {}
+        self.psd = RunningMoments()
+        self.acf = RunningMoments() if acf else None
+        self.k = None
+        self.shape = None
+        if hist_range is None:
+            self.hist_edges = self.hist_counts = None
+        else:
+            self.hist_edges = np.linspace(hist_range[0], hist_range[1], hist_bins + 1)
+            self.hist_counts = np.zeros(hist_bins + 2, dtype=np.int64)  # + under/overflow
+
+    @property
+    def count(self):
+        """Number of realizations seen."""
+        return self.psd.count
+
+    def update(self, z):
+        """
+        Add one surface (N_y, N_x) or a batch (n, N_y, N_x).
+        """
+        z = np.asarray(z)
+        if z.ndim == 2:
+            z = z[None]
+        if z.ndim != 3:
+            raise ValueError("z must have shape (N_y, N_x) or (n, N_y, N_x)")
+        if self.shape is None:
+            self.shape = z.shape[1:]
+        elif z.shape[1:] != self.shape:
+            raise ValueError(f"surface shape {z.shape[1:]} does not match {self.shape}")
+
+        for name, values in surface_statistics(z, self.dx, self.dy).items():
+            self.statistics.setdefault(name, RunningMoments()).update(values)
+        self.k, psd = radial_psd(z, self.dx, self.dy, n_bins=self.psd_bins, fft_backend=self.fft_backend)
+        self.psd.update(psd)
+        if self.acf is not None:
+            self.acf.update(autocorrelation(z, self.dx, self.dy, fft_backend=self.fft_backend)[0])
+        if self.hist_edges is not None:
+            bins = np.searchsorted(self.hist_edges, z.ravel(), side='right')
+            bins[z.ravel() == self.hist_edges[-1]] = self.hist_bins  # closed last bin
+            self.hist_counts += np.bincount(bins, minlength=self.hist_bins + 2)
+        return self
+
+    def merge(self, other):
+        """
+        Add the realizations summarized by another accumulator (e.g. from a worker).
+        """
+        if other.count == 0:
+            return self
+        if self.shape is not None and other.shape != self.shape:
+            raise ValueError(f"surface shape {other.shape} does not match {self.shape}")
+        if (self.dx, self.dy) != (other.dx, other.dy):
+            raise ValueError("accumulators have different grid spacings")
+        if (self.hist_edges is None) != (other.hist_edges is None) or (
+                self.hist_edges is not None and not np.array_equal(self.hist_edges, other.hist_edges)):
+            raise ValueError("accumulators have different histogram bins")
+        if (self.acf is None) != (other.acf is None):
+            raise ValueError("only one accumulator collects the ACF")
+
+        self.shape = other.shape
+        self.k = other.k
+        for name, moments in other.statistics.items():
+            self.statistics.setdefault(name, RunningMoments()).merge(moments)
+        self.psd.merge(other.psd)
+        if self.acf is not None:
+            self.acf.merge(other.acf)
+        if self.hist_counts is not None:
+            self.hist_counts += other.hist_counts
+        return self
+
+    def confidence_interval(self, name, level=0.95):
+        """
+        Confidence interval (low, high) of the ensemble mean of a statistic.
+
+        name is a key of analysis.surface_statistics, 'psd' or 'acf'.
+        """
+        return self._moments(name).confidence_interval(level)
+
+    def converged(self, name, rtol, level=0.95):
+        """
+        True if the confidence interval half-width is within rtol of the mean everywhere.
+        """
+        moments = self._moments(name)
+        if moments.count < 2:
+            return False
+        low, high = moments.confidence_interval(level)
+        return bool(np.nanmax(0.5 * (high - low) - rtol * np.abs(moments.mean)) <= 0)
+
+    def _moments(self, name):
+        if name == 'psd':
+            return self.psd
+        if name == 'acf' and self.acf is not None:
+            return self.acf
+        if name not in self.statistics:
+            raise KeyError(f"no statistic {name!r}")
+        return self.statistics[name]
+
+    def histogram(self, density=False):
+        """
+        Return the height histogram (counts, edges); values outside hist_range are dropped.
+        """
+        if self.hist_edges is None:
+            raise ValueError("no hist_range was given")
+        counts = self.hist_counts[1:-1]
+        if density:
+            total = counts.sum()
+            return counts / (total * np.diff(self.hist_edges)) if total else counts.astype(float), self.hist_edges
+        return counts.copy(), self.hist_edges
+
+    def summary(self, level=0.95):
+        """
+        Dict of name -> (mean, low, high) for the scalar statistics.
+        """
+        return {name: (float(m.mean),) + tuple(float(v) for v in m.confidence_interval(level))
+                for name, m in self.statistics.items()}
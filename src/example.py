@@ -2,9 +2,13 @@
 Example usage of surface generation and visualization.
 """
 
-from parametric_surface import generate_parametric_surface
-from spectral_surface import generate_random_gaussian_surface
-from visualization import plot_surface_3d, plot_surface_2d, plot_height_distribution
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.parametric_surface import generate_parametric_surface
+from src.spectral_surface import generate_random_gaussian_surface
+from src.visualization import plot_surface_3d, plot_surface_2d, plot_height_distribution
 
 # Generate surfaces using both methods
 print("Generating parametric surface...")
@@ -0,0 +1,183 @@
+"""
+Pluggable FFT backends for the FFT-based generators.
+
+Two backends are available: 'numpy' (numpy.fft, single-threaded) and 'scipy'
+(scipy.fft, multithreaded through its workers argument). The default is
+'scipy' when scipy is importable and 'numpy' otherwise. A scipy backend
+chosen by name (the default one, fft_backend='scipy', set_backend('scipy'))
+uses DEFAULT_WORKERS = -1, i.e. all cores, unless workers is given;
+set_default_workers changes this, e.g. to 1 in the ensemble's worker
+processes, which are already parallel. Asking for 'scipy'
+without scipy installed falls back to numpy with a warning. scipy.fft is
+imported on first use of the scipy backend, not when this module is loaded.
+
+The backend can be chosen globally with set_backend, temporarily with the
+use_backend context manager, or per call through the fft_backend argument of
+the generators, which accepts a backend name or a backend object.
+
+Both backends keep single precision: float32 input gives complex64 spectra.
+"""
+
+import contextvars
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+
+_NOT_LOADED = object()
+_scipy_fft = _NOT_LOADED
+
+BACKENDS = ('numpy', 'scipy')
+DEFAULT_WORKERS = -1
+PRECISIONS = (np.dtype(np.float32), np.dtype(np.float64))
+
+def _load_scipy_fft():
+    """
+    Import scipy.fft on first use; None when scipy is not installed.
+    """
+    global _scipy_fft
+    if _scipy_fft is _NOT_LOADED:
+        try:
+            import scipy.fft as _scipy_fft
+        except ImportError:  # pragma: no cover - scipy is in requirements.txt
+            _scipy_fft = None
+    return _scipy_fft
+
+def real_dtype(dtype):
+    """
+    Validate a working precision (float32 or float64) and return it as a numpy dtype.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in PRECISIONS:
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+    return dtype
+
+def complex_dtype(dtype):
+    """
+    Complex dtype of the spectra of a real dtype (complex64 for float32).
+    """
+    return np.result_type(dtype, np.complex64)
+
+class NumpyBackend:
+    """
+    numpy.fft backend.
+    """
+
+    name = 'numpy'
+    workers = None
+
+    def fft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return np.fft.fft2(a, s=s, axes=axes, norm=norm)
+
+    def ifft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return np.fft.ifft2(a, s=s, axes=axes, norm=norm)
+
+    def rfft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return np.fft.rfft2(a, s=s, axes=axes, norm=norm)
+
+    def irfft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return np.fft.irfft2(a, s=s, axes=axes, norm=norm)
+
+    def __repr__(self):
+        return "NumpyBackend()"
+
+class ScipyBackend:
+    """
+    scipy.fft backend; workers is passed through (-1 uses all cores).
+    """
+
+    name = 'scipy'
+
+    def __init__(self, workers=None):
+        self.workers = workers
+
+    def fft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return _load_scipy_fft().fft2(a, s=s, axes=axes, norm=norm, workers=self.workers)
+
+    def ifft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return _load_scipy_fft().ifft2(a, s=s, axes=axes, norm=norm, workers=self.workers)
+
+    def rfft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return _load_scipy_fft().rfft2(a, s=s, axes=axes, norm=norm, workers=self.workers)
+
+    def irfft2(self, a, s=None, axes=(-2, -1), norm=None):
+        return _load_scipy_fft().irfft2(a, s=s, axes=axes, norm=norm, workers=self.workers)
+
+    def __repr__(self):
+        return f"ScipyBackend(workers={self.workers!r})"
+
+_default_workers = DEFAULT_WORKERS
+
+def make_backend(name, workers=None):
+    """
+    Return a backend object for 'numpy' or 'scipy'.
+
+    Parameters:
+        name: 'numpy' or 'scipy'
+        workers: Number of scipy.fft workers; None uses the default (see set_default_workers)
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"FFT backend must be one of {BACKENDS}, got {name!r}")
+    if name == 'scipy':
+        if _load_scipy_fft() is not None:
+            return ScipyBackend(_default_workers if workers is None else workers)
+        warnings.warn("scipy is not installed, falling back to the numpy FFT backend")
+    return NumpyBackend()
+
+_default = None  # chosen on first use so that importing does not load scipy
+_override = contextvars.ContextVar('fft_backend_override', default=None)
+
+def get_backend(backend=None):
+    """
+    Resolve a per-call backend argument.
+
+    Parameters:
+        backend: None (the active backend), a backend name or a backend object
+    """
+    global _default
+    if backend is None:
+        backend = _override.get()
+        if backend is None:
+            if _default is None:
+                _default = make_backend('scipy' if _load_scipy_fft() is not None else 'numpy')
+            return _default
+    if isinstance(backend, str):
+        return make_backend(backend)
+    return backend
+
+def set_backend(backend, workers=None):
+    """
+    Set the process-wide default backend.
+
+    Parameters:
+        backend: 'numpy', 'scipy' or a backend object
+        workers: Number of scipy.fft workers (-1 for all cores); None uses
+            the default (see set_default_workers)
+    """
+    global _default
+    _default = make_backend(backend, workers) if isinstance(backend, str) else backend
+
+def set_default_workers(workers):
+    """
+    Set the number of scipy.fft workers of backends chosen by name.
+
+    The active default backend is updated too if it is a scipy backend.
+
+    Parameters:
+        workers: Number of workers (-1 for all cores, 1 for single-threaded)
+    """
+    global _default, _default_workers
+    _default_workers = workers
+    if isinstance(_default, ScipyBackend):
+        _default = ScipyBackend(workers)
+
+@contextmanager
+def use_backend(backend, workers=None):
+    """
+    Use a backend inside a with-block (in the current thread/context only).
+    """
+    token = _override.set(make_backend(backend, workers) if isinstance(backend, str) else backend)
+    try:
+        yield _override.get()
+    finally:
+        _override.reset(token)
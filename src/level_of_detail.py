@@ -0,0 +1,133 @@
+"""
+Level-of-detail helpers for interactive 3D rendering.
+
+Large surfaces are decimated to a vertex budget before they are sent to a
+plot: 'stride' keeps every k-th row and column (plus the last ones so the
+plot covers the full extent), 'minmax' reduces k x k blocks to the sample
+that deviates most from the block mean, so that peaks and valleys survive.
+crop_surface returns a full-resolution window for closer inspection.
+Statistics and export should keep using the full-resolution arrays.
+
+All functions take x, y either as 1-D axes or as meshgrids and return them in
+the same form.
+"""
+
+import numpy as np
+
+DEFAULT_MAX_VERTICES = 250_000
+LOD_METHODS = ('stride', 'minmax')
+
+def _axes(x, y):
+    """
+    Return 1-D x and y axes from 1-D axes or rectilinear meshgrids.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x.ndim == 2:
+        x = x[0, :]
+    if y.ndim == 2:
+        y = y[:, 0]
+    return x, y
+
+def _like(x_new, y_new, x, y):
+    """
+    Return the new axes in the form (1-D or meshgrid) of the inputs.
+    """
+    if np.ndim(x) == 2 or np.ndim(y) == 2:
+        X, Y = np.meshgrid(x_new, y_new)
+        return (X if np.ndim(x) == 2 else x_new), (Y if np.ndim(y) == 2 else y_new)
+    return x_new, y_new
+
+def decimation_step(shape, max_vertices=DEFAULT_MAX_VERTICES):
+    """
+    Smallest stride k such that a (rows, cols) grid decimated by k fits max_vertices.
+    """
+    rows, cols = shape
+    k = max(1, int(np.ceil(np.sqrt(rows * cols / max_vertices))))
+    while -(-rows // k) * -(-cols // k) > max_vertices:
+        k += 1
+    return k
+
+def _stride_indices(n, k):
+    idx = np.arange(0, n, k)
+    if idx[-1] != n - 1:
+        idx = np.append(idx, n - 1)
+    return idx
+
+def _block_view(a, k, fill):
+    """
+    Pad a 2-D array to a multiple of k and return it as (rows / k, cols / k, k * k) blocks.
+    """
+    rows, cols = a.shape
+    nr, nc = -(-rows // k), -(-cols // k)
+    padded = np.full((nr * k, nc * k), fill, dtype=float)
+    padded[:rows, :cols] = a
+    return padded.reshape(nr, k, nc, k).transpose(0, 2, 1, 3).reshape(nr, nc, k * k)
+
+def decimate_surface(x, y, z, max_vertices=DEFAULT_MAX_VERTICES, method='minmax'):
+    """
+    Decimate a surface to about max_vertices grid points.
+
+    'stride' may keep one extra row and column so that the last ones are included.
+
+    Parameters:
+        x, y: 1-D coordinate axes or meshgrids
+        z: Surface heights
+        max_vertices: Vertex budget
+        method: 'stride' or 'minmax'
+
+    Returns:
+        x, y, z: Decimated coordinates (same form as the inputs) and heights
+    """
+    if method not in LOD_METHODS:
+        raise ValueError(f"method must be one of {LOD_METHODS}, got {method!r}")
+    z = np.asarray(z)
+    k = decimation_step(z.shape, max_vertices)
+    if k == 1:
+        return x, y, z
+    xa, ya = _axes(x, y)
+
+    if method == 'stride':
+        rows = _stride_indices(z.shape[0], k)
+        cols = _stride_indices(z.shape[1], k)
+        x_new, y_new = _like(xa[cols], ya[rows], x, y)
+        return x_new, y_new, z[np.ix_(rows, cols)]
+
+    blocks = _block_view(z, k, np.nan)
+    mean = np.nanmean(blocks, axis=-1, keepdims=True)
+    deviation = np.where(np.isnan(blocks), -np.inf, np.abs(blocks - mean))
+    pick = np.argmax(deviation, axis=-1)[..., None]
+    z_new = np.take_along_axis(blocks, pick, axis=-1)[..., 0]
+
+    x_new = np.nanmean(_block_view(xa[None, :], k, np.nan)[0], axis=-1)
+    y_new = np.nanmean(_block_view(ya[:, None], k, np.nan)[:, 0], axis=-1)
+    x_new, y_new = _like(x_new, y_new, x, y)
+    return x_new, y_new, z_new
+
+def crop_surface(x, y, z, x_range=None, y_range=None):
+    """
+    Return the full-resolution part of a surface inside a window.
+
+    Parameters:
+        x, y: 1-D coordinate axes or meshgrids
+        z: Surface heights
+        x_range, y_range: (min, max) window bounds; None keeps the full extent
+
+    Returns:
+        x, y, z: Cropped coordinates (same form as the inputs) and heights
+    """
+    xa, ya = _axes(x, y)
+    cols = np.ones(len(xa), dtype=bool)
+    rows = np.ones(len(ya), dtype=bool)
+    if x_range is not None:
+        cols = (xa >= x_range[0]) & (xa <= x_range[1])
+    if y_range is not None:
+        rows = (ya >= y_range[0]) & (ya <= y_range[1])
+    if not cols.any() or not rows.any():
+        raise ValueError("the window does not contain any grid point")
+
+    cols = slice(np.argmax(cols), len(cols) - np.argmax(cols[::-1]))
+    rows = slice(np.argmax(rows), len(rows) - np.argmax(rows[::-1]))
+    x_new = x[rows, cols] if np.ndim(x) == 2 else xa[cols]
+    y_new = y[rows, cols] if np.ndim(y) == 2 else ya[rows]
+    return x_new, y_new, np.asarray(z)[rows, cols]
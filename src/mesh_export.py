@@ -0,0 +1,263 @@
+"""
+Indexed mesh and heightmap export.
+
+export_to_stl writes every triangle with its own three corners, so each grid
+vertex is repeated about six times. The PLY and OBJ exporters here write the
+same closed solid (stl_export.surface_vertices / surface_faces: top, bottom
+and four walls) as one shared vertex list plus integer face indices, which
+is several times smaller and needs no welding on import:
+
+    export_to_ply(surface, 'surface.ply')
+    export_to_obj(surface, 'surface.obj', tolerance=1e-5)   # adaptive mesh
+
+export_heightmap writes the heights alone as a 16-bit grayscale PNG or raw
+little-endian uint16 file, with a JSON sidecar holding the scale, offset and
+grid so that heights = offset + scale * value can be recovered
+(read_heightmap). PNG encoding uses zlib; no imaging library is needed.
+"""
+
+import io
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from .mesh_simplify import simplified_mesh
+from .profiling import stage
+from .stl_export import _mesh_dtype, surface_faces, surface_vertices
+from .surface import unpack_surface
+
+def _ply_header(n_vertices, n_faces, vertex_type, index_type):
+    return (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        "comment rough surface\n"
+        f"element vertex {n_vertices}\n"
+        f"property {vertex_type} x\n"
+        f"property {vertex_type} y\n"
+        f"property {vertex_type} z\n"
+        f"element face {n_faces}\n"
+        f"property list uchar {index_type} vertex_indices\n"
+        "end_header\n"
+    ).encode('ascii')
+
+def write_binary_ply(fh, vertices, faces):
+    """
+    Write an indexed triangle mesh to an open binary file handle as binary PLY.
+
+    Parameters:
+        fh: Binary file handle
+        vertices: (n_vertices, 3) float32 or float64 vertex array
+        faces: (n_faces, 3) vertex index array
+    """
+    vertex_type = 'double' if vertices.dtype == np.float64 else 'float'
+    index_type = 'int' if len(vertices) <= np.iinfo(np.int32).max else 'uint'
+    records = np.empty(len(faces), dtype=[('n', 'u1'), ('v', '<i4' if index_type == 'int' else '<u4', (3,))])
+    records['n'] = 3
+    records['v'] = faces
+    with stage('ply_write'):
+        fh.write(_ply_header(len(vertices), len(faces), vertex_type, index_type))
+        fh.write(np.asarray(vertices, dtype='<f8' if vertex_type == 'double' else '<f4').tobytes())
+        fh.write(records.tobytes())
+
+def _indexed_mesh(x, y, z, base_thickness, dtype, tolerance=None):
+    """
+    Vertices and faces of the full-resolution solid, or of the simplified one
+    when tolerance is given, and the achieved height error (None at full resolution).
+    """
+    if tolerance is not None:
+        vertices, faces, error = simplified_mesh(x, y, z, tolerance, base_thickness)
+        return vertices.astype(_mesh_dtype(x, y, z, dtype)), faces, error
+    rows, cols = np.shape(z)
+    with stage('mesh') as s:
+        vertices = surface_vertices(x, y, z, base_thickness, dtype)
+        faces = surface_faces(rows, cols)
+        s.record(vertices, faces)
+    return vertices, faces, None
+
+def ply_bytes(x, y=None, z=None, base_thickness=1.0, dtype=np.float32, tolerance=None):
+    """
+    Return the binary PLY of a surface as bytes (e.g. for a download button).
+
+    x may be a surface.Surface instead of x, y, z; tolerance as in export_to_ply.
+    """
+    x, y, z, base_thickness, dtype, tolerance = unpack_surface(x, y, z, base_thickness, dtype, tolerance)
+    buffer = io.BytesIO()
+    write_binary_ply(buffer, *_indexed_mesh(x, y, z, base_thickness, dtype, tolerance)[:2])
+    return buffer.getvalue()
+
+def export_to_ply(x, y=None, z=None, filename=None, base_thickness=1.0, dtype=np.float32, tolerance=None):
+    """
+    Export a surface to a binary PLY file with shared vertices.
+
+    Parameters:
+        x, y: Coordinate meshgrids or 1-D axes; or a surface.Surface as x
+        z: Surface heights
+        filename: Output PLY filename
+        base_thickness: Thickness of the base below the surface
+        dtype: Vertex dtype, np.float32 (default) or np.float64
+        tolerance: If given, write the adaptive mesh of
+            mesh_simplify.simplified_mesh with this maximum height error
+
+    Returns:
+        Achieved maximum height error when tolerance is given, else None
+    """
+    x, y, z, filename, base_thickness, dtype, tolerance = unpack_surface(
+        x, y, z, filename, base_thickness, dtype, tolerance)
+    with stage('export_to_ply'):
+        vertices, faces, error = _indexed_mesh(x, y, z, base_thickness, dtype, tolerance)
+        with open(filename, 'wb') as fh:
+            write_binary_ply(fh, vertices, faces)
+    return error
+
+OBJ_BLOCK = 100_000
+
+def _write_lines(fh, line, rows):
+    """
+    Write one formatted line per row of a 2-D array, a block of rows per format call.
+    """
+    for i in range(0, len(rows), OBJ_BLOCK):
+        block = rows[i:i + OBJ_BLOCK]
+        fh.write((line * len(block)) % tuple(block.ravel().tolist()))
+
+def export_to_obj(x, y=None, z=None, filename=None, base_thickness=1.0, precision=7, tolerance=None):
+    """
+    Export a surface to a Wavefront OBJ file with shared vertices.
+
+    OBJ is a text format; vertices and 1-based faces are formatted in blocks
+    of OBJ_BLOCK lines with one %-format per block.
+
+    Parameters:
+        x, y: Coordinate meshgrids or 1-D axes; or a surface.Surface as x
+        z: Surface heights
+        filename: Output OBJ filename
+        base_thickness: Thickness of the base below the surface
+        precision: Significant digits of the vertex coordinates
+        tolerance: If given, write the adaptive mesh of
+            mesh_simplify.simplified_mesh with this maximum height error
+
+    Returns:
+        Achieved maximum height error when tolerance is given, else None
+    """
+    x, y, z, filename, base_thickness, precision, tolerance = unpack_surface(
+        x, y, z, filename, base_thickness, precision, tolerance)
+    with stage('export_to_obj'):
+        vertices, faces, error = _indexed_mesh(x, y, z, base_thickness, None, tolerance)
+        with stage('obj_write'), open(filename, 'w') as fh:
+            fh.write("# rough surface\n")
+            _write_lines(fh, f'v %.{precision}g %.{precision}g %.{precision}g\n', vertices)
+            _write_lines(fh, 'f %d %d %d\n', faces + 1)
+    return error
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def _encode_png16(values, level):
+    rows, cols = values.shape
+    scanlines = np.zeros((rows, 1 + 2 * cols), dtype=np.uint8)  # filter byte 0 (None) per row
+    scanlines[:, 1:] = values.astype('>u2').view(np.uint8).reshape(rows, 2 * cols)
+    header = struct.pack('>IIBBBBB', cols, rows, 16, 0, 0, 0, 0)  # 16-bit grayscale
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), level)) + _png_chunk(b'IEND', b''))
+
+def _decode_png16(data):
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError("not a PNG file")
+    pos, idat, shape = 8, [], None
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            cols, rows, depth, color, _, _, interlace = struct.unpack('>IIBBBBB', body)
+            if (depth, color, interlace) != (16, 0, 0):
+                raise ValueError("only non-interlaced 16-bit grayscale PNGs are supported")
+            shape = (rows, cols)
+        elif kind == b'IDAT':
+            idat.append(body)
+        pos += 12 + length
+    rows, cols = shape
+    scanlines = np.frombuffer(zlib.decompress(b''.join(idat)), dtype=np.uint8).reshape(rows, 1 + 2 * cols)
+    if scanlines[:, 0].any():
+        raise ValueError("only PNGs without scanline filters are supported")
+    return scanlines[:, 1:].copy().view('>u2').astype(np.uint16)
+
+def export_heightmap(x, y=None, z=None, filename=None, format=None, compression=6):
+    """
+    Export heights as a 16-bit heightmap plus a JSON metadata sidecar.
+
+    Heights are quantized to 0..65535 between their minimum and maximum, so
+    that height = offset + scale * value to within scale / 2. The first image
+    row is the last grid row (largest y), so north is up in image viewers.
+    The sidecar filename + '.json' holds offset, scale, the grid origin and
+    spacing, the shape and the row order.
+
+    Parameters:
+        x, y: Coordinate meshgrids or 1-D axes; or a surface.Surface as x
+        z: Surface heights
+        filename: Output filename
+        format: 'png' (16-bit grayscale) or 'raw' (little-endian uint16);
+            default from the filename extension
+        compression: zlib level of the PNG data
+
+    Returns:
+        Metadata dict (as written to the sidecar)
+    """
+    x, y, z, filename, format, compression = unpack_surface(x, y, z, filename, format, compression)
+    filename = str(filename)
+    format = format or ('raw' if filename.lower().endswith('.raw') else 'png')
+    if format not in ('png', 'raw'):
+        raise ValueError(f"format must be 'png' or 'raw', got {format!r}")
+    z = np.asarray(z)
+    if z.ndim != 2:
+        raise ValueError("z must be 2-D")
+    x, y = np.asarray(x), np.asarray(y)
+    x = x[0] if x.ndim == 2 else x
+    y = y[:, 0] if y.ndim == 2 else y
+
+    with stage('export_heightmap', format=format) as s:
+        offset = float(z.min())
+        span = float(z.max()) - offset
+        scale = span / 65535.0 if span > 0 else 1.0
+        values = np.rint((z[::-1] - offset) / scale).astype(np.uint16)
+        data = _encode_png16(values, compression) if format == 'png' else values.astype('<u2').tobytes()
+        s.record(values)
+        with open(filename, 'wb') as fh:
+            fh.write(data)
+
+    meta = {
+        'format': format,
+        'shape': list(z.shape),
+        'offset': offset,
+        'scale': scale,
+        'x0': float(x[0]),
+        'y0': float(y[0]),
+        'dx': float(x[1] - x[0]) if len(x) > 1 else 1.0,
+        'dy': float(y[1] - y[0]) if len(y) > 1 else 1.0,
+        'row_order': 'y descending',
+    }
+    with open(filename + '.json', 'w') as fh:
+        json.dump(meta, fh, indent=1)
+    return meta
+
+def read_heightmap(filename):
+    """
+    Read a heightmap written by export_heightmap.
+
+    Returns:
+        z, x, y: Heights in grid row order (y ascending) and 1-D axes
+    """
+    filename = str(filename)
+    with open(filename + '.json') as fh:
+        meta = json.load(fh)
+    with open(filename, 'rb') as fh:
+        data = fh.read()
+    rows, cols = meta['shape']
+    if meta['format'] == 'png':
+        values = _decode_png16(data)
+    else:
+        values = np.frombuffer(data, dtype='<u2').reshape(rows, cols)
+    z = meta['offset'] + meta['scale'] * values[::-1].astype(np.float64)
+    x = meta['x0'] + meta['dx'] * np.arange(cols)
+    y = meta['y0'] + meta['dy'] * np.arange(rows)
+    return z, x, y
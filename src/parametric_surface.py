@@ -1,13 +1,13 @@
 """
 Parametric surface generation using double-sum method
 Implements the core of the Bjorn Sjodin 's COMSOL blog's parametric surface formula:
-    
+
       0.01 * sum_{m=-N..N} sum_{n=-N..N}(
           if(m=0 || n=0, 0, (m^2 + n^2)^(-b/2) * cos(2*pi*(m*s1 + n*s2) + random_phase))
       ),
-    
+
     with default parameters matching the blog snippet.
-    
+
     Returns
     -------
     S1 : ndarray, shape (num_points, num_points)
@@ -18,32 +18,357 @@ Implements the core of the Bjorn Sjodin 's COMSOL blog's parametric surface form
         Resulting surface values.
 
     Created by: Heming Qin (2024-12-31)
+
+Because m and n are integers, sampling the double sum on a uniform grid over
+[0, 1] is a single inverse 2-D FFT of the (sparse) mode coefficients; the
+direct summation is kept for arbitrary sample coordinates.
 """
 
+from functools import lru_cache
+
 import numpy as np
 
+from .fft_backend import complex_dtype, get_backend, real_dtype
+from .profiling import stage
+from .random_state import child_seed, draw_realizations, make_rng
+from .surface import Surface
+
+METHODS = ('auto', 'fft', 'direct')
+
+@lru_cache(maxsize=32)
+def _mode_table(N, b):
+    """
+    Return the mode indices and amplitudes of the double sum.
+
+    Modes are listed in the order of the original double loop (m outer,
+    n inner, skipping m == 0 and n == 0), so phases drawn in one call line up
+    with the phases the loop used to draw one at a time.
+    """
+    k = np.concatenate([np.arange(-N, 0), np.arange(1, N + 1)])
+    m, n = np.meshgrid(k, k, indexing='ij')
+    m = m.ravel()
+    n = n.ravel()
+    r = (m**2 + n**2)**(-b / 2.0)
+    for a in (m, n, r):
+        a.setflags(write=False)
+    return m, n, r
+
+def _unit_grid_size(s):
+    """
+    Return M if s samples [0, 1] uniformly as j / M for j = 0..M, else None.
+    """
+    s = np.asarray(s, dtype=float)
+    if s.ndim != 1 or len(s) < 2:
+        return None
+    M = len(s) - 1
+    if np.allclose(s, np.arange(M + 1) / M, rtol=0.0, atol=1e-12):
+        return M
+    return None
+
+def _sum_direct(m, n, r, phase, S1, S2, dtype=np.float64):
+    """
+    Evaluate the double sum mode by mode on arbitrary sample coordinates.
+
+    S1 and S2 may be sparse (broadcastable) grids. phase has shape
+    (..., n_modes); the result has shape (...,) + the broadcast grid shape.
+    """
+    phase = np.asarray(phase)
+    shape = np.broadcast_shapes(np.shape(S1), np.shape(S2))
+    f = np.zeros(phase.shape[:-1] + shape, dtype=dtype)
+    expand = (Ellipsis,) + (None,) * len(shape)
+    for k in range(len(r)):
+        f += r[k] * np.cos(2.0 * np.pi * (m[k] * S1 + n[k] * S2) + phase[..., k][expand])
+    return f
+
+def _sum_fft(m, n, r, phase, M1, M2, fft_backend=None, dtype=np.float64):
+    """
+    Evaluate the double sum on the uniform grid s1 = j / M1, s2 = i / M2.
+
+    The coefficients r * exp(i * phase) are scattered into an (M2, M1) array
+    (aliased modes accumulate, which is exact for integer frequencies), one
+    unnormalized inverse FFT gives the sum on the periodic grid, and the
+    s = 1 row and column are copies of s = 0.
+
+    phase has shape (..., n_modes); the result has shape (..., M2 + 1, M1 + 1)
+    and the given real dtype (the FFT runs in the matching complex dtype).
+    """
+    phase = np.asarray(phase)
+    batch_shape = phase.shape[:-1]
+    with stage('coefficients') as s:
+        coeffs = (r * np.exp(1j * phase)).reshape(-1, len(r))
+        C = np.zeros((coeffs.shape[0], M2 * M1), dtype=complex_dtype(dtype))
+        np.add.at(C, (slice(None), (n % M2) * M1 + m % M1), coeffs)
+        s.record(C)
+    with stage('ifft') as s:
+        f = get_backend(fft_backend).ifft2(C.reshape(-1, M2, M1), norm='forward').real
+        s.record(f)
+    f = np.concatenate([f, f[:, :1, :]], axis=1)
+    f = np.concatenate([f, f[:, :, :1]], axis=2)
+    return f.reshape(batch_shape + f.shape[1:])
+
+def _evaluate(N, b, factor, num_points, method, s1, s2, draw_phases, fft_backend, dtype=np.float64):
+    """
+    Shared body of the single and batched generators.
+
+    draw_phases(n_modes) returns the mode phases with shape (..., n_modes).
+    Returns the 1-D sample coordinates s1, s2 and the heights.
+    """
+    if N < 0:
+        raise ValueError("N must be non-negative")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+
+    if s1 is None:
+        s1 = np.linspace(0, 1, num_points)
+    if s2 is None:
+        s2 = np.linspace(0, 1, num_points)
+
+    M1 = _unit_grid_size(s1)
+    M2 = _unit_grid_size(s2)
+    uniform = M1 is not None and M2 is not None
+    if method == 'fft' and not uniform:
+        raise ValueError("method='fft' requires uniform sample coordinates on [0, 1]")
+
+    with stage('generate_parametric_surface', N=N):
+        m, n, r = _mode_table(N, float(b))
+        with stage('phases') as s:
+            phase = draw_phases(len(r))
+            s.record(phase)
+
+        if method == 'direct' or not uniform:
+            with stage('sum_direct') as s:
+                S1, S2 = np.meshgrid(s1, s2, sparse=True)
+                f = _sum_direct(m, n, r, phase, S1, S2, dtype)
+                s.record(f)
+        else:
+            f = _sum_fft(m, n, r, phase, M1, M2, fft_backend, dtype)
+
+        with stage('scale'):
+            f *= factor
+    return np.asarray(s1), np.asarray(s2), f
+
+def _result(s1, s2, f, as_surface, params, seed):
+    """
+    Return S1, S2, f, or a Surface with the 1-D coordinates when as_surface is set.
+    """
+    if as_surface:
+        return Surface(f, s1, s2, params, seed)
+    S1, S2 = np.meshgrid(s1.astype(f.dtype, copy=False), s2.astype(f.dtype, copy=False))
+    return S1, S2, f
+
 def generate_parametric_surface(
     N=10,          # Summation limit for m,n: -N..N
     b=1.8,         # Spectral exponent
     factor=0.01,   # Leading multiplier
-    num_points=101 # Number of sample points
+    num_points=101,# Number of sample points
+    method='auto', # 'auto', 'fft' or 'direct'
+    s1=None,       # Optional sample coordinates along s1 (default: uniform on [0, 1])
+    s2=None,       # Optional sample coordinates along s2 (default: uniform on [0, 1])
+    seed=None,     # None (global np.random state), int, SeedSequence or Generator
+    fft_backend=None, # FFT backend name or object (default: the active backend)
+    as_surface=False, # Return a Surface (1-D axes) instead of S1, S2, f
+    dtype=np.float64 # Working precision, np.float64 or np.float32
 ):
     """
     Generate a rough surface using double summation method.
+
+    Parameters:
+        N: Summation limit for the mode indices m, n in -N..N
+        b: Spectral exponent
+        factor: Leading multiplier
+        num_points: Number of sample points per axis when s1/s2 are not given
+        method: 'fft' evaluates the sum with one inverse FFT (uniform grids on
+            [0, 1] only), 'direct' sums the modes one by one, and 'auto' picks
+            'fft' whenever the grid allows it
+        s1, s2: Optional 1-D sample coordinates; non-uniform coordinates are
+            evaluated with the direct sum
+        seed: None to draw phases from the global np.random state, otherwise
+            an int, SeedSequence or Generator
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        as_surface: Return a surface.Surface holding the 1-D coordinates
+            instead of the meshgrids
+        dtype: Working precision, np.float64 or np.float32 (complex64 FFT,
+            float32 heights and meshgrids)
+
+    Returns:
+        S1, S2: Coordinate meshgrids
+        f: Surface heights
+    """
+    rng = make_rng(seed)
+    if rng is None:
+        draw_phases = lambda k: 2.0 * np.pi * np.random.rand(k)
+    else:
+        draw_phases = lambda k: 2.0 * np.pi * rng.random(k)
+    s1, s2, f = _evaluate(N, b, factor, num_points, method, s1, s2, draw_phases, fft_backend, real_dtype(dtype))
+    return _result(s1, s2, f, as_surface, dict(N=N, b=b, factor=factor, method=method), seed)
+
+def generate_parametric_surface_batch(
+    n_realizations,
+    N=10,
+    b=1.8,
+    factor=0.01,
+    num_points=101,
+    method='auto',
+    s1=None,
+    s2=None,
+    seed=None,
+    fft_backend=None,
+    as_surface=False,
+    dtype=np.float64
+):
+    """
+    Generate several independent realizations of the double-sum surface at once.
+
+    The grid, the mode table and the FFT are shared by all realizations; only
+    the phases differ.
+
+    Parameters:
+        n_realizations: Number of surfaces to generate
+        N, b, factor, num_points, method, s1, s2: As in generate_parametric_surface
+        seed: None, int or SeedSequence (one child SeedSequence is spawned per
+            realization, see random_state.realization_seeds), a sequence of
+            per-realization seeds, or a Generator to draw all phases from
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        as_surface: Return a batched surface.Surface instead of S1, S2, f
+        dtype: Working precision, np.float64 or np.float32
+
+    Returns:
+        S1, S2: Coordinate meshgrids
+        f: Surface heights, shape (n_realizations, ny, nx)
+    """
+    draw_phases = lambda k: draw_realizations(
+        seed, n_realizations, lambda rng, shape: 2.0 * np.pi * rng.random(shape + (k,))
+    )
+    s1, s2, f = _evaluate(N, b, factor, num_points, method, s1, s2, draw_phases, fft_backend, real_dtype(dtype))
+    return _result(s1, s2, f, as_surface, dict(N=N, b=b, factor=factor, method=method), seed)
+
+class ParametricSurface:
     """
-    s1 = np.linspace(0, 1, num_points)
-    s2 = np.linspace(0, 1, num_points)
-    S1, S2 = np.meshgrid(s1, s2)
-    
-    f = np.zeros_like(S1)
-    
-    for m in range(-N, N + 1):
-        for n in range(-N, N + 1):
-            if m == 0 or n == 0:
-                continue
-            r = (m**2 + n**2)**(-b / 2.0)
-            phase = 2.0 * np.pi * np.random.rand()
-            f += r * np.cos(2.0 * np.pi * (m * S1 + n * S2) + phase)
-    
-    f *= factor
-    return S1, S2, f 
\ No newline at end of file
+    Double-sum surface on the uniform [0, 1] grid with cheap incremental updates.
+
+    The random phases of ring r (the modes with max(|m|, |n|) == r) are drawn
+    from child_seed(seed, r), so every mode keeps its phase when N grows or
+    shrinks and a given (N, seed) is always the same realization, whatever
+    the update history. This is a different realization from
+    generate_parametric_surface with the same seed.
+
+    The unscaled sum is kept, so that
+        - changing factor only rescales it,
+        - changing b reweights the mode amplitudes (one inverse FFT),
+        - changing N adds or subtracts the contribution of the rings in between.
+
+    Parameters:
+        N, b, factor, num_points: As in generate_parametric_surface
+        seed: int or SeedSequence; None draws fresh entropy
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        dtype: Working precision, np.float64 or np.float32
+    """
+
+    def __init__(self, N=10, b=1.8, factor=0.01, num_points=101, seed=None, fft_backend=None,
+                 dtype=np.float64):
+        if N < 0:
+            raise ValueError("N must be non-negative")
+        if num_points < 2:
+            raise ValueError("num_points must be at least 2")
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed = seed
+        self.num_points = num_points
+        self.fft_backend = fft_backend
+        self.dtype = real_dtype(dtype)
+        self.N = N
+        self.b = float(b)
+        self.factor = factor
+        self._rings = {}
+        self._unit = self._sum(0, N, self.b)
+
+    def _ring(self, r):
+        """
+        Mode indices and phases of ring r, drawn once and kept.
+        """
+        if r not in self._rings:
+            m, n, _ = _mode_table(r, 0.0)
+            on_ring = np.maximum(np.abs(m), np.abs(n)) == r
+            phase = 2.0 * np.pi * np.random.default_rng(child_seed(self.seed, r)).random(on_ring.sum())
+            self._rings[r] = (m[on_ring], n[on_ring], phase)
+        return self._rings[r]
+
+    def _sum(self, lo, hi, b):
+        """
+        Unscaled sum over the rings lo + 1..hi.
+        """
+        rings = [self._ring(r) for r in range(lo + 1, hi + 1)]
+        if not rings:
+            return np.zeros((self.num_points, self.num_points), dtype=self.dtype)
+        m, n, phase = (np.concatenate(a) for a in zip(*rings))
+        r = (m**2 + n**2)**(-b / 2.0)
+        M = self.num_points - 1
+        return _sum_fft(m, n, r, phase, M, M, self.fft_backend, self.dtype)
+
+    def set_factor(self, factor):
+        """
+        Change the leading multiplier (no re-summation).
+        """
+        self.factor = factor
+
+    def set_b(self, b):
+        """
+        Change the spectral exponent by reweighting the mode amplitudes.
+        """
+        b = float(b)
+        if b != self.b:
+            self.b = b
+            self._unit = self._sum(0, self.N, b)
+
+    def set_N(self, N):
+        """
+        Change the summation limit by adding or removing the outer rings.
+        """
+        if N < 0:
+            raise ValueError("N must be non-negative")
+        if N > self.N:
+            self._unit += self._sum(self.N, N, self.b)
+        elif N < self.N:
+            self._unit -= self._sum(N, self.N, self.b)
+        self.N = N
+
+    def update(self, N=None, b=None, factor=None):
+        """
+        Apply any combination of parameter changes with the cheapest updates.
+        """
+        if b is not None and float(b) != self.b:
+            if N is not None:
+                if N < 0:
+                    raise ValueError("N must be non-negative")
+                self.N = N
+            self.b = float(b)
+            self._unit = self._sum(0, self.N, self.b)
+        elif N is not None:
+            self.set_N(N)
+        if factor is not None:
+            self.set_factor(factor)
+        return self
+
+    @property
+    def heights(self):
+        """Surface heights, shape (num_points, num_points)."""
+        return self.factor * self._unit
+
+    def as_surface(self):
+        """
+        Return the current heights as a surface.Surface.
+        """
+        s = np.linspace(0, 1, self.num_points)
+        return Surface(self.heights, s, s, dict(N=self.N, b=self.b, factor=self.factor), self.seed)
+
+    @property
+    def S1(self):
+        """Mesh of s1 values in [0, 1]."""
+        s = np.linspace(0, 1, self.num_points)
+        return np.meshgrid(s, s)[0]
+
+    @property
+    def S2(self):
+        """Mesh of s2 values in [0, 1]."""
+        s = np.linspace(0, 1, self.num_points)
+        return np.meshgrid(s, s)[1]
@@ -0,0 +1,219 @@
+"""
+Opt-in per-stage timing instrumentation.
+
+The generators and exporters wrap their internal stages (noise generation,
+kernel construction, FFTs, scaling, mesh building, STL writing, ...) in
+stage(name). Nothing is recorded unless a Profiler is active or a hook is
+registered; stage() then returns a shared no-op object, so instrumentation
+costs one context-variable lookup per stage.
+
+    with profile(N_x=4096) as prof:
+        generate_random_gaussian_surface(N_x=4096, seed=0)
+    print(prof.summary())
+    prof.to_csv('trace.csv')
+
+Each record holds the stage name, its path of enclosing stages, start time
+and duration in seconds, the shape, dtype and bytes of the arrays the stage
+reported as its output, and the profiler's tags (e.g. sweep parameters), so
+traces of a sweep can be concatenated and aggregated with summarize.
+Profilers are tied to the current thread or context (contextvars); hooks
+added with add_hook receive the records of every thread.
+"""
+
+import contextvars
+import csv
+import json
+import time
+
+import numpy as np
+
+_profilers = contextvars.ContextVar('profilers', default=())
+_stage_path = contextvars.ContextVar('stage_path', default='')
+_hooks = []
+
+class _NullStage:
+    """
+    Stage used when profiling is disabled; every method is a no-op.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, *arrays, **info):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    """
+    A running stage; reports its record to the active profilers and hooks on exit.
+    """
+
+    __slots__ = ('name', 'info', 'receivers', 'path', 'start', 'token')
+
+    def __init__(self, name, receivers, info):
+        self.name = name
+        self.info = info
+        self.receivers = receivers
+
+    def __enter__(self):
+        parent = _stage_path.get()
+        self.path = f'{parent}/{self.name}' if parent else self.name
+        self.token = _stage_path.set(self.path)
+        self.start = time.perf_counter()
+        return self
+
+    def record(self, *arrays, **info):
+        """
+        Report the stage's output arrays (shape, dtype and total bytes) and extra fields.
+        """
+        if arrays:
+            first = np.asarray(arrays[0])
+            self.info.setdefault('shape', 'x'.join(map(str, first.shape)))
+            self.info.setdefault('dtype', str(first.dtype))
+            self.info['nbytes'] = self.info.get('nbytes', 0) + sum(np.asarray(a).nbytes for a in arrays)
+        self.info.update(info)
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _stage_path.reset(self.token)
+        record = {'stage': self.name, 'path': self.path, 'start': self.start, 'duration': end - self.start}
+        record.update(self.info)
+        for receiver in self.receivers:
+            receiver(record)
+        return False
+
+def stage(name, **info):
+    """
+    Context manager timing one named stage.
+
+    Returns a no-op object when profiling is disabled. Inside the block,
+    .record(*arrays, **info) attaches the output arrays and extra fields.
+    """
+    profilers = _profilers.get()
+    if not profilers and not _hooks:
+        return _NULL_STAGE
+    return _Stage(name, profilers + tuple(_hooks), info)
+
+def add_hook(callback):
+    """
+    Register callback(record) to receive every stage record, in all threads.
+    """
+    _hooks.append(callback)
+    return callback
+
+def remove_hook(callback):
+    """
+    Unregister a callback added with add_hook.
+    """
+    _hooks.remove(callback)
+
+class Profiler:
+    """
+    Collects stage records while active (use as a context manager).
+
+    Parameters:
+        callback: Optional callback(record) called for every record
+        tags: Fields added to every record, e.g. the parameters of a sweep point
+    """
+
+    def __init__(self, callback=None, **tags):
+        self.callback = callback
+        self.tags = tags
+        self.records = []
+        self._token = None
+        self._origin = None
+
+    def __call__(self, record):
+        record = dict(self.tags, **record)
+        record['start'] -= self._origin
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def __enter__(self):
+        self._origin = time.perf_counter()
+        self._token = _profilers.set(_profilers.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _profilers.reset(self._token)
+        return False
+
+    def summary(self, by=('path',)):
+        """
+        Aggregate the records (see summarize).
+        """
+        return summarize(self.records, by)
+
+    def to_json(self, path):
+        """
+        Write the records as a JSON list.
+        """
+        with open(path, 'w') as fh:
+            json.dump(self.records, fh, indent=1, default=str)
+
+    def to_csv(self, path, append=False):
+        """
+        Write the records as CSV; append=True adds rows to an existing trace.
+        """
+        write_csv(self.records, path, append)
+
+def profile(callback=None, **tags):
+    """
+    Return a Profiler to use as a context manager; tags are added to every record.
+    """
+    return Profiler(callback, **tags)
+
+def write_csv(records, path, append=False):
+    """
+    Write stage records as CSV with the union of their fields as columns.
+    """
+    fields = ['stage', 'path', 'start', 'duration', 'shape', 'dtype', 'nbytes']
+    for record in records:
+        fields += [key for key in record if key not in fields]
+    header = None
+    if append:
+        try:
+            with open(path, newline='') as fh:
+                header = next(csv.reader(fh), None)
+        except FileNotFoundError:
+            pass
+    with open(path, 'a' if header else 'w', newline='') as fh:
+        # Appended rows must fit the existing columns (DictWriter raises otherwise)
+        writer = csv.DictWriter(fh, fieldnames=header or fields)
+        if not header:
+            writer.writeheader()
+        writer.writerows(records)
+
+def summarize(records, by=('path',)):
+    """
+    Aggregate stage records.
+
+    Parameters:
+        records: Iterable of record dicts (e.g. Profiler.records, or rows of
+            several traces)
+        by: Record fields to group on, e.g. ('path',) or ('stage', 'N_x')
+
+    Returns:
+        Dict mapping group keys (a tuple unless by has one field) to dicts
+        with 'count', 'total', 'mean', 'max' duration and total 'nbytes'
+    """
+    groups = {}
+    for record in records:
+        key = tuple(record.get(field) for field in by)
+        key = key[0] if len(by) == 1 else key
+        group = groups.setdefault(key, {'count': 0, 'total': 0.0, 'max': 0.0, 'nbytes': 0})
+        duration = float(record['duration'])
+        group['count'] += 1
+        group['total'] += duration
+        group['max'] = max(group['max'], duration)
+        group['nbytes'] += int(record.get('nbytes') or 0)
+    for group in groups.values():
+        group['mean'] = group['total'] / group['count']
+    return groups
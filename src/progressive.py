@@ -0,0 +1,303 @@
+"""
+Progressive (coarse-to-fine) surface generation.
+
+A preview generated at a lower resolution with the same seed is normally a
+different realization, because the noise is drawn per grid point. Here the
+random content lives in the frequency domain instead: the unit complex
+Gaussian coefficient of every integer wavenumber (m, n) is drawn from
+child_seed(seed, r), ring by ring (r = max(|m|, |n|)), as the phases of
+parametric_surface.ParametricSurface are. A grid of n_x by n_y points uses
+the modes |m| <= (n_x - 1) // 2, |n| <= (n_y - 1) // 2, so a finer level keeps
+every coefficient of the coarser ones and only adds higher frequencies: each
+level is the low-pass of the final surface.
+
+    progressive = ProgressiveSurface(N_x=2048, h=0.001, clx=0.5, seed=0)
+    for surface in progressive.levels(preview=64):
+        show(surface)       # 64 x 64, 128 x 128, ..., 2048 x 2048
+
+The heights are Re(sum C(m, n) * A(m, n) * exp(i k . (x - x0))) with one
+amplitude A for all levels:
+
+- model=None: the exponential kernel of generate_random_gaussian_surface
+  with its normalization (|rfft2| of the kernel on the final grid), so the
+  final level has the statistics of that generator's default surface,
+  including its mean, apart from the Nyquist modes;
+- a registered PSD model (see psd_models): the square root of the PSD,
+  scaled so that the final level has expected RMS height h. Unlike
+  generate_random_gaussian_surface the RMS of a single realization is not
+  rescaled to h exactly, since that would change the preview once the high
+  frequencies are known.
+
+Like generate_random_gaussian_surface, the surface is periodic over
+N_x * dx with dx = rL_x / (N_x - 1), so the final level lies on its
+linspace axes and x_j = -rL_x / 2 + j * N_x * dx / n_x on a level of n_x
+points. When N_x is divisible by 2^k the level 2^k times coarser holds
+exactly every 2^k-th sample of the final grid.
+
+progressive_parametric_surface does the same for the double-sum surface,
+whose modes do not depend on the grid at all: the levels are one
+ParametricSurface realization sampled with more and more points.
+"""
+
+import numpy as np
+
+from .fft_backend import complex_dtype, get_backend, real_dtype
+from .parametric_surface import ParametricSurface
+from .profiling import stage
+from .psd_models import get_psd_model
+from .random_state import child_seed
+from .spectral_surface import _grid, _params, kernel_rfft
+from .surface import Surface
+
+def _halvings(n, preview):
+    """
+    Number of times n can be halved (rounding up) staying at or above preview.
+    """
+    k = 0
+    while -(-n // 2**(k + 1)) >= preview:
+        k += 1
+    return k
+
+def level_sizes(n, preview):
+    """
+    Return the level sizes ceil(n / 2^k), coarsest first, down to no fewer than preview points.
+
+    Parameters:
+        n: Final number of points (or intervals) along an axis
+        preview: Smallest size of the coarsest level
+
+    Returns:
+        List of sizes ending with n
+    """
+    return [-(-n // 2**k) for k in range(_halvings(n, preview), -1, -1)]
+
+def _place_ring(S, r, values):
+    """
+    Write the 8 r coefficients of ring r > 0 into the centered mode array S.
+
+    A ring is listed as the row n = -r, the row n = r, then the columns
+    m = -r and m = r without their corners, each in increasing order; the
+    modes outside S are skipped.
+    """
+    my, mx = S.shape[0] // 2, S.shape[1] // 2
+    if r <= my:
+        a, b = max(-r, -mx), min(r, mx)
+        S[my - r, mx + a:mx + b + 1] = values[a + r:b + r + 1]
+        S[my + r, mx + a:mx + b + 1] = values[3 * r + 1 + a:3 * r + 2 + b]
+    if r <= mx:
+        c, d = max(-r + 1, -my), min(r - 1, my)
+        S[my + c:my + d + 1, mx - r] = values[5 * r + 1 + c:5 * r + 2 + d]
+        S[my + c:my + d + 1, mx + r] = values[7 * r + c:7 * r + 1 + d]
+
+def _period(N, rL):
+    """
+    Period N * dx of the generator's grid of N points over rL (dx = rL / (N - 1)).
+    """
+    return N * rL / max(N - 1, 1)
+
+def _mode_index(n_points):
+    """
+    Integer wavenumbers of the FFT axis and the mask of the ones in use (no Nyquist mode).
+    """
+    m = np.fft.fftfreq(n_points, 1.0 / n_points).round().astype(int)
+    return m, np.abs(m) <= (n_points - 1) // 2
+
+class ProgressiveSurface:
+    """
+    Spectral surface that can be evaluated at any resolution with nested random content.
+
+    Parameters:
+        N_x, N_y, rL_x, rL_y, h, clx, cly: Final grid, RMS height and
+            correlation lengths, as in generate_random_gaussian_surface
+        model: None for the exponential kernel of generate_random_gaussian_surface,
+            or a registered PSD model name ('gaussian', 'exponential', ...)
+        model_params: Dict of model parameters, e.g. {'hurst': 0.7}
+        seed: int or SeedSequence; None draws fresh entropy
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        dtype: Working precision, np.float64 or np.float32
+    """
+
+    def __init__(self, N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001, clx=2.0, cly=None,
+                 model='gaussian', model_params=None, seed=None, fft_backend=None, dtype=np.float64):
+        self.N_x, self.N_y, self.rL_x, self.rL_y, self.clx, self.cly, _, _ = _grid(
+            N_x, N_y, rL_x, rL_y, h, clx, cly)
+        self.psd = None if model is None else get_psd_model(model)
+        self.period_x = _period(self.N_x, self.rL_x)
+        self.period_y = _period(self.N_y, self.rL_y)
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed = seed
+        self.h = h
+        self.model = model
+        self.model_params = model_params
+        self.fft_backend = fft_backend
+        self.dtype = real_dtype(dtype)
+        self._scale = None
+        self._kernel = None
+
+    def _kernel_amplitude(self):
+        """
+        |FFT| of the normalized exponential kernel on the final grid, full (N_y, N_x) spectrum.
+        """
+        if self._kernel is None:
+            half = np.abs(kernel_rfft(self.N_x, self.N_y, self.rL_x, self.rL_y, self.clx, self.cly,
+                                      np.float64, self.fft_backend))
+            # The kernel is real: |F(n, m)| = |F(-n, -m)| fills the columns past N_x // 2
+            kernel = np.empty((self.N_y, self.N_x))
+            kernel[:, :half.shape[1]] = half
+            m = np.arange(half.shape[1], self.N_x)
+            kernel[:, half.shape[1]:] = half[(-np.arange(self.N_y)) % self.N_y][:, self.N_x - m]
+            self._kernel = kernel
+        return self._kernel
+
+    def _amplitude(self, n_x, n_y):
+        """
+        Mode amplitudes on the (n_y, n_x) FFT grid, zero outside the used modes.
+
+        The square root of the PSD is also zero at DC; the kernel keeps it,
+        as generate_random_gaussian_surface does.
+        """
+        m, use_m = _mode_index(n_x)
+        n, use_n = _mode_index(n_y)
+        if self.psd is None:
+            amplitude = self._kernel_amplitude()[(n % self.N_y)[:, None], (m % self.N_x)[None, :]]
+        else:
+            kx = 2.0 * np.pi * m / self.period_x
+            ky = 2.0 * np.pi * n / self.period_y
+            amplitude = np.sqrt(self.psd(kx[None, :], ky[:, None], self.clx, self.cly, **(self.model_params or {})))
+            amplitude[0, 0] = 0.0
+        return amplitude * (use_n[:, None] & use_m[None, :])
+
+    @property
+    def scale(self):
+        """
+        Amplitude scale: that of generate_random_gaussian_surface for the
+        kernel, else the one giving the final level an expected RMS height of h.
+        """
+        if self._scale is None:
+            if self.psd is None:
+                # rfft2 of h-scaled white noise has variance h^2 N_x N_y per mode, spread
+                # over real and imaginary parts; irfft2 divides by N_x N_y
+                self._scale = self.h * np.sqrt(2.0 / (self.N_x * self.N_y))
+            else:
+                power = 0.5 * np.sum(self._amplitude(self.N_x, self.N_y)**2)
+                self._scale = self.h / np.sqrt(power) if power > 0 else 0.0
+        return self._scale
+
+    def coefficients(self, n_x, n_y):
+        """
+        Unit complex Gaussian coefficients of the (n_y, n_x) grid, in FFT order.
+
+        Ring r is always drawn whole from child_seed(seed, r) (8 r real parts,
+        then 8 r imaginary parts), so a coefficient does not depend on the
+        grid it is requested for. Unused (Nyquist) modes are zero.
+        """
+        mx, my = (n_x - 1) // 2, (n_y - 1) // 2
+        S = np.empty((2 * my + 1, 2 * mx + 1), dtype=complex_dtype(self.dtype))
+        for r in range(max(mx, my) + 1):
+            draws = np.random.default_rng(child_seed(self.seed, r)).standard_normal((2, max(8 * r, 1)))
+            values = (draws[0] + 1j * draws[1]) / np.sqrt(2.0)
+            if r == 0:
+                S[my, mx] = values[0]
+            else:
+                _place_ring(S, r, values)
+
+        C = np.zeros((n_y, n_x), dtype=S.dtype)
+        C[:my + 1, :mx + 1] = S[my:, mx:]
+        C[:my + 1, n_x - mx:] = S[my:, :mx]
+        C[n_y - my:, :mx + 1] = S[:my, mx:]
+        C[n_y - my:, n_x - mx:] = S[:my, :mx]
+        return C
+
+    def axes(self, n_x, n_y):
+        """
+        1-D axes of an (n_y, n_x) level; the final level's are the generator's linspace axes.
+        """
+        x = -self.rL_x / 2 + self.period_x * np.arange(n_x) / n_x
+        y = -self.rL_y / 2 + self.period_y * np.arange(n_y) / n_y
+        return x.astype(self.dtype), y.astype(self.dtype)
+
+    def level(self, n_x=None, n_y=None):
+        """
+        Evaluate the surface on an n_x by n_y grid (default: the final grid).
+
+        Returns:
+            surface.Surface whose params hold the level's N_x and N_y
+        """
+        n_x = self.N_x if n_x is None else n_x
+        n_y = self.N_y if n_y is None else n_y
+        if n_x < 1 or n_y < 1:
+            raise ValueError("level sizes must be at least 1")
+
+        with stage('progressive_level', shape=(n_y, n_x)):
+            with stage('coefficients') as s:
+                C = self.coefficients(n_x, n_y)
+                s.record(C)
+            with stage('filter'):
+                C *= (self.scale * self._amplitude(n_x, n_y)).astype(self.dtype)
+            with stage('ifft') as s:
+                heights = get_backend(self.fft_backend).ifft2(C, norm='forward').real.astype(self.dtype, copy=False)
+                s.record(heights)
+
+        x, y = self.axes(n_x, n_y)
+        params = _params(n_x, n_y, self.rL_x, self.rL_y, self.h, self.clx, self.cly, self.model, self.model_params)
+        return Surface(heights, x, y, params, self.seed)
+
+    def levels(self, preview=32, final=True):
+        """
+        Yield the levels coarsest first, halving both axes down to preview points.
+
+        Parameters:
+            preview: Smallest size of the longer axis of the coarsest level
+            final: Also yield the final level (else only the coarser ones)
+
+        Yields:
+            surface.Surface per level, the last one on the final grid
+        """
+        for k in range(_halvings(max(self.N_x, self.N_y), preview), -1 if final else 0, -1):
+            yield self.level(-(-self.N_x // 2**k), -(-self.N_y // 2**k))
+
+def progressive_random_gaussian_surface(N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001, clx=2.0, cly=None,
+                                        model='gaussian', model_params=None, seed=None, preview=32, final=True,
+                                        fft_backend=None, dtype=np.float64):
+    """
+    Yield a spectral surface coarsest level first (see ProgressiveSurface).
+
+    Parameters:
+        N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params, seed,
+            fft_backend, dtype: As in ProgressiveSurface
+        preview: Smallest size of the longer axis of the coarsest level
+        final: Also yield the final level
+
+    Yields:
+        surface.Surface per level, the last one on the N_y by N_x grid
+    """
+    progressive = ProgressiveSurface(N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params, seed,
+                                     fft_backend, dtype)
+    return progressive.levels(preview, final)
+
+def progressive_parametric_surface(N=10, b=1.8, factor=0.01, num_points=101, seed=None, preview=17, final=True,
+                                   fft_backend=None, dtype=np.float64):
+    """
+    Yield a ParametricSurface realization sampled with more and more points.
+
+    The grid intervals are halved (rounding up) from num_points - 1 down to
+    no fewer than preview - 1, so with num_points = 2^k + 1 every level holds
+    every other sample of the next one.
+
+    Parameters:
+        N, b, factor, num_points, fft_backend, dtype: As in ParametricSurface
+        seed: int or SeedSequence; None draws fresh entropy once for all levels
+        preview: Smallest number of points per axis of the coarsest level
+        final: Also yield the final level
+
+    Yields:
+        surface.Surface per level, the last one with num_points per axis
+    """
+    if num_points < 2:
+        raise ValueError("num_points must be at least 2")
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    sizes = level_sizes(num_points - 1, max(preview - 1, 1))
+    for intervals in sizes if final else sizes[:-1]:
+        yield ParametricSurface(N, b, factor, intervals + 1, seed, fft_backend, dtype).as_surface()
@@ -0,0 +1,104 @@
+"""
+Power spectral density (PSD) models for spectral surface synthesis.
+
+Each model is a function psd(kx, ky, clx, cly, **params) returning the PSD in
+closed form on angular wavenumbers kx, ky (rad per unit length), written in
+terms of the scaled wavenumber q = sqrt((kx * clx)^2 + (ky * cly)^2). The
+prefactors give a continuous field of unit variance; the generators
+normalize the sampled field to the requested RMS height anyway.
+
+New models are added with the register_psd_model decorator:
+
+    @register_psd_model('my_model')
+    def my_psd(kx, ky, clx, cly, alpha=1.0):
+        ...
+"""
+
+import numpy as np
+
+PSD_MODELS = {}
+
+def register_psd_model(name):
+    """
+    Decorator registering a PSD model under name.
+    """
+    def register(func):
+        PSD_MODELS[name] = func
+        return func
+    return register
+
+def get_psd_model(name):
+    """
+    Return the PSD function registered under name.
+    """
+    try:
+        return PSD_MODELS[name]
+    except KeyError:
+        raise ValueError(f"unknown PSD model {name!r}, expected one of {tuple(PSD_MODELS)}") from None
+
+def _scaled_wavenumber(kx, ky, clx, cly):
+    return np.sqrt((kx * clx)**2 + (ky * cly)**2)
+
+@register_psd_model('gaussian')
+def gaussian_psd(kx, ky, clx, cly):
+    """
+    Gaussian correlation exp(-(x/clx)^2 - (y/cly)^2).
+    """
+    q = _scaled_wavenumber(kx, ky, clx, cly)
+    return np.pi * clx * cly * np.exp(-q**2 / 4.0)
+
+@register_psd_model('exponential')
+def exponential_psd(kx, ky, clx, cly):
+    """
+    Exponential correlation exp(-sqrt((x/clx)^2 + (y/cly)^2)).
+    """
+    q = _scaled_wavenumber(kx, ky, clx, cly)
+    return 2.0 * np.pi * clx * cly * (1.0 + q**2)**(-1.5)
+
+@register_psd_model('power_law')
+def power_law_psd(kx, ky, clx, cly, hurst=0.8):
+    """
+    Self-affine (fractal) spectrum q^(-2(1 + H)) with a flat roll-off below q = 1.
+    """
+    if not 0.0 < hurst <= 1.0:
+        raise ValueError("hurst must be in (0, 1]")
+    q = np.maximum(_scaled_wavenumber(kx, ky, clx, cly), 1.0)
+    return 4.0 * np.pi * hurst / (hurst + 1.0) * clx * cly * q**(-2.0 * (1.0 + hurst))
+
+@register_psd_model('von_karman')
+def von_karman_psd(kx, ky, clx, cly, hurst=0.5):
+    """
+    Von Karman spectrum (1 + q^2)^(-(H + 1)); hurst=0.5 is the exponential model.
+    """
+    if hurst <= 0.0:
+        raise ValueError("hurst must be positive")
+    q = _scaled_wavenumber(kx, ky, clx, cly)
+    return 4.0 * np.pi * hurst * clx * cly * (1.0 + q**2)**(-(hurst + 1.0))
+
+def wavenumbers(N_x, N_y, rL_x, rL_y, half=True):
+    """
+    Return angular wavenumber grids KX, KY of the (N_y, N_x) FFT.
+
+    With half=True the x axis only holds the N_x // 2 + 1 rfft wavenumbers.
+    """
+    dx = rL_x / max(N_x - 1, 1)
+    dy = rL_y / max(N_y - 1, 1)
+    kx = 2.0 * np.pi * (np.fft.rfftfreq(N_x, dx) if half else np.fft.fftfreq(N_x, dx))
+    ky = 2.0 * np.pi * np.fft.fftfreq(N_y, dy)
+    return np.meshgrid(kx, ky)
+
+def psd_grid(model, N_x, N_y, rL_x, rL_y, clx, cly, half=True, **params):
+    """
+    Evaluate a registered PSD model on the FFT wavenumber grid.
+
+    Parameters:
+        model: Registered model name
+        N_x, N_y, rL_x, rL_y, clx, cly: Grid and correlation lengths
+        half: Evaluate on the rfft (half) grid
+        params: Model parameters, e.g. hurst
+
+    Returns:
+        PSD array, shape (N_y, N_x // 2 + 1) or (N_y, N_x)
+    """
+    KX, KY = wavenumbers(N_x, N_y, rL_x, rL_y, half=half)
+    return get_psd_model(model)(KX, KY, clx, cly, **params)
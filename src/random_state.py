@@ -0,0 +1,106 @@
+"""
+Random state helpers shared by the surface generators.
+
+Every generator accepts a ``seed`` argument. ``None`` keeps the historical
+behaviour of drawing from the global ``np.random`` state; anything else
+(an int, a ``numpy.random.SeedSequence`` or a ``numpy.random.Generator``) is
+turned into a ``numpy.random.Generator``.
+
+Batched generators derive one independent child ``SeedSequence`` per
+realization, so realization k of a batch is identical to a single call made
+with ``seed=realization_seeds(seed, n)[k]``.
+"""
+
+import numpy as np
+
+def make_rng(seed=None):
+    """
+    Return a numpy Generator for seed, or None to use the global np.random state.
+    """
+    if seed is None:
+        return None
+    return np.random.default_rng(seed)
+
+def child_seed(seed, k):
+    """
+    Return the k-th child SeedSequence of seed.
+
+    Unlike SeedSequence.spawn, this does not depend on how many children were
+    spawned before, so the same (seed, k) always gives the same stream.
+    """
+    parent = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return np.random.SeedSequence(
+        parent.entropy,
+        spawn_key=tuple(parent.spawn_key) + (k,),
+        pool_size=parent.pool_size,
+    )
+
+def realization_seeds(seed, n_realizations):
+    """
+    Return one SeedSequence per realization.
+
+    Parameters:
+        seed: None, int or SeedSequence to spawn children from, or a sequence
+            of n_realizations per-realization seeds
+        n_realizations: Number of realizations
+
+    Returns:
+        List of numpy.random.SeedSequence
+    """
+    if isinstance(seed, (list, tuple, np.ndarray)):
+        if len(seed) != n_realizations:
+            raise ValueError(
+                f"got {len(seed)} seeds for {n_realizations} realizations"
+            )
+        return [s if isinstance(s, np.random.SeedSequence) else np.random.SeedSequence(s)
+                for s in seed]
+    if seed is None:
+        seed = np.random.SeedSequence()
+    return [child_seed(seed, k) for k in range(n_realizations)]
+
+NORMAL_CHUNK = 2**20
+
+def standard_normal(rng, shape, dtype=np.float64):
+    """
+    Standard normal draws of the given dtype, identical (up to rounding) for any dtype.
+
+    Lower precisions are filled from float64 draws in chunks of NORMAL_CHUNK
+    values, so a float32 surface is the same realization as the float64 one
+    while only a chunk of float64 values is ever held. rng may also be the
+    np.random module (the global state).
+    """
+    dtype = np.dtype(dtype)
+    if dtype == np.float64:
+        return rng.standard_normal(shape)
+    out = np.empty(shape, dtype=dtype)
+    flat = out.reshape(-1)
+    for i in range(0, flat.size, NORMAL_CHUNK):
+        flat[i:i + NORMAL_CHUNK] = rng.standard_normal(min(NORMAL_CHUNK, flat.size - i))
+    return out
+
+def draw_realizations(seed, n_realizations, draw):
+    """
+    Stack the random draws of n_realizations realizations.
+
+    Parameters:
+        seed: A Generator (all realizations are drawn from it in one call), or
+            anything accepted by realization_seeds
+        n_realizations: Number of realizations
+        draw: Callable draw(rng, batch_shape) returning an array of shape
+            batch_shape + sample_shape
+
+    Returns:
+        Array of shape (n_realizations,) + sample_shape
+    """
+    if n_realizations < 1:
+        raise ValueError("n_realizations must be at least 1")
+    if isinstance(seed, np.random.Generator):
+        return draw(seed, (n_realizations,))
+
+    out = None
+    for k, s in enumerate(realization_seeds(seed, n_realizations)):
+        sample = draw(np.random.default_rng(s), ())
+        if out is None:
+            out = np.empty((n_realizations,) + sample.shape, dtype=sample.dtype)
+        out[k] = sample
+    return out
@@ -0,0 +1,311 @@
+"""
+Local HTTP generation service.
+
+One long-running process keeps the kernel and PSD filter cache
+(spectral_surface) and the mode tables (parametric_surface) warm for every
+tool that needs surfaces, and coalesces concurrent requests with identical
+parameters into one batched generator call. Only the standard library is
+used:
+
+    python -m src serve --port 8765
+
+    POST /surface/<generator>   JSON {"params": {...}, "seed": 3}
+        -> raw little-endian heights; headers X-Shape (rows,cols), X-Dtype,
+           X-Seed and X-Extent (x0,x1,y0,y1)
+    POST /stl/<generator>       JSON {"params": {...}, "seed": 3,
+                                      "base_thickness": 1.0, "tolerance": null}
+        -> binary STL bytes; headers X-Seed and X-Max-Error (with a tolerance)
+    GET /health                 -> JSON request, batch and kernel cache counters
+
+generator is 'parametric' or 'spectral' and params are the keyword
+arguments of the batch generators (see ensemble.GENERATORS). A request
+without a seed gets fresh entropy, returned in X-Seed, so the surface can
+be requested again. A surface equals the single generator call with the
+same parameters and seed, whichever requests it was batched with.
+
+Invalid parameters and grids above max_points (see make_server) are
+answered with 400, any other generation error with 500; the error message
+is returned as JSON {"error": ...}.
+
+ServiceClient wraps the requests:
+
+    client = ServiceClient('http://127.0.0.1:8765')
+    surface = client.surface('spectral', seed=0, N_x=512, clx=0.5)
+"""
+
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .ensemble import GENERATORS, generator_axes
+from .profiling import stage
+from .spectral_surface import kernel_cache_info, set_kernel_cache_size
+from .stl_export import _solid_triangles, write_binary_stl
+from .surface import Surface
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_POINTS = 2**24
+
+def _grid_points(generator, params):
+    """
+    Number of grid points of one surface, computed from the parameters without generating it.
+    """
+    if generator == 'spectral':
+        N_x = int(params.get('N_x', 128))
+        N_y = params.get('N_y')
+        return N_x * (N_x if N_y is None else int(N_y))
+    num_points = int(params.get('num_points', 101))
+    s1, s2 = params.get('s1'), params.get('s2')
+    return (num_points if s1 is None else len(s1)) * (num_points if s2 is None else len(s2))
+
+class _Batch:
+    """
+    Requests with the same generator and parameters waiting to be generated together.
+    """
+
+    def __init__(self):
+        self.seeds = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.heights = None
+        self.error = None
+
+class RequestCoalescer:
+    """
+    Groups concurrent requests with identical parameters into batched generation.
+
+    The first request of a group waits up to window seconds (or until
+    max_batch requests have joined) and then generates all of them with one
+    batched call; the other requests wait for its result.
+
+    Parameters:
+        window: Seconds the first request of a group waits for others
+        max_batch: Largest number of realizations per batched call
+    """
+
+    def __init__(self, window=0.005, max_batch=32):
+        if window < 0:
+            raise ValueError("window must be non-negative")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = 0
+        self.batches = 0
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def generate(self, generator, params, seed):
+        """
+        Return the heights of one realization, generated in a batch with any
+        concurrent requests for the same generator and parameters.
+        """
+        if generator not in GENERATORS:
+            raise ValueError(f"generator must be one of {tuple(GENERATORS)}, got {generator!r}")
+        key = (generator, json.dumps(params, sort_keys=True))
+        with self._lock:
+            self.requests += 1
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            index = len(batch.seeds)
+            batch.seeds.append(seed)
+            if len(batch.seeds) >= self.max_batch:
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                self.batches += 1
+            try:
+                with stage('service_batch', generator=generator, n_realizations=len(batch.seeds)):
+                    batch.heights = GENERATORS[generator](len(batch.seeds), list(batch.seeds), **params)
+            except Exception as error:
+                batch.error = error
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.heights[index]
+
+    def info(self):
+        """
+        Return a dict with the request and batch counters.
+        """
+        with self._lock:
+            return {'requests': self.requests, 'batches': self.batches}
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'RoughSurfaceService/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode(), 'application/json')
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._send_json(200, dict(self.server.coalescer.info(), status='ok', kernel_cache=kernel_cache_info()))
+        else:
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+
+    def do_POST(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] not in ('surface', 'stl') or parts[1] not in GENERATORS:
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+            return
+        kind, generator = parts
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            params = body.get('params', {})
+            seed = body.get('seed')
+            if seed is None:
+                seed = np.random.SeedSequence().entropy
+            points = _grid_points(generator, params)
+            if points > self.server.max_points:
+                raise ValueError(f"grid of {points} points exceeds the service limit of "
+                                 f"{self.server.max_points} points")
+            heights = self.server.coalescer.generate(generator, params, seed)
+            x, y = generator_axes(generator, params)
+            headers = [('X-Seed', str(seed))]
+            if kind == 'surface':
+                extent = ','.join(repr(float(v)) for v in (x[0], x[-1], y[0], y[-1]))
+                data = np.ascontiguousarray(heights, dtype=heights.dtype.newbyteorder('<'))
+                headers += [('X-Shape', ','.join(map(str, data.shape))), ('X-Dtype', data.dtype.str),
+                            ('X-Extent', extent)]
+                self._send(200, data.tobytes(), 'application/octet-stream', headers)
+            else:
+                vectors, error = _solid_triangles(x, y, heights, body.get('base_thickness', 1.0), None,
+                                                  body.get('tolerance'))
+                buffer = io.BytesIO()
+                write_binary_stl(buffer, vectors)
+                if error is not None:
+                    headers.append(('X-Max-Error', repr(float(error))))
+                self._send(200, buffer.getvalue(), 'model/stl', headers)
+        except (ValueError, TypeError, KeyError, AttributeError) as error:
+            self._send_json(400, {'error': str(error)})
+        except Exception as error:
+            # Keep the long-lived service answering: report anything else as a server error
+            self._send_json(500, {'error': f"{type(error).__name__}: {error}"})
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, window=0.005, max_batch=32, kernel_cache_size=None,
+                warm=(), max_points=DEFAULT_MAX_POINTS, verbose=False):
+    """
+    Create the generation service (call serve_forever() on the result).
+
+    Parameters:
+        host, port: Address to bind (port 0 picks a free port, see server_address)
+        window, max_batch: Request coalescing (see RequestCoalescer)
+        kernel_cache_size: Optional new size of the spectral kernel cache
+        warm: (generator, params) pairs generated once at startup so that
+            their kernels and tables are cached before the first request
+        max_points: Largest grid (rows * cols) of one requested surface; a
+            batched call holds up to max_batch such surfaces
+        verbose: Log every request to stderr
+
+    Returns:
+        http.server.ThreadingHTTPServer with a coalescer attribute
+    """
+    if kernel_cache_size is not None:
+        set_kernel_cache_size(kernel_cache_size)
+    with stage('service_warm', n_configurations=len(warm)):
+        for generator, params in warm:
+            GENERATORS[generator](1, [0], **params)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.coalescer = RequestCoalescer(window, max_batch)
+    server.max_points = max_points
+    server.verbose = verbose
+    return server
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, **options):
+    """
+    Run the generation service until interrupted (options as in make_server).
+    """
+    server = make_server(host, port, **options)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+class ServiceClient:
+    """
+    Client of the generation service.
+
+    Parameters:
+        url: Base URL, e.g. 'http://127.0.0.1:8765'
+        timeout: Request timeout in seconds
+    """
+
+    def __init__(self, url=f'http://127.0.0.1:{DEFAULT_PORT}', timeout=60.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _post(self, path, body):
+        request = urllib.request.Request(self.url + path, data=json.dumps(body).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read(), response.headers
+        except urllib.error.HTTPError as error:
+            message = json.loads(error.read() or b'{}').get('error', error.reason)
+            raise ValueError(f"service error {error.code}: {message}") from None
+
+    def surface(self, generator, seed=None, **params):
+        """
+        Request one surface.
+
+        Returns:
+            surface.Surface with uniform axes over the returned extent and the seed used
+        """
+        data, headers = self._post(f'/surface/{generator}', {'params': params, 'seed': seed})
+        shape = tuple(int(v) for v in headers['X-Shape'].split(','))
+        heights = np.frombuffer(data, dtype=headers['X-Dtype']).reshape(shape)
+        x0, x1, y0, y1 = (float(v) for v in headers['X-Extent'].split(','))
+        x = np.linspace(x0, x1, shape[1])
+        y = np.linspace(y0, y1, shape[0])
+        return Surface(heights, x, y, params, int(headers['X-Seed']))
+
+    def stl(self, generator, seed=None, base_thickness=1.0, tolerance=None, **params):
+        """
+        Request the binary STL of one surface.
+
+        Returns:
+            STL bytes, the seed used and the achieved height error (None without a tolerance)
+        """
+        data, headers = self._post(f'/stl/{generator}', {'params': params, 'seed': seed,
+                                                          'base_thickness': base_thickness,
+                                                          'tolerance': tolerance})
+        error = headers.get('X-Max-Error')
+        return data, int(headers['X-Seed']), None if error is None else float(error)
+
+    def health(self):
+        """
+        Return the service counters.
+        """
+        with urllib.request.urlopen(self.url + '/health', timeout=self.timeout) as response:
+            return json.loads(response.read())
@@ -1,12 +1,104 @@
 """
 Spectral (FFT-based) surface generation.
+
+The surface is white noise convolved with an exponential kernel. The real
+half-spectrum of the kernel (already multiplied by the normalization factor)
+only depends on the grid and the correlation lengths, so it is kept in a
+small LRU cache and repeated calls only pay for the noise, one rfft2 and one
+irfft2.
+
+With model set to a registered PSD model (see psd_models), the noise is
+instead filtered in the frequency domain by the square root of the model's
+closed-form PSD, so no kernel transform is needed, and each realization is
+scaled to RMS height h exactly.
 """
 
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
-def generate_random_gaussian_surface(N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001, clx=2.0, cly=None):
+from .fft_backend import complex_dtype, get_backend, real_dtype
+from .profiling import stage
+from .psd_models import get_psd_model, psd_grid
+from .random_state import draw_realizations, make_rng, standard_normal
+from .surface import Surface
+
+DEFAULT_KERNEL_CACHE_SIZE = 16
+
+class _KernelCache:
     """
-    Generate a random Gaussian surface using FFT method.
+    Thread-safe LRU cache of transformed kernels.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+        value = build()
+        value.setflags(write=False)
+        with self._lock:
+            if self.maxsize > 0:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                self._trim()
+        return value
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._trim()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._data), 'maxsize': self.maxsize}
+
+    def _trim(self):
+        while len(self._data) > max(self.maxsize, 0):
+            self._data.popitem(last=False)
+
+_kernel_cache = _KernelCache(DEFAULT_KERNEL_CACHE_SIZE)
+
+def set_kernel_cache_size(maxsize):
+    """
+    Set the maximum number of cached kernels (0 disables caching).
+    """
+    if maxsize < 0:
+        raise ValueError("maxsize must be non-negative")
+    _kernel_cache.resize(maxsize)
+
+def clear_kernel_cache():
+    """
+    Drop all cached kernels and reset the hit/miss counters.
+    """
+    _kernel_cache.clear()
+
+def kernel_cache_info():
+    """
+    Return a dict with the cache hits, misses, current size and maxsize.
+    """
+    return _kernel_cache.info()
+
+def _grid(N_x, N_y, rL_x, rL_y, h, clx, cly):
+    """
+    Validate the parameters, resolve the isotropic defaults and return them plus the axes.
     """
     if N_y is None:
         N_y = N_x
@@ -15,19 +107,184 @@ def generate_random_gaussian_surface(N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=
     if cly is None:
         cly = clx
 
+    if h < 0:
+        raise ValueError("h must be non-negative")
+    if clx <= 0 or cly <= 0:
+        raise ValueError("correlation lengths must be positive")
+
     x = np.linspace(-rL_x/2, rL_x/2, N_x)
     y = np.linspace(-rL_y/2, rL_y/2, N_y)
-    
-    Z = h * np.random.randn(N_y, N_x)
-    X, Y = np.meshgrid(x, y)
-    
-    F = np.exp(-(np.abs(X)/(clx/2.0) + np.abs(Y)/(cly/2.0)))
-    
-    fft_Z = np.fft.fft2(Z)
-    fft_F = np.fft.fft2(F)
-    conv = np.fft.ifft2(fft_Z * fft_F)
-    
-    factor = np.sqrt(rL_x * rL_y) / (N_x * N_y * clx * cly)
-    surface = factor * np.real(conv)
-    
-    return surface, x, y 
\ No newline at end of file
+    return N_x, N_y, rL_x, rL_y, clx, cly, x, y
+
+def _params(N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params):
+    return dict(N_x=N_x, N_y=N_y, rL_x=rL_x, rL_y=rL_y, h=h, clx=clx, cly=cly,
+                model=model, model_params=model_params)
+
+def _build_kernel(N_x, N_y, rL_x, rL_y, clx, cly, dtype, backend):
+    """
+    Half-spectrum of the exponential kernel times the normalization factor.
+    """
+    with stage('kernel') as s:
+        x = np.linspace(-rL_x/2, rL_x/2, N_x)
+        y = np.linspace(-rL_y/2, rL_y/2, N_y)
+        X, Y = np.meshgrid(x, y)
+
+        F = np.exp(-(np.abs(X)/(clx/2.0) + np.abs(Y)/(cly/2.0)))
+
+        factor = np.sqrt(rL_x * rL_y) / (N_x * N_y * clx * cly)
+        kernel = (factor * backend.rfft2(F)).astype(complex_dtype(dtype))
+        s.record(kernel)
+    return kernel
+
+def kernel_rfft(N_x, N_y, rL_x, rL_y, clx, cly, dtype=np.float64, fft_backend=None):
+    """
+    Return the cached half-spectrum of the normalized exponential kernel.
+
+    The returned array is read-only and has shape (N_y, N_x // 2 + 1).
+    """
+    key = (N_x, N_y, float(rL_x), float(rL_y), float(clx), float(cly), np.dtype(dtype).str)
+    backend = get_backend(fft_backend)
+    return _kernel_cache.get(key, lambda: _build_kernel(N_x, N_y, rL_x, rL_y, clx, cly, dtype, backend))
+
+def _convolve(Z, x, y, rL_x, rL_y, clx, cly, fft_backend=None):
+    """
+    Convolve white noise Z (shape (..., N_y, N_x)) with the exponential kernel.
+    """
+    N_x, N_y = len(x), len(y)
+    backend = get_backend(fft_backend)
+    fft_F = kernel_rfft(N_x, N_y, rL_x, rL_y, clx, cly, Z.dtype, backend)
+
+    with stage('fft') as s:
+        fft_Z = backend.rfft2(Z)
+        s.record(fft_Z)
+    with stage('filter'):
+        fft_Z *= fft_F
+    with stage('ifft') as s:
+        surface = backend.irfft2(fft_Z, s=(N_y, N_x))
+        s.record(surface)
+    return surface
+
+def _build_psd_filter(N_x, N_y, rL_x, rL_y, clx, cly, dtype, model, params):
+    """
+    Square root of the model PSD on the rfft grid, with the mean (DC) removed.
+    """
+    with stage('psd_filter') as s:
+        amplitude = np.sqrt(psd_grid(model, N_x, N_y, rL_x, rL_y, clx, cly, **params))
+        amplitude[0, 0] = 0.0
+        amplitude = amplitude.astype(dtype)
+        s.record(amplitude)
+    return amplitude
+
+def psd_filter(model, N_x, N_y, rL_x, rL_y, clx, cly, dtype=np.float64, **params):
+    """
+    Return the cached, read-only frequency-domain filter of a PSD model.
+    """
+    get_psd_model(model)
+    key = ('psd', model, tuple(sorted(params.items())), N_x, N_y, float(rL_x), float(rL_y),
+           float(clx), float(cly), np.dtype(dtype).str)
+    return _kernel_cache.get(
+        key, lambda: _build_psd_filter(N_x, N_y, rL_x, rL_y, clx, cly, dtype, model, params))
+
+def _filter_psd(Z, x, y, rL_x, rL_y, clx, cly, h, model, model_params, fft_backend=None):
+    """
+    Filter white noise Z (shape (..., N_y, N_x)) by a PSD model and scale each
+    realization to RMS height h.
+    """
+    N_x, N_y = len(x), len(y)
+    backend = get_backend(fft_backend)
+    amplitude = psd_filter(model, N_x, N_y, rL_x, rL_y, clx, cly, Z.dtype, **(model_params or {}))
+
+    with stage('fft') as s:
+        spectrum = backend.rfft2(Z)
+        s.record(spectrum)
+    with stage('filter'):
+        spectrum *= amplitude
+    with stage('ifft') as s:
+        surface = backend.irfft2(spectrum, s=(N_y, N_x))
+        s.record(surface)
+
+    with stage('scale'):
+        rms = np.sqrt(np.mean(surface**2, axis=(-2, -1), keepdims=True))
+        surface *= h / np.where(rms > 0, rms, 1.0)
+    return surface
+
+def generate_random_gaussian_surface(N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001, clx=2.0, cly=None,
+                                     seed=None, fft_backend=None, model=None, model_params=None, as_surface=False,
+                                     dtype=np.float64):
+    """
+    Generate a random Gaussian surface using FFT method.
+
+    Parameters:
+        seed: None to draw the noise from the global np.random state, otherwise
+            an int, SeedSequence or Generator
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        model: None for the exponential convolution kernel, or the name of a
+            registered PSD model ('gaussian', 'exponential', 'power_law',
+            'von_karman', ...) to filter in the frequency domain and scale the
+            surface to RMS height h exactly
+        model_params: Dict of model parameters, e.g. {'hurst': 0.7}
+        as_surface: Return a surface.Surface instead of (surface, x, y)
+        dtype: Working precision, np.float64 or np.float32 (float32 noise,
+            complex64 FFTs and a float32 surface)
+    """
+    N_x, N_y, rL_x, rL_y, clx, cly, x, y = _grid(N_x, N_y, rL_x, rL_y, h, clx, cly)
+    dtype = real_dtype(dtype)
+
+    with stage('generate_random_gaussian_surface'):
+        with stage('noise') as s:
+            rng = make_rng(seed)
+            Z = standard_normal(np.random if rng is None else rng, (N_y, N_x), dtype)
+            Z *= h
+            s.record(Z)
+
+        if model is None:
+            surface = _convolve(Z, x, y, rL_x, rL_y, clx, cly, fft_backend)
+        else:
+            surface = _filter_psd(Z, x, y, rL_x, rL_y, clx, cly, h, model, model_params, fft_backend)
+
+    if as_surface:
+        return Surface(surface, x, y, _params(N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params), seed)
+    return surface, x, y
+
+def generate_random_gaussian_surface_batch(n_realizations, N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001,
+                                           clx=2.0, cly=None, seed=None, fft_backend=None, model=None,
+                                           model_params=None, as_surface=False, dtype=np.float64):
+    """
+    Generate several independent random Gaussian surfaces at once.
+
+    The grid and the transformed kernel are computed once and the FFTs run over
+    the whole (n_realizations, N_y, N_x) stack.
+
+    Parameters:
+        n_realizations: Number of surfaces to generate
+        N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params: As in
+            generate_random_gaussian_surface
+        seed: None, int or SeedSequence (one child SeedSequence is spawned per
+            realization, see random_state.realization_seeds), a sequence of
+            per-realization seeds, or a Generator to draw all noise from
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        as_surface: Return a batched surface.Surface instead of (surfaces, x, y)
+        dtype: Working precision, np.float64 or np.float32
+
+    Returns:
+        surfaces: Surface heights, shape (n_realizations, N_y, N_x)
+        x, y: Coordinate axes
+    """
+    N_x, N_y, rL_x, rL_y, clx, cly, x, y = _grid(N_x, N_y, rL_x, rL_y, h, clx, cly)
+    dtype = real_dtype(dtype)
+
+    with stage('generate_random_gaussian_surface_batch', n_realizations=n_realizations):
+        with stage('noise') as s:
+            Z = draw_realizations(seed, n_realizations,
+                                  lambda rng, shape: standard_normal(rng, shape + (N_y, N_x), dtype))
+            Z *= h
+            s.record(Z)
+
+        if model is None:
+            surfaces = _convolve(Z, x, y, rL_x, rL_y, clx, cly, fft_backend)
+        else:
+            surfaces = _filter_psd(Z, x, y, rL_x, rL_y, clx, cly, h, model, model_params, fft_backend)
+
+    if as_surface:
+        return Surface(surfaces, x, y, _params(N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params), seed)
+    return surfaces, x, y
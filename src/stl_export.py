@@ -1,125 +1,332 @@
 """
 STL export module for rough surface generation.
+
+The closed solid is a top surface, a bottom surface offset by base_thickness
+and four side walls. Vertices are numbered row-major, top surface first
+(i * cols + j) then bottom surface (rows * cols + i * cols + j); triangles are
+listed top, bottom, left/right walls, front/back walls.
+
+export_to_stl_streaming writes the same triangles band by band (grouped per
+band of rows instead of per face) so that only one band is ever in memory.
+
+With a tolerance, export_to_stl and stl_bytes write the adaptive mesh of
+mesh_simplify instead (flat base, far fewer triangles).
+
+numpy-stl is only imported when export_to_stl uses the 'numpy-stl' writer.
+
+Binary STL stores the triangle count as a uint32, so a solid has at most
+MAX_STL_TRIANGLES triangles; larger grids are rejected before anything is
+meshed or written.
 """
 
+import io
+
 import numpy as np
-from stl import mesh
 
-def export_to_stl(x, y, z, filename, base_thickness=1.0):
+from .mesh_simplify import simplified_mesh
+from .profiling import stage
+from .surface import unpack_surface
+
+# Binary STL record: normal, three vertices, attribute byte count
+STL_RECORD_DTYPE = np.dtype([
+    ('normals', '<f4', (3,)),
+    ('vectors', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+# Binary STL triangle count is a little-endian uint32
+MAX_STL_TRIANGLES = 2**32 - 1
+
+def stl_triangle_count(rows, cols):
+    """
+    Number of triangles of the closed solid of a (rows, cols) height grid.
+    """
+    return 4 * (rows - 1) * (cols - 1) + 4 * (rows - 1) + 4 * (cols - 1)
+
+def _check_triangle_count(n_triangles):
+    """
+    Raise ValueError if n_triangles does not fit the binary STL header.
+    """
+    if n_triangles > MAX_STL_TRIANGLES:
+        raise ValueError(f"{n_triangles} triangles exceed the binary STL limit of {MAX_STL_TRIANGLES}; "
+                         f"decimate the grid or export with a tolerance")
+
+def _mesh_dtype(x, y, z, dtype):
+    """
+    Vertex dtype: float32 for float32 heights (STL stores float32 anyway),
+    otherwise the common type of the inputs, unless dtype is given.
+    """
+    if dtype is not None:
+        return np.dtype(dtype)
+    if np.asarray(z).dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.result_type(x, y, z)
+
+def surface_vertices(x, y, z, base_thickness=1.0, dtype=None):
+    """
+    Return the (2 * rows * cols, 3) vertex array of the closed solid.
+
+    Parameters:
+        x, y: Coordinate meshgrids, or 1-D axes of length cols and rows
+        z: Surface heights
+        base_thickness: Thickness of the base below the surface
+        dtype: Vertex dtype (see _mesh_dtype)
+    """
+    rows, cols = np.shape(z)
+    x, y = _grid_coordinates(x, y, (rows, cols))
+    vertices = np.empty((2, rows, cols, 3), dtype=_mesh_dtype(x, y, z, dtype))
+    vertices[..., 0] = x
+    vertices[..., 1] = y
+    vertices[..., 2] = z
+    vertices[1, :, :, 2] -= base_thickness
+    return vertices.reshape(-1, 3)
+
+def _grid_coordinates(x, y, shape):
+    """
+    Broadcast 1-D axes to (rows, cols) views; meshgrids are returned as they are.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x.ndim == 1:
+        x = np.broadcast_to(x, shape)
+    if y.ndim == 1:
+        y = np.broadcast_to(y[:, None], shape)
+    return x, y
+
+def _grid_faces(rows, cols, offset=0, flip=False):
+    """
+    Two triangles per grid cell, (rows - 1) * (cols - 1) * 2 faces in cell order.
+    """
+    i, j = np.meshgrid(np.arange(rows - 1), np.arange(cols - 1), indexing='ij')
+    v00 = offset + i * cols + j
+    v01 = v00 + 1
+    v10 = v00 + cols
+    v11 = v10 + 1
+    if flip:
+        tris = [(v00, v10, v01), (v10, v11, v01)]
+    else:
+        tris = [(v00, v01, v10), (v10, v01, v11)]
+    faces = np.stack([np.stack(t, axis=-1) for t in tris], axis=2)
+    return faces.reshape(-1, 3)
+
+def _side_wall_faces(rows, cols):
+    """
+    Left and right wall triangles, four per grid row.
+    """
+    offset = rows * cols
+    i = np.arange(rows - 1)
+    left = i * cols
+    right = i * cols + (cols - 1)
+    return np.stack([
+        np.stack([left, left + cols, offset + left], axis=-1),
+        np.stack([left + cols, offset + left + cols, offset + left], axis=-1),
+        np.stack([right, offset + right, right + cols], axis=-1),
+        np.stack([right + cols, offset + right, offset + right + cols], axis=-1),
+    ], axis=1).reshape(-1, 3)
+
+def _end_wall_faces(rows, cols):
+    """
+    Front (first row) and back (last row) wall triangles, four per grid column.
+    """
+    offset = rows * cols
+    j = np.arange(cols - 1)
+    back = (rows - 1) * cols + j
+    return np.stack([
+        np.stack([j, offset + j, j + 1], axis=-1),
+        np.stack([j + 1, offset + j, offset + j + 1], axis=-1),
+        np.stack([back, back + 1, offset + back], axis=-1),
+        np.stack([back + 1, offset + back + 1, offset + back], axis=-1),
+    ], axis=1).reshape(-1, 3)
+
+def surface_faces(rows, cols):
+    """
+    Return the (n_faces, 3) vertex index array of the closed solid.
+
+    Parameters:
+        rows, cols: Shape of the height grid
+    """
+    return np.concatenate([
+        _grid_faces(rows, cols),
+        _grid_faces(rows, cols, offset=rows * cols, flip=True),
+        _side_wall_faces(rows, cols),
+        _end_wall_faces(rows, cols),
+    ])
+
+def surface_triangles(x, y, z, base_thickness=1.0, dtype=None):
+    """
+    Return the (n_faces, 3, 3) triangle corner array of the closed solid.
+    """
+    rows, cols = np.shape(z)
+    with stage('mesh') as s:
+        vectors = surface_vertices(x, y, z, base_thickness, dtype)[surface_faces(rows, cols)]
+        s.record(vectors)
+    return vectors
+
+def _solid_triangles(x, y, z, base_thickness, dtype, tolerance):
+    """
+    Triangle corners of the full-resolution solid, or of the simplified one
+    when tolerance is given, and the achieved height error (None at full resolution).
+    """
+    if tolerance is None:
+        _check_triangle_count(stl_triangle_count(*np.shape(z)))
+        return surface_triangles(x, y, z, base_thickness, dtype), None
+    vertices, faces, error = simplified_mesh(x, y, z, tolerance, base_thickness)
+    return vertices.astype(_mesh_dtype(x, y, z, dtype))[faces], error
+
+def stl_records(vectors):
+    """
+    Pack (n_faces, 3, 3) triangle corners into binary STL records.
+
+    Normals are the unnormalized cross products numpy-stl writes.
+    """
+    records = np.zeros(len(vectors), dtype=STL_RECORD_DTYPE)
+    records['vectors'] = vectors
+    v = records['vectors']
+    records['normals'] = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])
+    return records
+
+def write_binary_stl(fh, vectors, name=b'rough surface'):
+    """
+    Write triangles to an open binary file handle as a binary STL.
+    """
+    _check_triangle_count(len(vectors))
+    with stage('stl_records') as s:
+        records = stl_records(vectors)
+        s.record(records)
+    with stage('stl_write'):
+        fh.write(name[:80].ljust(80, b' '))
+        fh.write(np.array(len(records), dtype='<u4').tobytes())
+        fh.write(records.tobytes())
+
+def stl_bytes(x, y=None, z=None, base_thickness=1.0, dtype=None, tolerance=None):
+    """
+    Return the binary STL of a surface as bytes (e.g. for a download button).
+
+    x may be a surface.Surface instead of x, y, z; tolerance as in export_to_stl.
+    """
+    x, y, z, base_thickness, dtype, tolerance = unpack_surface(x, y, z, base_thickness, dtype, tolerance)
+    with stage('stl_bytes'):
+        buffer = io.BytesIO()
+        write_binary_stl(buffer, _solid_triangles(x, y, z, base_thickness, dtype, tolerance)[0])
+        return buffer.getvalue()
+
+def export_to_stl(x, y=None, z=None, filename=None, base_thickness=1.0, writer='numpy-stl', dtype=None,
+                  tolerance=None):
     """
     Export a surface to an STL file.
-    
+
     Parameters:
-        x, y: Coordinate meshgrids
+        x, y: Coordinate meshgrids or 1-D axes; or a surface.Surface as x,
+            e.g. export_to_stl(surface, 'surface.stl')
         z: Surface heights
         filename: Output STL filename
         base_thickness: Thickness of the base below the surface
-        
+        writer: 'numpy-stl' saves through stl.mesh.Mesh, 'binary' writes the
+            binary STL records directly (same triangles and normals)
+        dtype: dtype of the in-memory mesh; None uses float32 for float32
+            heights. np.float32 halves the mesh memory (STL stores float32)
+        tolerance: If given, write the adaptive mesh of
+            mesh_simplify.simplified_mesh with this maximum height error
+
+    Returns:
+        Achieved maximum height error when tolerance is given, else None
+    """
+    x, y, z, filename, base_thickness, writer, dtype, tolerance = unpack_surface(
+        x, y, z, filename, base_thickness, writer, dtype, tolerance)
+    if writer not in ('numpy-stl', 'binary'):
+        raise ValueError(f"writer must be 'numpy-stl' or 'binary', got {writer!r}")
+
+    with stage('export_to_stl', writer=writer):
+        vectors, error = _solid_triangles(x, y, z, base_thickness, dtype, tolerance)
+
+        if writer == 'binary':
+            with open(filename, 'wb') as fh:
+                write_binary_stl(fh, vectors)
+        else:
+            from stl import mesh
+
+            with stage('stl_write'):
+                data = np.zeros(len(vectors), dtype=mesh.Mesh.dtype)
+                data['vectors'] = vectors
+                surface = mesh.Mesh(data)
+                surface.save(filename)
+    return error
+
+def _band_axes(x, y, i0, i1):
+    """
+    Coordinates of grid rows i0..i1 - 1 from 1-D axes or 2-D meshgrids.
+    """
+    if np.ndim(x) == 1:
+        xb = np.broadcast_to(np.asarray(x), (i1 - i0, len(x)))
+    else:
+        xb = np.asarray(x[i0:i1])
+    if np.ndim(y) == 1:
+        yb = np.broadcast_to(np.asarray(y[i0:i1])[:, None], xb.shape)
+    else:
+        yb = np.asarray(y[i0:i1])
+    return xb, yb
+
+def export_to_stl_streaming(x, y=None, z=None, filename=None, base_thickness=1.0, band_rows=256, dtype=None):
+    """
+    Export a surface to a binary STL file with bounded memory.
+
+    The height field is read band_rows rows at a time (z may be a numpy.memmap),
+    the top, bottom and side wall triangles of each band are appended to the
+    file, the front and back walls are written last, and the triangle count is
+    patched into the header at the end. The file holds the same triangles as
+    export_to_stl, in band order.
+
+    Parameters:
+        x, y: Coordinate meshgrids, or 1-D axes of length cols and rows; or a
+            surface.Surface as x
+        z: Surface heights, shape (rows, cols)
+        filename: Output STL filename
+        base_thickness: Thickness of the base below the surface
+        band_rows: Number of grid rows per band
+        dtype: dtype of the per-band mesh (as in export_to_stl)
+
     Returns:
-        None
+        Number of triangles written
     """
+    x, y, z, filename, base_thickness, band_rows, dtype = unpack_surface(
+        x, y, z, filename, base_thickness, band_rows, dtype)
     rows, cols = z.shape
-    vertices = []
-    faces = []
-    
-    # Create vertices for top surface
-    for i in range(rows):
-        for j in range(cols):
-            vertices.append([x[i,j], y[i,j], z[i,j]])
-    
-    # Create vertices for bottom surface
-    for i in range(rows):
-        for j in range(cols):
-            vertices.append([x[i,j], y[i,j], z[i,j] - base_thickness])
-    
-    vertices = np.array(vertices)
-    
-    # Create faces for top surface
-    for i in range(rows - 1):
-        for j in range(cols - 1):
-            # First triangle
-            v1 = i * cols + j
-            v2 = i * cols + (j + 1)
-            v3 = (i + 1) * cols + j
-            faces.append([v1, v2, v3])
-            
-            # Second triangle
-            v1 = (i + 1) * cols + j
-            v2 = i * cols + (j + 1)
-            v3 = (i + 1) * cols + (j + 1)
-            faces.append([v1, v2, v3])
-    
-    # Create faces for bottom surface (inverted orientation)
-    offset = rows * cols
-    for i in range(rows - 1):
-        for j in range(cols - 1):
-            # First triangle
-            v1 = offset + i * cols + j
-            v2 = offset + (i + 1) * cols + j
-            v3 = offset + i * cols + (j + 1)
-            faces.append([v1, v2, v3])
-            
-            # Second triangle
-            v1 = offset + (i + 1) * cols + j
-            v2 = offset + (i + 1) * cols + (j + 1)
-            v3 = offset + i * cols + (j + 1)
-            faces.append([v1, v2, v3])
-    
-    # Create side faces
-    for i in range(rows - 1):
-        # Left side
-        v1 = i * cols
-        v2 = (i + 1) * cols
-        v3 = offset + i * cols
-        faces.append([v1, v2, v3])
-        
-        v1 = (i + 1) * cols
-        v2 = offset + (i + 1) * cols
-        v3 = offset + i * cols
-        faces.append([v1, v2, v3])
-        
-        # Right side
-        v1 = i * cols + (cols - 1)
-        v2 = offset + i * cols + (cols - 1)
-        v3 = (i + 1) * cols + (cols - 1)
-        faces.append([v1, v2, v3])
-        
-        v1 = (i + 1) * cols + (cols - 1)
-        v2 = offset + i * cols + (cols - 1)
-        v3 = offset + (i + 1) * cols + (cols - 1)
-        faces.append([v1, v2, v3])
-    
-    # Create front and back faces
-    for j in range(cols - 1):
-        # Front side
-        v1 = j
-        v2 = offset + j
-        v3 = j + 1
-        faces.append([v1, v2, v3])
-        
-        v1 = j + 1
-        v2 = offset + j
-        v3 = offset + j + 1
-        faces.append([v1, v2, v3])
-        
-        # Back side
-        v1 = (rows - 1) * cols + j
-        v2 = (rows - 1) * cols + j + 1
-        v3 = offset + (rows - 1) * cols + j
-        faces.append([v1, v2, v3])
-        
-        v1 = (rows - 1) * cols + j + 1
-        v2 = offset + (rows - 1) * cols + j + 1
-        v3 = offset + (rows - 1) * cols + j
-        faces.append([v1, v2, v3])
-    
-    faces = np.array(faces)
-    
-    # Create the mesh
-    surface = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
-    for i, f in enumerate(faces):
-        for j in range(3):
-            surface.vectors[i][j] = vertices[f[j],:]
-    
-    # Save the mesh to STL file
-    surface.save(filename) 
\ No newline at end of file
+    if band_rows < 1:
+        raise ValueError("band_rows must be at least 1")
+    _check_triangle_count(stl_triangle_count(rows, cols))
+
+    n_triangles = 0
+    with stage('export_to_stl_streaming'), open(filename, 'wb') as fh:
+        fh.write(b'rough surface'.ljust(80, b' '))
+        fh.write(np.array(0, dtype='<u4').tobytes())
+
+        for i0 in range(0, rows - 1, band_rows):
+            i1 = min(i0 + band_rows, rows - 1) + 1
+            with stage('mesh') as s:
+                xb, yb = _band_axes(x, y, i0, i1)
+                zb = np.asarray(z[i0:i1])
+                band = i1 - i0
+                faces = np.concatenate([
+                    _grid_faces(band, cols),
+                    _grid_faces(band, cols, offset=band * cols, flip=True),
+                    _side_wall_faces(band, cols),
+                ])
+                records = stl_records(surface_vertices(xb, yb, zb, base_thickness, dtype)[faces])
+                s.record(records)
+            with stage('stl_write'):
+                fh.write(records.tobytes())
+            n_triangles += len(records)
+
+        first = _band_axes(x, y, 0, 1)
+        last = _band_axes(x, y, rows - 1, rows)
+        xe = np.concatenate([first[0], last[0]])
+        ye = np.concatenate([first[1], last[1]])
+        ze = np.stack([np.asarray(z[0]), np.asarray(z[rows - 1])])
+        records = stl_records(surface_vertices(xe, ye, ze, base_thickness, dtype)[_end_wall_faces(2, cols)])
+        fh.write(records.tobytes())
+        n_triangles += len(records)
+
+        fh.seek(80)
+        fh.write(np.array(n_triangles, dtype='<u4').tobytes())
+
+    return n_triangles
@@ -0,0 +1,110 @@
+"""
+Lightweight container for a generated surface.
+
+A Surface holds the heights, the two 1-D coordinate axes, the generation
+parameters and the seed. Coordinate grids are never stored: X and Y are
+read-only broadcast views of the axes (no memory), and meshgrid() builds
+real arrays only when asked. The generators return a Surface when called
+with as_surface=True, and the exporters and plotting functions accept one
+in place of their x, y, z arguments:
+
+    surface = generate_random_gaussian_surface(N_x=4096, seed=0, as_surface=True)
+    export_to_stl(surface, 'surface.stl')
+"""
+
+import numpy as np
+
+class Surface:
+    """
+    Surface heights on a rectilinear grid.
+
+    Parameters:
+        heights: Heights, shape (..., len(y), len(x)); a leading axis holds
+            the realizations of a batch
+        x, y: 1-D coordinate axes
+        params: Dict of generation parameters
+        seed: Seed the surface was generated with
+    """
+
+    __slots__ = ('heights', 'x', 'y', 'params', 'seed')
+
+    def __init__(self, heights, x, y, params=None, seed=None):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if x.ndim != 1 or y.ndim != 1:
+            raise ValueError("x and y must be 1-D axes")
+        if np.shape(heights)[-2:] != (len(y), len(x)):
+            raise ValueError(f"heights of shape {np.shape(heights)} do not match axes of length {len(y)}, {len(x)}")
+        self.heights = heights
+        self.x = x
+        self.y = y
+        self.params = {} if params is None else params
+        self.seed = seed
+
+    @property
+    def shape(self):
+        """Grid shape (len(y), len(x))."""
+        return (len(self.y), len(self.x))
+
+    @property
+    def X(self):
+        """x coordinate of every grid point, as a read-only broadcast view."""
+        return np.broadcast_to(self.x, self.shape)
+
+    @property
+    def Y(self):
+        """y coordinate of every grid point, as a read-only broadcast view."""
+        return np.broadcast_to(self.y[:, None], self.shape)
+
+    def meshgrid(self, sparse=False):
+        """
+        Return coordinate grids X, Y (sparse=True gives (1, nx) and (ny, 1) arrays).
+        """
+        return np.meshgrid(self.x, self.y, sparse=sparse)
+
+    @property
+    def spacing(self):
+        """Grid spacings dx, dy."""
+        dx = (self.x[-1] - self.x[0]) / (len(self.x) - 1) if len(self.x) > 1 else 1.0
+        dy = (self.y[-1] - self.y[0]) / (len(self.y) - 1) if len(self.y) > 1 else 1.0
+        return float(dx), float(dy)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the heights and axes."""
+        return np.asarray(self.heights).nbytes + self.x.nbytes + self.y.nbytes
+
+    def __len__(self):
+        """Number of realizations of a batched surface."""
+        if np.ndim(self.heights) < 3:
+            raise TypeError("a single surface has no len()")
+        return len(self.heights)
+
+    def __getitem__(self, index):
+        """
+        Realization(s) of a batched surface, as a Surface (params and seed are the batch's).
+        """
+        if np.ndim(self.heights) < 3:
+            raise TypeError("a single surface cannot be indexed; use .heights")
+        return Surface(self.heights[index], self.x, self.y, self.params, self.seed)
+
+    def __repr__(self):
+        return f"Surface(shape={np.shape(self.heights)}, params={self.params!r}, seed={self.seed!r})"
+
+def unpack_surface(x, y, z, *following):
+    """
+    Resolve the arguments of a function taking (x, y, z, *following).
+
+    When x is a Surface, its axes and heights are used, and the values passed
+    positionally as y and z belong to the parameters after z, e.g.
+    export_to_stl(surface, 'surface.stl').
+
+    Returns:
+        x, y, z, *following
+    """
+    if isinstance(x, Surface):
+        shifted = tuple(a for a in (y, z) if a is not None)
+        return (x.x, x.y, x.heights) + shifted + following[len(shifted):]
+    if y is None or z is None:
+        raise TypeError("x, y and z are required unless a Surface is passed")
+    return (x, y, z) + following
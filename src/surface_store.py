@@ -0,0 +1,283 @@
+"""
+Chunked, compressed on-disk store for batches of surfaces.
+
+A store is a directory:
+
+    store/
+        manifest.json           store format, chunk size and compression
+        <name>/
+            axes.npz            1-D x and y axes
+            r0000_c0000.npz     height tiles of chunk x chunk samples
+            ...
+            meta.json           shape, dtype, parameters and seed
+
+meta.json is written last, so a surface is only listed once all its tiles are
+on disk and an interrupted run leaves a readable store. Readers load a whole
+surface or only the tiles a crop touches. Tiles are written with
+np.savez_compressed (or np.savez with compress=False); no dependency beyond
+numpy is needed.
+
+StoreWriter compresses and writes surfaces on a background thread, so that
+writing overlaps with generation:
+
+    with SurfaceStore('runs/sweep', mode='w') as store, store.writer() as writer:
+        for result in run_ensemble('spectral', params, 100, seed=0):
+            writer.submit(f'{result.params_index}_{result.realization}', result.heights,
+                          params=result.params, seed=result.seed)
+"""
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+from .surface import Surface
+
+FORMAT = 'rough-surface-store'
+VERSION = 1
+DEFAULT_CHUNK = 256
+
+def _json_value(value):
+    """
+    JSON encoder fallback for numpy scalars/arrays and SeedSequences.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.random.SeedSequence):
+        return {'entropy': value.entropy, 'spawn_key': list(value.spawn_key)}
+    return repr(value)
+
+def seed_from_metadata(seed):
+    """
+    Rebuild a stored seed: SeedSequences are stored as {'entropy', 'spawn_key'}.
+    """
+    if isinstance(seed, dict) and 'entropy' in seed:
+        return np.random.SeedSequence(seed['entropy'], spawn_key=tuple(seed.get('spawn_key', ())))
+    return seed
+
+def _write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as fh:
+        json.dump(data, fh, indent=1, default=_json_value)
+    os.replace(tmp, path)
+
+def _read_json(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+def _check_name(name):
+    name = str(name)
+    if not name or name.startswith('.') or os.sep in name or (os.altsep and os.altsep in name):
+        raise ValueError(f"invalid surface name {name!r}")
+    return name
+
+class SurfaceStore:
+    """
+    Directory of chunked, compressed surfaces.
+
+    Parameters:
+        path: Store directory
+        mode: 'r' read, 'w' create a new store (the directory must not hold
+            one), 'a' open or create for appending
+        chunk: Tile edge length for new stores
+        compress: Compress the tiles of new stores
+    """
+
+    def __init__(self, path, mode='r', chunk=DEFAULT_CHUNK, compress=True):
+        if mode not in ('r', 'w', 'a'):
+            raise ValueError(f"mode must be 'r', 'w' or 'a', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        manifest = os.path.join(path, 'manifest.json')
+        exists = os.path.exists(manifest)
+        if mode == 'w' and exists:
+            raise FileExistsError(f"{path} already holds a surface store")
+        if mode == 'r' or exists:
+            info = _read_json(manifest)
+            if info.get('format') != FORMAT:
+                raise ValueError(f"{path} is not a surface store")
+            self.chunk = info['chunk']
+            self.compress = info['compress']
+        else:
+            if chunk < 1:
+                raise ValueError("chunk must be at least 1")
+            os.makedirs(path, exist_ok=True)
+            self.chunk = int(chunk)
+            self.compress = bool(compress)
+            _write_json(manifest, {'format': FORMAT, 'version': VERSION,
+                                   'chunk': self.chunk, 'compress': self.compress})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def names(self):
+        """Sorted names of the complete surfaces in the store."""
+        return sorted(entry.name for entry in os.scandir(self.path)
+                      if entry.is_dir() and os.path.exists(os.path.join(entry.path, 'meta.json')))
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __len__(self):
+        return len(self.names())
+
+    def __contains__(self, name):
+        return os.path.exists(os.path.join(self.path, str(name), 'meta.json'))
+
+    def metadata(self, name):
+        """
+        Return the metadata dict of a surface (shape, dtype, params, seed, ...).
+        """
+        if name not in self:
+            raise KeyError(f"no surface {name!r} in {self.path}")
+        meta = _read_json(os.path.join(self.path, str(name), 'meta.json'))
+        meta['seed'] = seed_from_metadata(meta.get('seed'))
+        return meta
+
+    def write(self, name, heights, x=None, y=None, params=None, seed=None, **metadata):
+        """
+        Write one surface as tiles plus its axes and metadata.
+
+        Parameters:
+            name: Surface name (a directory name inside the store)
+            heights: 2-D heights (any array-like, e.g. a memmap)
+            x, y: 1-D axes (default: sample indices)
+            params: Dict of generation parameters
+            seed: Seed (int, SeedSequence, ...) stored with the surface
+            metadata: Further JSON-serializable fields
+        """
+        if self.mode == 'r':
+            raise PermissionError("store is opened read-only")
+        name = _check_name(name)
+        if not hasattr(heights, 'shape'):
+            heights = np.asarray(heights)
+        if np.ndim(heights) != 2:
+            raise ValueError("heights must be 2-D")
+        rows, cols = np.shape(heights)
+        x = np.arange(cols, dtype=float) if x is None else np.asarray(x)
+        y = np.arange(rows, dtype=float) if y is None else np.asarray(y)
+        if x.shape != (cols,) or y.shape != (rows,):
+            raise ValueError("x and y must be 1-D axes matching the heights")
+
+        directory = os.path.join(self.path, name)
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        os.makedirs(directory, exist_ok=True)
+        save = np.savez_compressed if self.compress else np.savez
+        save(os.path.join(directory, 'axes.npz'), x=x, y=y)
+        c = self.chunk
+        for i in range(0, rows, c):
+            for j in range(0, cols, c):
+                tile = np.asarray(heights[i:i + c, j:j + c])
+                save(os.path.join(directory, f'r{i // c:04d}_c{j // c:04d}.npz'), heights=tile)
+
+        meta = dict(metadata, name=name, shape=[rows, cols], dtype=str(heights.dtype),
+                    chunk=c, params=params or {}, seed=seed)
+        _write_json(meta_path, meta)
+
+    def _tile(self, name, ti, tj):
+        with np.load(os.path.join(self.path, name, f'r{ti:04d}_c{tj:04d}.npz')) as data:
+            return data['heights']
+
+    def read(self, name, rows=None, cols=None):
+        """
+        Read a surface or a crop of it, loading only the tiles the crop touches.
+
+        Parameters:
+            name: Surface name
+            rows, cols: Optional slices (step 1) of grid rows and columns
+
+        Returns:
+            Surface with the (cropped) heights and axes, params and seed
+        """
+        meta = self.metadata(name)
+        n_rows, n_cols = meta['shape']
+        r0, r1, _ = (rows or slice(None)).indices(n_rows)
+        c0, c1, _ = (cols or slice(None)).indices(n_cols)
+        if r1 <= r0 or c1 <= c0:
+            raise ValueError("the crop is empty")
+        c = meta['chunk']
+
+        heights = np.empty((r1 - r0, c1 - c0), dtype=meta['dtype'])
+        for ti in range(r0 // c, (r1 - 1) // c + 1):
+            for tj in range(c0 // c, (c1 - 1) // c + 1):
+                tile = self._tile(name, ti, tj)
+                i0, j0 = ti * c, tj * c
+                a0, a1 = max(r0, i0), min(r1, i0 + tile.shape[0])
+                b0, b1 = max(c0, j0), min(c1, j0 + tile.shape[1])
+                heights[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = tile[a0 - i0:a1 - i0, b0 - j0:b1 - j0]
+
+        with np.load(os.path.join(self.path, name, 'axes.npz')) as axes:
+            x, y = axes['x'][c0:c1], axes['y'][r0:r1]
+        return Surface(heights, x, y, meta['params'], meta['seed'])
+
+    def writer(self, max_pending=4):
+        """
+        Return a StoreWriter that writes to this store on a background thread.
+        """
+        return StoreWriter(self, max_pending)
+
+class StoreWriter:
+    """
+    Writes surfaces to a store on a background thread.
+
+    submit blocks once max_pending surfaces are queued, which bounds memory.
+    An error in the writer thread is raised by the next submit or by close.
+    Use as a context manager, or call close() to wait for all writes.
+    """
+
+    def __init__(self, store, max_pending=4):
+        self.store = store
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='surface-store-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    args, kwargs = item
+                    self.store.write(*args, **kwargs)
+            except BaseException as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def submit(self, name, heights, x=None, y=None, params=None, seed=None, **metadata):
+        """
+        Queue a surface for writing (same arguments as SurfaceStore.write).
+        """
+        if self._error is not None:
+            raise self._error
+        if not self._thread.is_alive():
+            raise RuntimeError("writer is closed")
+        self._queue.put(((name, heights, x, y, params, seed), metadata))
+
+    def close(self):
+        """
+        Wait for the queued writes and stop the thread.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
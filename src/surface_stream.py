@@ -0,0 +1,231 @@
+"""
+Time-evolving spectral surfaces.
+
+SurfaceStream yields a sequence of frames of one evolving random surface.
+Its state is the complex white spectrum W(k) on the rfft grid; frame t is
+irfft2(W_t * F) with F the cached filter of generate_random_gaussian_surface
+(the exponential kernel, or the square root of a registered PSD model). The
+spectrum evolves as
+
+    W_{t+1} = rho(k) * exp(-i * omega(k) * dt) * W_t + sqrt(1 - rho(k)^2) * xi_t
+
+with rho = exp(-dt / correlation_time) and xi fresh complex white noise: an
+AR(1) (Ornstein-Uhlenbeck) process per wavenumber, so every frame has the
+statistics of a single generated surface and frames dt apart correlate by
+rho. The optional dispersion relation omega(k) advances the phases, so the
+surface also propagates (e.g. omega = sqrt(g * k) for deep-water waves).
+
+The filter, the decay factors and the state, noise and spectrum buffers are
+set up once; a frame costs one noise draw, a few in-place updates and one
+inverse FFT:
+
+    stream = SurfaceStream(N_x=512, h=0.001, clx=0.5, correlation_time=20.0, seed=0)
+    for heights in stream.frames(1000):
+        ...
+    stream.write('frames.npy', 1000)                     # (1000, N_y, N_x) memmap
+    with SurfaceStore('run', mode='w') as store:
+        stream.write(store, 1000)                        # chunked, compressed
+"""
+
+import numpy as np
+
+from .fft_backend import complex_dtype, get_backend, real_dtype
+from .profiling import stage
+from .psd_models import wavenumbers
+from .spectral_surface import _grid, _params, kernel_rfft, psd_filter
+from .surface_store import SurfaceStore
+
+def _self_conjugate_columns(N_x):
+    """
+    rfft columns that are their own conjugates (0 and, for even N_x, N_x // 2).
+    """
+    return [0, N_x // 2] if N_x % 2 == 0 else [0]
+
+class SurfaceStream:
+    """
+    Iterator over the frames of a time-evolving random Gaussian surface.
+
+    Parameters:
+        N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params: As in
+            generate_random_gaussian_surface. With a PSD model the frames have
+            expected (not exact) RMS height h
+        correlation_time: Decay time of the AR(1) process in the units of dt;
+            np.inf freezes the spectrum (only dispersion moves it) and 0 gives
+            independent frames. A callable is evaluated on the wavenumber
+            magnitude |k| for scale-dependent decorrelation
+        dt: Time step between frames
+        dispersion: Optional callable omega(|k|) giving the angular
+            frequency that advances the phase of each wavenumber per unit time
+        seed: int or SeedSequence; None draws fresh entropy
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+        dtype: Working precision, np.float64 or np.float32
+
+    Iterating yields the height arrays (N_y, N_x) of consecutive frames;
+    x, y are the axes and t the time of the next frame.
+    """
+
+    def __init__(self, N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001, clx=2.0, cly=None, model=None,
+                 model_params=None, correlation_time=10.0, dt=1.0, dispersion=None, seed=None,
+                 fft_backend=None, dtype=np.float64):
+        N_x, N_y, rL_x, rL_y, clx, cly, self.x, self.y = _grid(N_x, N_y, rL_x, rL_y, h, clx, cly)
+        if dt <= 0:
+            raise ValueError("dt must be positive")
+        if seed is None:
+            seed = np.random.SeedSequence()
+        self.N_x, self.N_y = N_x, N_y
+        self.params = dict(_params(N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params),
+                           correlation_time=correlation_time, dt=dt, dispersion=dispersion)
+        self.seed = seed
+        self.dt = dt
+        self.dtype = real_dtype(dtype)
+        self.backend = get_backend(fft_backend)
+        self.index = 0
+
+        with stage('surface_stream_setup') as s:
+            self._filter = self._build_filter(N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params)
+            self._decay, self._innovation = self._build_decay(N_x, N_y, rL_x, rL_y, correlation_time, dispersion)
+            self._rng = np.random.default_rng(seed)
+            shape = (N_y, N_x // 2 + 1)
+            self._noise = np.empty((2,) + shape)
+            self._state = np.empty(shape, dtype=complex_dtype(self.dtype))
+            self._spectrum = np.empty_like(self._state)
+            self._draw(self._state, 1.0, add=False)
+            s.record(self._filter, self._state, self._spectrum, self._noise)
+
+    def _build_filter(self, N_x, N_y, rL_x, rL_y, h, clx, cly, model, model_params):
+        """
+        Cached kernel or PSD filter, scaled so that irfft2(W * F) of unit
+        complex white W has the statistics of generate_random_gaussian_surface.
+
+        rfft2 of real white noise has variance N_x * N_y per bin; irfft2 keeps
+        only the Hermitian part of the self-conjugate columns of W, which
+        halves their variance, so those columns get a factor sqrt(2).
+        """
+        if model is None:
+            filt = h * np.sqrt(N_x * N_y) * kernel_rfft(N_x, N_y, rL_x, rL_y, clx, cly, self.dtype, self.backend)
+        else:
+            amplitude = psd_filter(model, N_x, N_y, rL_x, rL_y, clx, cly, np.float64, **(model_params or {}))
+            weights = np.full(amplitude.shape[1], 2.0)
+            weights[_self_conjugate_columns(N_x)] = 1.0
+            power = np.sum(weights * amplitude**2)
+            filt = (h * N_x * N_y / np.sqrt(power) if power > 0 else 0.0) * amplitude
+        filt = np.array(filt, dtype=complex_dtype(self.dtype) if model is None else self.dtype)
+        filt[:, _self_conjugate_columns(N_x)] *= np.sqrt(2.0)
+        return filt
+
+    def _build_decay(self, N_x, N_y, rL_x, rL_y, correlation_time, dispersion):
+        """
+        Per-step factor rho * exp(-i * omega * dt) and innovation weight sqrt(1 - rho^2).
+        """
+        k = None
+        if callable(correlation_time) or dispersion is not None:
+            KX, KY = wavenumbers(N_x, N_y, rL_x, rL_y)
+            k = np.hypot(KX, KY)
+        tau = correlation_time(k) if callable(correlation_time) else correlation_time
+        if np.any(np.asarray(tau) < 0):
+            raise ValueError("correlation_time must be non-negative")
+        with np.errstate(divide='ignore'):
+            rho = np.exp(-self.dt / np.asarray(tau, dtype=float))
+        innovation = np.sqrt(1.0 - rho**2)
+        if dispersion is None:
+            decay = rho
+        else:
+            decay = (rho * np.exp(-1j * self.dt * np.asarray(dispersion(k)))).astype(complex_dtype(self.dtype))
+        if np.ndim(decay) == 0:
+            decay = float(decay)
+        if np.ndim(innovation) == 0:
+            innovation = float(innovation)
+        return decay, innovation
+
+    def _draw(self, out, weight, add=True):
+        """
+        Set (or add to) out complex white noise of variance weight^2 per bin.
+        """
+        noise = self._rng.standard_normal(out=self._noise)
+        noise *= np.sqrt(0.5) * np.asarray(weight)
+        if add:
+            out.real += noise[0]
+            out.imag += noise[1]
+        else:
+            out.real = noise[0]
+            out.imag = noise[1]
+
+    @property
+    def t(self):
+        """Time of the next frame."""
+        return self.index * self.dt
+
+    def advance(self):
+        """
+        Step the spectrum by dt without producing a frame.
+        """
+        with stage('advance'):
+            self._state *= self._decay
+            if np.any(self._innovation):
+                self._draw(self._state, self._innovation)
+        self.index += 1
+
+    def frame(self):
+        """
+        Return the heights of the current frame, shape (N_y, N_x).
+        """
+        with stage('surface_stream_frame', index=self.index):
+            with stage('filter'):
+                np.multiply(self._state, self._filter, out=self._spectrum)
+            with stage('ifft') as s:
+                heights = self.backend.irfft2(self._spectrum, s=(self.N_y, self.N_x))
+                s.record(heights)
+        return heights.astype(self.dtype, copy=False)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        heights = self.frame()
+        self.advance()
+        return heights
+
+    def frames(self, n_frames):
+        """
+        Yield the next n_frames frames.
+        """
+        for _ in range(n_frames):
+            yield next(self)
+
+    def write(self, out, n_frames, name='frame', max_pending=4):
+        """
+        Write the next n_frames frames to an array, a .npy memmap or a surface store.
+
+        Parameters:
+            out: Path of a .npy file to create, an existing
+                (n_frames, N_y, N_x) array or numpy.memmap, or a
+                surface_store.SurfaceStore (frames written on a background
+                thread as name_000000, name_000001, ... with their time)
+            n_frames: Number of frames
+            name: Surface name prefix in a store
+            max_pending: Frames queued for the store writer
+
+        Returns:
+            The filled array/memmap, or the store
+        """
+        if isinstance(out, SurfaceStore):
+            with stage('surface_stream_write', n_frames=n_frames), out.writer(max_pending) as writer:
+                for heights in self.frames(n_frames):
+                    index = self.index - 1
+                    writer.submit(f'{name}_{index:06d}', heights, self.x, self.y, params=self.params,
+                                  seed=self.seed, frame=index, time=index * self.dt)
+            return out
+
+        shape = (n_frames, self.N_y, self.N_x)
+        if isinstance(out, np.ndarray):
+            if out.shape != shape:
+                raise ValueError(f"out has shape {out.shape}, expected {shape}")
+            frames = out
+        else:
+            frames = np.lib.format.open_memmap(out, mode='w+', dtype=self.dtype, shape=shape)
+        with stage('surface_stream_write', n_frames=n_frames):
+            for i, heights in enumerate(self.frames(n_frames)):
+                frames[i] = heights
+            if isinstance(frames, np.memmap):
+                frames.flush()
+        return frames
@@ -0,0 +1,178 @@
+"""
+Tiled, out-of-core spectral surface generation.
+
+generate_random_gaussian_surface_tiled writes a surface with the same
+exponential correlation and normalization as generate_random_gaussian_surface
+into a numpy.memmap (or .npy file) one tile at a time.
+
+The white noise lives on the surface grid extended by the kernel half-width
+on every side and is cut into fixed noise blocks, each drawn from its own
+SeedSequence child. Each output tile reads the blocks under its footprint
+plus the kernel margin and convolves them with the truncated kernel by
+overlap-save: it keeps the valid part of one circular FFT convolution.
+Neighbouring tiles therefore see exactly the same noise and join seamlessly,
+the result does not depend on tile_size, and peak memory depends on the tile
+and kernel size only: each tile convolves a (tile + 2K)^2 noise region, K
+the kernel half-width in samples, so peak memory is about a few
+(tile + 2K)^2 float64 arrays (the region, its spectrum and the cached kernel
+spectra). K grows with clx / dx, so long correlation lengths on fine grids
+are rejected up front (see max_margin) rather than allocating regions far
+larger than the tile. Unlike the in-memory generator, the surface is not
+periodic.
+"""
+
+import numpy as np
+
+from .fft_backend import get_backend
+from .profiling import stage
+from .random_state import child_seed
+
+def _kernel_half_width(cl, spacing, n, kernel_tol):
+    """
+    Number of samples after which exp(-|x| / (cl / 2)) drops below kernel_tol.
+    """
+    return int(min(np.ceil(cl / 2.0 * np.log(1.0 / kernel_tol) / spacing), n - 1))
+
+def _check_margin(axis, cl, spacing, K, tile, max_margin):
+    """
+    Raise ValueError if the kernel margin 2 * K exceeds max_margin tiles along one axis.
+    """
+    if 2 * K <= max_margin * tile:
+        return
+    fit = int(max_margin * tile) // 2
+    # One sample of slack so that the rounded kernel_tol still fits
+    fit_tol = np.exp(-max(fit - 1, 0) * spacing / (cl / 2.0))
+    fit_tile = int(np.ceil(2 * K / max_margin))
+    raise ValueError(f"kernel margin along {axis} (2 * {K} samples for cl{axis}={cl}) exceeds max_margin={max_margin} "
+                     f"tiles of {tile} samples, a {tile + 2 * K}-sample tile region; use kernel_tol >= "
+                     f"{fit_tol:.3g}, tile_size >= {fit_tile} or a larger max_margin")
+
+def _noise_block(seed, by, bx, shape, noise_block):
+    """
+    Noise block (by, bx) of the extended grid, clipped to its shape.
+    """
+    rows = min(noise_block, shape[0] - by * noise_block)
+    cols = min(noise_block, shape[1] - bx * noise_block)
+    rng = np.random.default_rng(child_seed(child_seed(seed, by), bx))
+    return rng.standard_normal((rows, cols))
+
+def _noise_region(seed, y0, y1, x0, x1, shape, noise_block, blocks):
+    """
+    Assemble noise rows y0..y1 - 1 and columns x0..x1 - 1 of the extended grid.
+
+    blocks holds the blocks of the previous tile; it is replaced by the
+    blocks of this tile.
+    """
+    region = np.empty((y1 - y0, x1 - x0))
+    used = {}
+    for by in range(y0 // noise_block, (y1 - 1) // noise_block + 1):
+        for bx in range(x0 // noise_block, (x1 - 1) // noise_block + 1):
+            block = blocks.get((by, bx))
+            if block is None:
+                block = _noise_block(seed, by, bx, shape, noise_block)
+            used[(by, bx)] = block
+            by0, bx0 = by * noise_block, bx * noise_block
+            ry0, ry1 = max(y0, by0), min(y1, by0 + block.shape[0])
+            rx0, rx1 = max(x0, bx0), min(x1, bx0 + block.shape[1])
+            region[ry0 - y0:ry1 - y0, rx0 - x0:rx1 - x0] = block[ry0 - by0:ry1 - by0, rx0 - bx0:rx1 - bx0]
+    blocks.clear()
+    blocks.update(used)
+    return region
+
+def generate_random_gaussian_surface_tiled(out, N_x=128, N_y=None, rL_x=10.0, rL_y=None, h=0.001, clx=2.0,
+                                           cly=None, seed=None, tile_size=1024, noise_block=256,
+                                           kernel_tol=1e-6, max_margin=8.0, dtype=np.float64, fft_backend=None):
+    """
+    Generate a random Gaussian surface tile by tile into a memory-mapped array.
+
+    Each tile convolves a noise region of (tile + 2 * Ky, tile + 2 * Kx)
+    samples, K the kernel half-width, so peak memory is about a few
+    (tile + 2K)^2 float64 arrays.
+
+    Parameters:
+        out: Path of the .npy file to create, or an existing (N_y, N_x) array
+            or numpy.memmap to fill
+        N_x, N_y, rL_x, rL_y, h, clx, cly: As in generate_random_gaussian_surface
+        seed: Root seed (int or SeedSequence); None draws fresh entropy
+        tile_size: Edge length of the output tiles
+        noise_block: Edge length of the independently seeded noise blocks
+        kernel_tol: Relative kernel value at which the kernel is truncated
+        max_margin: Largest kernel margin 2 * K, in tiles, before a
+            ValueError naming a kernel_tol or tile_size that fits is raised
+        dtype: Output dtype
+        fft_backend: FFT backend name or object (see fft_backend.get_backend)
+
+    Returns:
+        surface: The filled memmap/array, shape (N_y, N_x)
+        x, y: Coordinate axes
+    """
+    if N_y is None:
+        N_y = N_x
+    if rL_y is None:
+        rL_y = rL_x
+    if cly is None:
+        cly = clx
+    if h < 0:
+        raise ValueError("h must be non-negative")
+    if clx <= 0 or cly <= 0:
+        raise ValueError("correlation lengths must be positive")
+    if tile_size < 1 or noise_block < 1:
+        raise ValueError("tile_size and noise_block must be at least 1")
+    if not 0 < kernel_tol < 1:
+        raise ValueError("kernel_tol must be between 0 and 1")
+    if seed is None:
+        seed = np.random.SeedSequence()
+
+    x = np.linspace(-rL_x/2, rL_x/2, N_x)
+    y = np.linspace(-rL_y/2, rL_y/2, N_y)
+    dx = rL_x / max(N_x - 1, 1)
+    dy = rL_y / max(N_y - 1, 1)
+
+    Kx = _kernel_half_width(clx, dx, N_x, kernel_tol)
+    Ky = _kernel_half_width(cly, dy, N_y, kernel_tol)
+    # Check the tile region before anything is allocated
+    _check_margin('x', clx, dx, Kx, min(tile_size, N_x), max_margin)
+    _check_margin('y', cly, dy, Ky, min(tile_size, N_y), max_margin)
+    kx = np.exp(-np.abs(np.arange(-Kx, Kx + 1) * dx) / (clx / 2.0))
+    ky = np.exp(-np.abs(np.arange(-Ky, Ky + 1) * dy) / (cly / 2.0))
+    factor = np.sqrt(rL_x * rL_y) / (N_x * N_y * clx * cly)
+    kernel = factor * h * np.outer(ky, kx)
+
+    if isinstance(out, np.ndarray):
+        if out.shape != (N_y, N_x):
+            raise ValueError(f"out has shape {out.shape}, expected {(N_y, N_x)}")
+        surface = out
+    else:
+        surface = np.lib.format.open_memmap(out, mode='w+', dtype=dtype, shape=(N_y, N_x))
+
+    backend = get_backend(fft_backend)
+    extended = (N_y + 2 * Ky, N_x + 2 * Kx)
+    kernel_ffts = {}
+    blocks = {}
+
+    with stage('generate_random_gaussian_surface_tiled'):
+        for y0 in range(0, N_y, tile_size):
+            y1 = min(y0 + tile_size, N_y)
+            for x0 in range(0, N_x, tile_size):
+                x1 = min(x0 + tile_size, N_x)
+                # Output rows y0..y1 need extended noise rows y0..y1 + 2 * Ky
+                with stage('noise') as s:
+                    region = _noise_region(seed, y0, y1 + 2 * Ky, x0, x1 + 2 * Kx, extended, noise_block, blocks)
+                    s.record(region)
+
+                shape = region.shape
+                if shape not in kernel_ffts:
+                    with stage('kernel') as s:
+                        kernel_ffts[shape] = backend.rfft2(kernel, s=shape)
+                        s.record(kernel_ffts[shape])
+                with stage('convolve') as s:
+                    conv = backend.irfft2(backend.rfft2(region) * kernel_ffts[shape], s=shape)
+                    s.record(conv)
+                with stage('write'):
+                    surface[y0:y1, x0:x1] = conv[2 * Ky:, 2 * Kx:]
+
+        if isinstance(surface, np.memmap):
+            with stage('flush'):
+                surface.flush()
+
+    return surface, x, y
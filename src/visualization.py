@@ -1,27 +1,44 @@
 """
 Visualization module for rough surface generation.
+
+plotly and matplotlib are imported inside the plotting functions, so that
+importing this module (and the package) stays cheap for headless workers.
 """
 
 import numpy as np
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 
-def plot_surface_3d(x, y, z, title="3D Surface Plot", colormap='viridis', interactive=True):
+from .level_of_detail import DEFAULT_MAX_VERTICES, crop_surface, decimate_surface
+from .surface import unpack_surface
+
+def plot_surface_3d(x, y=None, z=None, title="3D Surface Plot", colormap='viridis', interactive=True,
+                    max_vertices=DEFAULT_MAX_VERTICES, lod_method='minmax', x_range=None, y_range=None):
     """
     Create a 3D surface plot using either plotly (interactive) or matplotlib.
     
     Parameters:
-        x, y: Coordinate meshgrids
+        x, y: Coordinate meshgrids or 1-D axes; or a surface.Surface as x
         z: Surface heights
         title: Plot title
         colormap: Color scheme for the surface
         interactive: If True, use plotly for interactive plot, else use matplotlib
+        max_vertices: Vertex budget of the plotted grid (None plots every point)
+        lod_method: Decimation method, 'minmax' or 'stride' (see level_of_detail)
+        x_range, y_range: Optional (min, max) window plotted at full resolution
+            (still decimated if it exceeds max_vertices)
     
     Returns:
         fig: Figure object (plotly.graph_objects.Figure or matplotlib.figure.Figure)
     """
+    x, y, z, title, colormap, interactive, max_vertices, lod_method, x_range, y_range = unpack_surface(
+        x, y, z, title, colormap, interactive, max_vertices, lod_method, x_range, y_range)
+    if x_range is not None or y_range is not None:
+        x, y, z = crop_surface(x, y, z, x_range, y_range)
+    if max_vertices is not None:
+        x, y, z = decimate_surface(x, y, z, max_vertices, lod_method)
+
     if interactive:
+        import plotly.graph_objects as go
+
         fig = go.Figure(data=[go.Surface(x=x, y=y, z=z, colorscale=colormap)])
         fig.update_layout(
             title=title,
@@ -32,6 +49,10 @@ def plot_surface_3d(x, y, z, title="3D Surface Plot", colormap='viridis', intera
             )
         )
     else:
+        import matplotlib.pyplot as plt
+
+        if np.ndim(x) == 1 or np.ndim(y) == 1:
+            x, y = np.meshgrid(x, y, sparse=True)
         fig = plt.figure(figsize=(10, 8))
         ax = fig.add_subplot(111, projection='3d')
         surf = ax.plot_surface(x, y, z, cmap=colormap)
@@ -43,12 +64,12 @@ def plot_surface_3d(x, y, z, title="3D Surface Plot", colormap='viridis', intera
     
     return fig
 
-def plot_surface_2d(x, y, z, title="Surface Height Map", colormap='viridis'):
+def plot_surface_2d(x, y=None, z=None, title="Surface Height Map", colormap='viridis'):
     """
     Create a 2D height map of the surface.
     
     Parameters:
-        x, y: Coordinate meshgrids
+        x, y: Coordinate meshgrids or 1-D axes; or a surface.Surface as x
         z: Surface heights
         title: Plot title
         colormap: Color scheme for the height map
@@ -56,6 +77,9 @@ def plot_surface_2d(x, y, z, title="Surface Height Map", colormap='viridis'):
     Returns:
         fig: matplotlib.figure.Figure object
     """
+    import matplotlib.pyplot as plt
+
+    x, y, z, title, colormap = unpack_surface(x, y, z, title, colormap)
     fig, ax = plt.subplots(figsize=(10, 8))
     im = ax.pcolormesh(x, y, z, cmap=colormap, shading='auto')
     ax.set_xlabel('X')
@@ -77,6 +101,8 @@ def plot_height_distribution(z, bins=50, title="Height Distribution"):
     Returns:
         fig: matplotlib.figure.Figure object
     """
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(8, 6))
     ax.hist(z.flatten(), bins=bins, density=True)
     ax.set_xlabel('Height')
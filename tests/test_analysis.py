@@ -0,0 +1,76 @@
+"""
+Unit tests for the surface analysis module.
+"""
+
+import pytest
+import numpy as np
+from src.analysis import (autocorrelation, correlation_length, curvature_rms, grid_spacing,
+                          radial_psd, slope_rms, surface_statistics)
+from src.psd_models import gaussian_psd
+from src.spectral_surface import generate_random_gaussian_surface_batch
+
+@pytest.fixture(scope='module')
+def gaussian_batch():
+    surfaces, x, y = generate_random_gaussian_surface_batch(
+        16, N_x=256, rL_x=40.0, h=0.001, clx=2.0, model='gaussian', seed=1
+    )
+    return surfaces, grid_spacing(x, y)
+
+def test_batch_matches_single(gaussian_batch):
+    """Test if batched statistics equal the per-surface ones."""
+    surfaces, (dx, dy) = gaussian_batch
+    batch = surface_statistics(surfaces, dx, dy)
+    single = surface_statistics(surfaces[3], dx, dy)
+    for name, values in batch.items():
+        assert values.shape == (16,)
+        assert np.isclose(values[3], single[name])
+
+    k, psd = radial_psd(surfaces, dx, dy)
+    assert np.allclose(psd[3], radial_psd(surfaces[3], dx, dy)[1], equal_nan=True)
+
+def test_gaussian_statistics(gaussian_batch):
+    """Test if a Gaussian surface has the expected height and slope statistics."""
+    surfaces, (dx, dy) = gaussian_batch
+    stats = surface_statistics(surfaces, dx, dy)
+    assert np.allclose(stats['rms'], 0.001)
+    assert abs(stats['skewness'].mean()) < 0.1
+    assert abs(stats['kurtosis'].mean() - 3.0) < 0.2
+    # exp(-r^2 / cl^2) correlation: RMS slope is 2 h / cl
+    assert np.isclose(stats['slope_rms'].mean(), 2 * 0.001 / 2.0, rtol=0.1)
+
+def test_correlation_length(gaussian_batch):
+    """Test if the estimated correlation length is close to the generated one."""
+    surfaces, (dx, dy) = gaussian_batch
+    clx, cly = correlation_length(surfaces, dx, dy)
+    assert clx.shape == cly.shape == (16,)
+    assert abs(clx.mean() - 2.0) < 0.2 and abs(cly.mean() - 2.0) < 0.2
+
+def test_radial_psd_matches_model(gaussian_batch):
+    """Test if the radial PSD follows the closed-form Gaussian PSD."""
+    surfaces, (dx, dy) = gaussian_batch
+    k, psd = radial_psd(surfaces, dx, dy)
+    expected = 0.001**2 * gaussian_psd(k, 0.0, 2.0, 2.0)
+    band = slice(2, 12)
+    assert np.allclose(psd.mean(axis=0)[band], expected[band], rtol=0.25)
+
+def test_autocorrelation_direct():
+    """Test the FFT autocorrelation against a direct lag sum."""
+    z = np.random.default_rng(2).standard_normal((2, 9, 12))
+    acf, lag_x, lag_y = autocorrelation(z, dx=0.5, dy=0.25, normalize=False)
+    assert acf.shape == (2, 17, 23)
+    assert lag_x[0] == -5.5 and lag_y[-1] == 2.0
+
+    zc = z[1] - z[1].mean()
+    for ly, lx in [(0, 0), (3, -4), (-8, 11), (2, 5)]:
+        a = zc[max(ly, 0):9 + min(ly, 0), max(lx, 0):12 + min(lx, 0)]
+        b = zc[max(-ly, 0):9 + min(-ly, 0), max(-lx, 0):12 + min(-lx, 0)]
+        assert acf[1, 8 + ly, 11 + lx] == pytest.approx(np.sum(a * b) / zc.size)
+
+def test_derivatives_plane_wave():
+    """Test the slope and curvature RMS on a cosine surface."""
+    x = np.linspace(0, 2 * np.pi, 256, endpoint=False)
+    X, _ = np.meshgrid(x, x)
+    z = np.cos(X)
+    dx = x[1] - x[0]
+    assert slope_rms(z, dx) == pytest.approx(np.sqrt(0.5), rel=1e-2)
+    assert curvature_rms(z, dx) == pytest.approx(0.5 * np.sqrt(0.5), rel=1e-2)
@@ -0,0 +1,48 @@
+"""
+Unit tests for seeded and batched surface generation.
+"""
+
+import pytest
+import numpy as np
+from src.parametric_surface import generate_parametric_surface, generate_parametric_surface_batch
+from src.spectral_surface import generate_random_gaussian_surface, generate_random_gaussian_surface_batch
+from src.random_state import realization_seeds
+
+def test_parametric_batch_matches_single_calls():
+    """Test if each batch realization equals a single call with its child seed."""
+    _, _, batch = generate_parametric_surface_batch(4, N=5, num_points=33, seed=123)
+    assert batch.shape == (4, 33, 33)
+
+    for k, s in enumerate(realization_seeds(123, 4)):
+        _, _, single = generate_parametric_surface(N=5, num_points=33, seed=s)
+        assert np.allclose(batch[k], single)
+
+def test_spectral_batch_matches_single_calls():
+    """Test if each batch realization equals a single call with its child seed."""
+    batch, x, y = generate_random_gaussian_surface_batch(3, N_x=32, N_y=16, seed=7)
+    assert batch.shape == (3, 16, 32)
+    assert len(x) == 32 and len(y) == 16
+
+    for k, s in enumerate(realization_seeds(7, 3)):
+        single, _, _ = generate_random_gaussian_surface(N_x=32, N_y=16, seed=s)
+        assert np.allclose(batch[k], single)
+
+def test_batch_reproducibility():
+    """Test if the same seed gives the same batch and realizations differ."""
+    _, _, a = generate_parametric_surface_batch(3, N=4, num_points=17, seed=2024)
+    _, _, b = generate_parametric_surface_batch(3, N=4, num_points=17, seed=2024)
+    assert np.array_equal(a, b)
+    assert not np.allclose(a[0], a[1])
+
+    c, _, _ = generate_random_gaussian_surface_batch(2, N_x=16, seed=np.random.default_rng(5))
+    d, _, _ = generate_random_gaussian_surface_batch(2, N_x=16, seed=np.random.default_rng(5))
+    assert np.array_equal(c, d)
+
+def test_batch_explicit_seeds():
+    """Test if a sequence of per-realization seeds is honoured."""
+    _, _, batch = generate_parametric_surface_batch(2, N=3, num_points=9, seed=[10, 11])
+    _, _, single = generate_parametric_surface(N=3, num_points=9, seed=11)
+    assert np.allclose(batch[1], single)
+
+    with pytest.raises(ValueError):
+        generate_parametric_surface_batch(3, N=3, num_points=9, seed=[10, 11])
@@ -0,0 +1,32 @@
+"""
+Unit tests for the benchmark suite.
+"""
+
+from benchmarks.run_benchmarks import benchmark_cases, compare, main, run_benchmarks
+
+def test_small_sweep(tmp_path):
+    """Test if a small sweep records time, memory and throughput for every case."""
+    cases = benchmark_cases(sizes=[16], modes=[3], batches=[1, 2], tmpdir=str(tmp_path))
+    results = run_benchmarks(cases, repeat=1, verbose=False)
+    names = [r['name'] for r in results]
+    assert len(set(names)) == len(names) == 6
+    assert all(r['wall_time'] > 0 and r['peak_memory'] > 0 and r['throughput'] > 0 for r in results)
+
+    assert len(benchmark_cases(sizes=[16], modes=[3], batches=[1, 2], max_elements=300)) == 2
+
+def test_compare_thresholds():
+    """Test if only changes beyond the thresholds are reported."""
+    baseline = [{'name': 'a', 'wall_time': 1.0, 'peak_memory': 100}]
+    assert compare([{'name': 'a', 'wall_time': 1.1, 'peak_memory': 100}], baseline) == []
+    assert compare([{'name': 'a', 'wall_time': 1.5, 'peak_memory': 100}], baseline) == [('a', 'wall_time', 1.0, 1.5)]
+    assert compare([{'name': 'a', 'wall_time': 1.5, 'peak_memory': 130}], baseline,
+                   time_threshold=1.0, memory_threshold=0.25) == [('a', 'peak_memory', 100, 130)]
+    assert compare([{'name': 'b', 'wall_time': 9.0, 'peak_memory': 900}], baseline) == []
+
+def test_cli_baseline(tmp_path):
+    """Test if the CLI writes results and fails on a regression."""
+    output = tmp_path / 'results.json'
+    argv = ['--sizes', '16', '--modes', '3', '--batches', '1', '--repeat', '1', '--filter', 'spectral']
+    assert main(argv + ['--output', str(output)]) == 0
+    assert main(argv + ['--baseline', str(output), '--time-threshold', '1000']) == 0
+    assert main(argv + ['--baseline', str(output), '--time-threshold', '-1']) == 1
@@ -0,0 +1,48 @@
+"""
+Unit tests for the ensemble runner.
+"""
+
+import pytest
+import numpy as np
+from src.ensemble import parameter_grid, run_ensemble, task_seed
+from src.parametric_surface import generate_parametric_surface
+from src.spectral_surface import generate_random_gaussian_surface
+
+def _collect(results):
+    return {(r.params_index, r.realization): r for r in results}
+
+def test_parameter_grid():
+    """Test if the parameter grid is the Cartesian product of the values."""
+    grid = parameter_grid(N=[4, 6], b=[1.5, 1.8, 2.0], factor=0.01)
+    assert len(grid) == 6
+    assert grid[0] == {'N': 4, 'b': 1.5, 'factor': 0.01}
+
+def test_results_match_single_calls():
+    """Test if each result equals a single generator call with its task seed."""
+    grid = parameter_grid(N_x=[16, 24], clx=1.0)
+    results = _collect(run_ensemble('spectral', grid, 3, seed=11, max_workers=0))
+    assert len(results) == 6
+
+    for (index, realization), result in results.items():
+        expected, _, _ = generate_random_gaussian_surface(
+            seed=task_seed(11, index, realization), **grid[index])
+        assert np.allclose(result.heights, expected)
+
+def test_independent_of_workers_and_chunking(tmp_path):
+    """Test if results do not depend on the pool size or task chunking."""
+    grid = parameter_grid(N=[3, 5], num_points=17)
+    serial = _collect(run_ensemble('parametric', grid, 4, seed=5, max_workers=0))
+    pooled = _collect(run_ensemble('parametric', grid, 4, seed=5, max_workers=2,
+                                   realizations_per_task=3, output_dir=tmp_path))
+
+    assert serial.keys() == pooled.keys()
+    for key, result in serial.items():
+        assert np.array_equal(result.heights, np.load(pooled[key].path))
+
+    _, _, single = generate_parametric_surface(seed=task_seed(5, 1, 2), **grid[1])
+    assert np.allclose(serial[(1, 2)].heights, single)
+
+def test_unknown_generator():
+    """Test if an unknown generator name is rejected."""
+    with pytest.raises(ValueError):
+        list(run_ensemble('fractal', {}, 1, max_workers=0))
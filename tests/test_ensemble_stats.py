@@ -0,0 +1,72 @@
+"""
+Unit tests for the streaming ensemble statistics accumulator.
+"""
+
+import pickle
+import pytest
+import numpy as np
+from src.analysis import grid_spacing, radial_psd, surface_statistics
+from src.ensemble_stats import EnsembleStatistics, RunningMoments
+from src.spectral_surface import generate_random_gaussian_surface_batch
+
+def _batch(n, seed):
+    surfaces, x, y = generate_random_gaussian_surface_batch(
+        n, N_x=32, N_y=24, rL_x=8.0, h=0.001, model='gaussian', seed=seed
+    )
+    return surfaces, grid_spacing(x, y)
+
+def test_running_moments_merge():
+    """Test if merged Welford moments equal the moments of all samples."""
+    samples = np.random.default_rng(0).normal(3.0, 2.0, (1000, 4))
+    a, b = RunningMoments(), RunningMoments()
+    for chunk in np.array_split(samples[:300], 7):
+        a.update(chunk)
+    b.update(samples[300:])
+    a.merge(b)
+    assert a.count == 1000
+    assert np.allclose(a.mean, samples.mean(axis=0))
+    assert np.allclose(a.variance, samples.var(axis=0, ddof=1))
+
+def test_streaming_matches_batch():
+    """Test if streaming single surfaces and merging workers match a single batch."""
+    surfaces, (dx, dy) = _batch(40, seed=1)
+    full = EnsembleStatistics(dx, dy, hist_range=(-0.005, 0.005)).update(surfaces)
+
+    worker_a = EnsembleStatistics(dx, dy, hist_range=(-0.005, 0.005))
+    for z in surfaces[:15]:
+        worker_a.update(z)
+    worker_b = EnsembleStatistics(dx, dy, hist_range=(-0.005, 0.005)).update(surfaces[15:])
+    merged = pickle.loads(pickle.dumps(worker_a)).merge(worker_b)
+
+    assert merged.count == full.count == 40
+    for name, moments in full.statistics.items():
+        assert np.allclose(merged.statistics[name].mean, moments.mean)
+        assert np.allclose(merged.statistics[name].variance, moments.variance)
+    assert np.allclose(merged.psd.mean, radial_psd(surfaces, dx, dy)[1].mean(axis=0), equal_nan=True)
+    assert np.allclose(merged.acf.mean, full.acf.mean)
+    assert np.array_equal(merged.histogram()[0], full.histogram()[0])
+    assert merged.histogram()[0].sum() == surfaces.size
+
+def test_confidence_interval_and_convergence():
+    """Test if the confidence interval brackets the mean and narrows with more data."""
+    surfaces, (dx, dy) = _batch(200, seed=2)
+    stats = EnsembleStatistics(dx, dy, acf=False)
+    stats.update(surfaces[:20])
+    low, high = stats.confidence_interval('slope_rms')
+    width_20 = high - low
+    stats.update(surfaces[20:])
+    low, high = stats.confidence_interval('slope_rms')
+    mean = surface_statistics(surfaces, dx, dy)['slope_rms'].mean()
+    assert low < mean < high and high - low < width_20
+
+    assert stats.converged('rms', rtol=1e-6)  # the Gaussian model hits h exactly
+    assert not stats.converged('skewness', rtol=1e-3)
+    assert set(stats.summary()) == set(surface_statistics(surfaces[0], dx, dy))
+
+def test_incompatible_merge():
+    """Test if accumulators with different histogram bins are not merged."""
+    surfaces, (dx, dy) = _batch(4, seed=3)
+    a = EnsembleStatistics(dx, dy, hist_range=(-1, 1)).update(surfaces)
+    b = EnsembleStatistics(dx, dy, hist_range=(-2, 2)).update(surfaces)
+    with pytest.raises(ValueError):
+        a.merge(b)
@@ -0,0 +1,61 @@
+"""
+Unit tests for FFT backend selection.
+"""
+
+import pytest
+import numpy as np
+from src import fft_backend
+from src.fft_backend import get_backend, set_backend, set_default_workers, use_backend
+from src.parametric_surface import generate_parametric_surface
+from src.spectral_surface import generate_random_gaussian_surface
+
+def test_backends_agree():
+    """Test if numpy and scipy backends give the same surfaces."""
+    a, _, _ = generate_random_gaussian_surface(N_x=64, seed=1, fft_backend='numpy')
+    b, _, _ = generate_random_gaussian_surface(N_x=64, seed=1, fft_backend='scipy')
+    assert np.allclose(a, b, rtol=0, atol=1e-12 * np.abs(a).max())
+
+    _, _, c = generate_parametric_surface(N=5, num_points=41, seed=1, fft_backend='numpy')
+    _, _, d = generate_parametric_surface(N=5, num_points=41, seed=1,
+                                          fft_backend=fft_backend.ScipyBackend(workers=2))
+    assert np.allclose(c, d)
+
+def test_global_and_scoped_selection():
+    """Test if the backend can be set globally and overridden in a with-block."""
+    previous = get_backend()
+    try:
+        set_backend('numpy')
+        assert get_backend().name == 'numpy'
+        with use_backend('scipy', workers=-1) as backend:
+            assert get_backend() is backend
+            assert backend.workers == -1
+        assert get_backend().name == 'numpy'
+    finally:
+        set_backend(previous)
+
+def test_unknown_backend():
+    """Test if an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        get_backend('fftw')
+
+def test_scipy_fallback(monkeypatch):
+    """Test if asking for scipy without scipy installed falls back to numpy."""
+    monkeypatch.setattr(fft_backend, '_scipy_fft', None)
+    with pytest.warns(UserWarning):
+        assert get_backend('scipy').name == 'numpy'
+
+def test_scipy_uses_all_cores_by_default():
+    """Test if scipy backends chosen by name use all cores unless workers is given."""
+    previous = get_backend()
+    try:
+        assert get_backend('scipy').workers == -1
+        set_backend('scipy')
+        assert get_backend().workers == -1
+        set_default_workers(1)
+        assert get_backend().workers == 1
+        assert get_backend('scipy').workers == 1
+        with use_backend('scipy', workers=3) as backend:
+            assert backend.workers == 3
+    finally:
+        set_default_workers(fft_backend.DEFAULT_WORKERS)
+        set_backend(previous)
@@ -0,0 +1,27 @@
+"""
+Import-time regression tests: the package must not load plotting, STL or scipy dependencies.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('matplotlib', 'plotly', 'stl', 'mpl_toolkits', 'scipy')
+
+def _loaded_after(code):
+    script = f"import sys\n{code}\nprint(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    out = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+def test_import_package_is_headless():
+    """Test if importing the package and the generators loads no plotting, STL or scipy module."""
+    loaded = _loaded_after("import src\nfrom src import generate_random_gaussian_surface, run_ensemble\n"
+                           "import src.stl_export, src.visualization, src.analysis")
+    assert not loaded & set(HEAVY)
+
+def test_lazy_attributes():
+    """Test if plotting and export functions are still available from the package."""
+    loaded = _loaded_after("from src import export_to_stl, plot_surface_3d\nfrom src import *\n"
+                           "assert callable(plot_surface_2d)")
+    assert 'src' in loaded
@@ -0,0 +1,59 @@
+"""
+Unit tests for level-of-detail decimation and cropping.
+"""
+
+import pytest
+import numpy as np
+from src.level_of_detail import crop_surface, decimate_surface
+from src.visualization import plot_surface_3d
+
+def _surface(rows=301, cols=257):
+    x = np.linspace(0, 1, cols)
+    y = np.linspace(-1, 1, rows)
+    z = np.random.default_rng(0).standard_normal((rows, cols))
+    return x, y, z
+
+@pytest.mark.parametrize("method", ['stride', 'minmax'])
+def test_decimation_budget(method):
+    """Test if decimation respects the vertex budget and keeps the input form."""
+    x, y, z = _surface()
+    xd, yd, zd = decimate_surface(x, y, z, max_vertices=5000, method=method)
+    assert zd.size <= 5000 + zd.shape[0] + zd.shape[1]
+    assert xd.ndim == 1 and zd.shape == (len(yd), len(xd))
+
+    X, Y = np.meshgrid(x, y)
+    Xd, Yd, _ = decimate_surface(X, Y, z, max_vertices=5000, method=method)
+    assert Xd.shape == zd.shape and np.allclose(Xd[0], xd)
+
+def test_minmax_keeps_extremes():
+    """Test if min/max decimation keeps the global peak and valley."""
+    x, y, z = _surface()
+    _, _, zd = decimate_surface(x, y, z, max_vertices=2000, method='minmax')
+    assert zd.max() == z.max() and zd.min() == z.min()
+
+    _, _, zs = decimate_surface(x, y, z, max_vertices=2000, method='stride')
+    assert zs[0, 0] == z[0, 0] and zs[-1, -1] == z[-1, -1]
+
+def test_small_surface_untouched():
+    """Test if surfaces within budget are returned unchanged."""
+    x, y, z = _surface(20, 30)
+    assert decimate_surface(x, y, z, max_vertices=1000)[2] is z
+
+def test_crop_is_full_resolution():
+    """Test if cropping returns the original samples inside the window."""
+    x, y, z = _surface()
+    xc, yc, zc = crop_surface(x, y, z, x_range=(0.25, 0.5), y_range=(0.0, 0.5))
+    cols = (x >= 0.25) & (x <= 0.5)
+    rows = (y >= 0.0) & (y <= 0.5)
+    assert np.array_equal(zc, z[np.ix_(rows, cols)])
+    assert np.array_equal(xc, x[cols]) and np.array_equal(yc, y[rows])
+
+    with pytest.raises(ValueError):
+        crop_surface(x, y, z, x_range=(2.0, 3.0))
+
+def test_plot_surface_3d_decimates():
+    """Test if the interactive plot receives the decimated grid."""
+    x, y, z = _surface()
+    X, Y = np.meshgrid(x, y)
+    fig = plot_surface_3d(X, Y, z, max_vertices=4000)
+    assert np.asarray(fig.data[0].z).size <= 4000
@@ -0,0 +1,93 @@
+"""
+Unit tests for indexed mesh (PLY, OBJ) and heightmap export.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from stl import mesh
+
+from src.mesh_export import (export_heightmap, export_to_obj, export_to_ply, ply_bytes,
+                             read_heightmap)
+from src.stl_export import export_to_stl, surface_faces
+from src.surface import Surface
+
+def _grid(rows, cols):
+    x = np.linspace(0, 1, cols)
+    y = np.linspace(0, 2, rows)
+    z = np.random.default_rng(0).random((rows, cols))
+    return x, y, z
+
+def _read_ply(data):
+    header, body = data.split(b'end_header\n', 1)
+    lines = header.decode('ascii').splitlines()
+    n_vertices = int(next(l for l in lines if l.startswith('element vertex')).split()[-1])
+    n_faces = int(next(l for l in lines if l.startswith('element face')).split()[-1])
+    vertex_dtype = '<f8' if 'property double x' in lines else '<f4'
+    vertices = np.frombuffer(body, dtype=vertex_dtype, count=3 * n_vertices).reshape(-1, 3)
+    offset = vertices.nbytes
+    faces = np.frombuffer(body[offset:], dtype=[('n', 'u1'), ('v', '<i4', (3,))], count=n_faces)
+    return vertices, faces
+
+def test_ply_matches_stl_triangles(tmp_path):
+    """Test if the PLY mesh holds the same triangles as the STL export, with shared vertices."""
+    rows, cols = 6, 9
+    x, y, z = _grid(rows, cols)
+    export_to_ply(x, y, z, tmp_path / "a.ply")
+    export_to_stl(x, y, z, tmp_path / "a.stl", writer='binary')
+
+    vertices, faces = _read_ply((tmp_path / "a.ply").read_bytes())
+    assert len(vertices) == 2 * rows * cols
+    assert np.all(faces['n'] == 3)
+    assert np.array_equal(faces['v'], surface_faces(rows, cols))
+    stl = mesh.Mesh.from_file(str(tmp_path / "a.stl"))
+    assert np.allclose(vertices[faces["v"]], stl.vectors, rtol=1e-6, atol=1e-6)
+
+def test_ply_double_precision():
+    """Test if dtype=np.float64 writes double vertices."""
+    x, y, z = _grid(3, 4)
+    vertices, _ = _read_ply(ply_bytes(x, y, z, dtype=np.float64))
+    assert np.array_equal(vertices[:12, 2], z.ravel())
+
+def test_obj(tmp_path):
+    """Test if the OBJ file lists every vertex once and 1-based faces of the closed solid."""
+    rows, cols = 4, 5
+    x, y, z = _grid(rows, cols)
+    export_to_obj(Surface(z, x, y), tmp_path / "a.obj", base_thickness=0.5)
+
+    lines = (tmp_path / "a.obj").read_text().splitlines()
+    vertices = np.array([l.split()[1:] for l in lines if l.startswith('v ')], dtype=float)
+    faces = np.array([l.split()[1:] for l in lines if l.startswith('f ')], dtype=int)
+    assert vertices.shape == (2 * rows * cols, 3)
+    assert np.allclose(vertices[:rows * cols, 2], z.ravel(), rtol=1e-6)
+    assert np.allclose(vertices[rows * cols:, 2], z.ravel() - 0.5, rtol=1e-6)
+    assert np.array_equal(faces - 1, surface_faces(rows, cols))
+
+@pytest.mark.parametrize("name", ["h.png", "h.raw"])
+def test_heightmap_round_trip(tmp_path, name):
+    """Test if a heightmap reads back within half a quantization step, with its grid."""
+    x, y, z = _grid(7, 11)
+    meta = export_heightmap(x, y, z, tmp_path / name)
+    assert meta == json.loads((tmp_path / (name + '.json')).read_text())
+    assert meta['format'] == name[-3:] and meta['scale'] == pytest.approx(np.ptp(z) / 65535)
+
+    z2, x2, y2 = read_heightmap(tmp_path / name)
+    assert np.max(np.abs(z2 - z)) <= meta['scale'] / 2 * (1 + 1e-9)
+    assert np.allclose(x2, x) and np.allclose(y2, y)
+
+def test_heightmap_png_is_valid(tmp_path):
+    """Test if the PNG decodes as 16-bit grayscale with the largest y in the top row."""
+    Image = pytest.importorskip("PIL.Image")
+    x, y, z = _grid(5, 8)
+    z[-1, 0] = 10.0
+    export_heightmap(x, y, z, tmp_path / "h.png")
+    image = np.array(Image.open(tmp_path / "h.png"))
+    assert image.shape == (5, 8)
+    assert image[0, 0] == 65535
+
+def test_flat_heightmap(tmp_path):
+    """Test if a flat surface round-trips exactly."""
+    x, y, _ = _grid(3, 3)
+    export_heightmap(x, y, np.full((3, 3), 2.5), tmp_path / "f.png")
+    assert np.array_equal(read_heightmap(tmp_path / "f.png")[0], np.full((3, 3), 2.5))
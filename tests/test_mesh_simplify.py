@@ -0,0 +1,99 @@
+"""
+Unit tests for adaptive mesh simplification.
+"""
+
+import numpy as np
+import pytest
+from stl import mesh
+
+from src.mesh_export import export_to_ply
+from src.mesh_simplify import is_watertight, simplified_mesh, triangle_errors
+from src.spectral_surface import generate_random_gaussian_surface
+from src.stl_export import export_to_stl, surface_faces
+from src.surface import Surface
+
+def _surface(N_x=61, N_y=38):
+    z, x, y = generate_random_gaussian_surface(N_x=N_x, N_y=N_y, clx=1.5, seed=4)
+    return x, y, z
+
+def _volume(vertices, faces):
+    v = vertices[faces]
+    return np.einsum('ij,ij->i', v[:, 0], np.cross(v[:, 1], v[:, 2])).sum() / 6.0
+
+def test_full_grid_is_watertight():
+    """Test if the watertight check accepts the full-resolution solid and rejects an open one."""
+    faces = surface_faces(5, 7)
+    assert is_watertight(faces)
+    assert not is_watertight(faces[1:])
+
+@pytest.mark.parametrize("relative", [0.0, 0.01, 0.1, 1.0, 100.0])
+def test_simplified_mesh_is_closed_and_outward(relative):
+    """Test if the simplified solid is watertight, outward oriented and holds the right volume."""
+    x, y, z = _surface()
+    rms = z.std()
+    vertices, faces, error = simplified_mesh(x, y, z, relative * rms, base_thickness=0.5)
+    assert is_watertight(faces)
+    assert error <= relative * rms
+
+    # Volume above the flat base: exact for the mesh, bounded by the error for the grid
+    dx, dy = x[1] - x[0], y[1] - y[0]
+    area = (x[-1] - x[0]) * (y[-1] - y[0])
+    base = z.min() - 0.5
+    grid = np.trapezoid(np.trapezoid(z - base, dx=dx, axis=1), dx=dy)
+    assert abs(_volume(vertices, faces) - grid) <= error * area + 1e-9
+
+def test_error_is_achieved_error():
+    """Test if the reported error is the largest deviation of the top mesh from the grid heights."""
+    tri = pytest.importorskip("matplotlib.tri")
+    x, y, z = _surface()
+    vertices, faces, error = simplified_mesh(x, y, z, 0.05 * z.std())
+    top = faces[np.all(vertices[faces][:, :, 2] > vertices[:, 2].min(), axis=1)]
+    interpolate = tri.LinearTriInterpolator(tri.Triangulation(vertices[:, 0], vertices[:, 1], top),
+                                            vertices[:, 2])
+    X, Y = np.meshgrid(x, y)
+    assert np.max(np.abs(interpolate(X, Y) - z)) == pytest.approx(error, rel=1e-9)
+
+def test_fewer_triangles_for_larger_tolerance():
+    """Test if the triangle count falls with the tolerance and stays below the full grid."""
+    x, y, z = _surface()
+    counts = [len(simplified_mesh(x, y, z, t * z.std())[1]) for t in (0.0, 0.01, 0.1, 1.0)]
+    assert counts == sorted(counts, reverse=True)
+    assert counts[0] <= len(surface_faces(*z.shape))
+
+def test_plane_collapses():
+    """Test if a tilted plane becomes one leaf: 4 top, 2 base and 8 wall triangles."""
+    x = np.linspace(0, 2, 33)
+    y = np.linspace(0, 1, 17)
+    z = 0.3 * x[None, :] - 0.2 * y[:, None]
+    vertices, faces, error = simplified_mesh(Surface(z, x, y), 1e-12, base_thickness=0.1)
+    assert len(faces) == 14 and error < 1e-12
+    base = vertices[:, 2] == vertices[:, 2].min()
+    assert base.sum() == 4 and vertices[base, 2][0] == pytest.approx(z.min() - 0.1)
+
+def test_triangle_errors():
+    """Test if triangle errors are 0 for a plane and catch a bump at an interior grid point."""
+    z = np.add.outer(np.arange(5.0), 2.0 * np.arange(5.0))
+    tris = np.array([[[0, 0], [0, 4], [4, 0]], [[4, 0], [0, 4], [4, 4]]])
+    assert np.allclose(triangle_errors(z, tris), 0.0)
+    z[1, 1] += 0.5
+    z[3, 3] -= 0.25
+    assert np.allclose(triangle_errors(z, tris), [0.5, 0.25])
+
+def test_exporters_use_tolerance(tmp_path):
+    """Test if export_to_stl and export_to_ply write the simplified mesh and return its error."""
+    x, y, z = _surface()
+    tolerance = 0.1 * z.std()
+    vertices, faces, error = simplified_mesh(x, y, z, tolerance)
+    assert export_to_stl(x, y, z, tmp_path / "a.stl", writer='binary', tolerance=tolerance) == error
+    stl = mesh.Mesh.from_file(str(tmp_path / "a.stl"))
+    assert np.allclose(stl.vectors, vertices[faces], atol=1e-6)
+    assert export_to_ply(x, y, z, tmp_path / "a.ply", tolerance=tolerance) == error
+    assert export_to_stl(x, y, z, tmp_path / "b.stl", writer='binary') is None
+
+def test_invalid_input():
+    """Test if negative tolerances and single-row grids are rejected."""
+    x, y, z = _surface()
+    with pytest.raises(ValueError):
+        simplified_mesh(x, y, z, -1.0)
+    with pytest.raises(ValueError):
+        simplified_mesh(x, y[:1], z[:1], 0.0)
@@ -0,0 +1,67 @@
+"""
+Unit tests for the per-stage profiling hooks.
+"""
+
+import csv
+import json
+import numpy as np
+from src.profiling import add_hook, profile, remove_hook, stage, summarize
+from src.parametric_surface import generate_parametric_surface
+from src.spectral_surface import clear_kernel_cache, generate_random_gaussian_surface
+from src.stl_export import export_to_stl
+
+def _generate_pair(n):
+    generate_random_gaussian_surface(N_x=n, seed=0)
+    generate_random_gaussian_surface(N_x=n, seed=1, model='gaussian')
+
+def test_disabled_is_noop():
+    """Test if stages return the shared no-op object when profiling is off."""
+    assert stage('a') is stage('b')
+    with stage('a') as s:
+        s.record(np.zeros(3))
+
+def test_generator_stages():
+    """Test if the spectral generator reports its stages with array sizes."""
+    clear_kernel_cache()
+    with profile(N_x=64) as prof:
+        surface, x, y = generate_random_gaussian_surface(N_x=64, seed=0)
+    paths = [r['path'] for r in prof.records]
+    assert paths[-1] == 'generate_random_gaussian_surface'
+    for name in ('noise', 'kernel', 'fft', 'filter', 'ifft'):
+        assert f'generate_random_gaussian_surface/{name}' in paths
+    noise = prof.records[paths.index('generate_random_gaussian_surface/noise')]
+    assert noise['shape'] == '64x64' and noise['nbytes'] == surface.nbytes and noise['N_x'] == 64
+
+    # Profiling does not change the result
+    assert np.array_equal(generate_random_gaussian_surface(N_x=64, seed=0)[0], surface)
+
+def test_export_and_hooks(tmp_path):
+    """Test if hooks and nested profilers receive the export stages."""
+    S1, S2, f = generate_parametric_surface(num_points=20, seed=1)
+    records = []
+    hook = add_hook(records.append)
+    try:
+        with profile() as outer, profile() as inner:
+            export_to_stl(S1, S2, f, str(tmp_path / 'surface.stl'), writer='binary')
+    finally:
+        remove_hook(hook)
+    stages = {r['path'] for r in inner.records}
+    assert {'export_to_stl/mesh', 'export_to_stl/stl_records', 'export_to_stl/stl_write'} <= stages
+    assert len(outer.records) == len(inner.records) == len(records)
+
+def test_trace_export_and_aggregation(tmp_path):
+    """Test if CSV traces of a sweep can be appended, read back and aggregated."""
+    path = tmp_path / 'trace.csv'
+    for n in (32, 64):
+        with profile(N_x=n) as prof:
+            _generate_pair(n)
+        prof.to_csv(path, append=True)
+    prof.to_json(tmp_path / 'trace.json')
+
+    with open(path, newline='') as fh:
+        rows = list(csv.DictReader(fh))
+    assert {row['N_x'] for row in rows} == {'32', '64'}
+    totals = summarize(rows, by=('stage', 'N_x'))
+    assert totals[('noise', '64')]['count'] == 2
+    assert totals[('noise', '64')]['nbytes'] == 2 * 64 * 64 * 8
+    assert json.loads((tmp_path / 'trace.json').read_text())[0]['N_x'] == 64
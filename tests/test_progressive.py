@@ -0,0 +1,109 @@
+"""
+Unit tests for progressive (coarse-to-fine) surface generation.
+"""
+
+import numpy as np
+import pytest
+
+from src.parametric_surface import ParametricSurface
+from src.progressive import (ProgressiveSurface, level_sizes, progressive_parametric_surface,
+                             progressive_random_gaussian_surface)
+from src.spectral_surface import generate_random_gaussian_surface
+
+def _low_pass(heights, shape):
+    """Keep the modes |m| <= (n - 1) // 2 of a coarser shape and sample every other point."""
+    ny, nx = shape
+    F = np.fft.fft2(heights)
+    m = np.fft.fftfreq(heights.shape[1], 1.0 / heights.shape[1])
+    n = np.fft.fftfreq(heights.shape[0], 1.0 / heights.shape[0])
+    F *= (np.abs(n) <= (ny - 1) // 2)[:, None] & (np.abs(m) <= (nx - 1) // 2)[None, :]
+    return np.fft.ifft2(F).real[::2, ::2]
+
+def test_level_sizes():
+    """Test if the level sizes halve (rounding up) down to the preview size."""
+    assert level_sizes(256, 32) == [32, 64, 128, 256]
+    assert level_sizes(200, 32) == [50, 100, 200]
+    assert level_sizes(20, 32) == [20]
+
+@pytest.mark.parametrize("model", ['gaussian', None])
+def test_levels_are_low_passes_of_the_final_surface(model):
+    """Test if each level is the final surface restricted to its modes, on every other grid point."""
+    levels = list(progressive_random_gaussian_surface(N_x=128, N_y=64, rL_y=5.0, clx=0.4, model=model, seed=3,
+                                                      preview=32))
+    assert [level.shape for level in levels] == [(16, 32), (32, 64), (64, 128)]
+    for coarse, fine in zip(levels[:-1], levels[1:]):
+        np.testing.assert_allclose(_low_pass(fine.heights, coarse.shape), coarse.heights,
+                                   rtol=0.0, atol=1e-12 * np.abs(fine.heights).max())
+        np.testing.assert_allclose(fine.x[::2], coarse.x)
+        np.testing.assert_allclose(fine.y[::2], coarse.y)
+
+def test_coefficients_do_not_depend_on_the_grid():
+    """Test if the same seed gives the same coefficient for a mode on any grid."""
+    surface = ProgressiveSurface(seed=7)
+    small = surface.coefficients(9, 5)
+    large = ProgressiveSurface(N_x=1000, seed=7).coefficients(64, 31)
+    for n in range(-2, 3):
+        for m in range(-4, 5):
+            assert small[n % 5, m % 9] == large[n % 31, m % 64]
+    assert small[:, 9 // 2 + 1:].any()
+
+def test_even_grids_skip_the_nyquist_mode():
+    """Test if even grids leave the Nyquist row and column empty."""
+    C = ProgressiveSurface(seed=1).coefficients(8, 6)
+    assert not C[3].any() and not C[:, 4].any()
+    assert np.count_nonzero(C) == 7 * 5
+
+def test_rms_is_h_in_expectation():
+    """Test if the final level has mean square height h^2 over many seeds."""
+    h = 0.002
+    ms = [np.mean(ProgressiveSurface(N_x=64, h=h, clx=0.5, seed=s).level().heights**2) for s in range(200)]
+    assert np.mean(ms) == pytest.approx(h**2, rel=0.05)
+
+def test_kernel_model_matches_the_generator():
+    """Test if model=None has the mean square height and linspace axes of the exponential kernel generator."""
+    kwargs = dict(N_x=33, N_y=21, rL_y=6.0, h=0.002, clx=0.5)
+    ms = [np.mean(ProgressiveSurface(model=None, seed=s, **kwargs).level().heights**2) for s in range(300)]
+    ref = [np.mean(generate_random_gaussian_surface(seed=s, **kwargs)[0]**2) for s in range(300)]
+    assert np.mean(ms) == pytest.approx(np.mean(ref), rel=0.1)
+
+    surface = ProgressiveSurface(model=None, seed=0, **kwargs).level()
+    _, x, y = generate_random_gaussian_surface(seed=0, **kwargs)
+    np.testing.assert_allclose(surface.x, x)
+    np.testing.assert_allclose(surface.y, y)
+
+def test_coarse_levels_have_less_power():
+    """Test if dropping high frequencies lowers the RMS height of the coarse levels."""
+    surface = ProgressiveSurface(N_x=128, h=1.0, clx=0.1, model='exponential', seed=0)
+    rms = [np.sqrt(np.mean(level.heights**2)) for level in surface.levels(preview=16)]
+    assert rms == sorted(rms)
+
+def test_float32_matches_float64():
+    """Test if float32 gives the same realization as float64."""
+    f64 = ProgressiveSurface(N_x=48, seed=5).level()
+    f32 = ProgressiveSurface(N_x=48, seed=5, dtype=np.float32).level()
+    assert f32.heights.dtype == np.float32
+    np.testing.assert_allclose(f32.heights, f64.heights, atol=1e-5 * np.abs(f64.heights).max())
+
+def test_level_params_and_seed():
+    """Test if levels record their own grid size and the shared seed."""
+    levels = list(ProgressiveSurface(N_x=64, model='von_karman', model_params={'hurst': 0.3}, seed=2).levels(16))
+    assert [level.params['N_x'] for level in levels] == [16, 32, 64]
+    assert all(level.params['model'] == 'von_karman' for level in levels)
+    assert levels[0].seed.entropy == 2
+
+def test_final_false_skips_the_final_level():
+    """Test if final=False yields only the coarser levels."""
+    assert [level.shape for level in ProgressiveSurface(N_x=64).levels(16, final=False)] == [(16, 16), (32, 32)]
+
+def test_unknown_model():
+    """Test if an unknown PSD model is rejected."""
+    with pytest.raises(ValueError):
+        ProgressiveSurface(model='nope')
+
+def test_parametric_levels_are_subsamples():
+    """Test if the parametric levels are one realization sampled more and more finely."""
+    levels = list(progressive_parametric_surface(N=8, num_points=65, seed=11, preview=9))
+    assert [level.shape for level in levels] == [(9, 9), (17, 17), (33, 33), (65, 65)]
+    for coarse, fine in zip(levels[:-1], levels[1:]):
+        np.testing.assert_allclose(fine.heights[::2, ::2], coarse.heights, atol=1e-12)
+    np.testing.assert_allclose(levels[-1].heights, ParametricSurface(N=8, num_points=65, seed=11).heights)
@@ -0,0 +1,49 @@
+"""
+Unit tests for PSD models and analytic spectral synthesis.
+"""
+
+import pytest
+import numpy as np
+from src.psd_models import PSD_MODELS, psd_grid, register_psd_model
+from src.spectral_surface import generate_random_gaussian_surface, generate_random_gaussian_surface_batch
+
+@pytest.mark.parametrize("model", ['gaussian', 'exponential', 'power_law', 'von_karman'])
+def test_exact_rms(model):
+    """Test if analytic synthesis hits the requested RMS height exactly."""
+    h = 0.002
+    surfaces, _, _ = generate_random_gaussian_surface_batch(3, N_x=64, N_y=48, h=h, model=model, seed=0)
+    assert np.allclose(np.sqrt(np.mean(surfaces**2, axis=(1, 2))), h)
+    assert np.allclose(surfaces.mean(axis=(1, 2)), 0.0, atol=1e-15)
+
+def test_gaussian_correlation_length():
+    """Test if the Gaussian model's ACF drops to 1/e at the correlation length."""
+    N, rL, cl = 256, 40.0, 2.0
+    surfaces, _, _ = generate_random_gaussian_surface_batch(16, N_x=N, rL_x=rL, clx=cl, model='gaussian', seed=1)
+    spectrum = np.abs(np.fft.fft(surfaces, axis=-1))**2
+    acf = np.fft.ifft(spectrum, axis=-1).real.mean(axis=(0, 1))
+    acf /= acf[0]
+    lag = int(round(cl / (rL / (N - 1))))
+    assert abs(acf[lag] - np.exp(-1)) < 0.05
+
+def test_von_karman_matches_exponential():
+    """Test if the von Karman model with H = 0.5 is the exponential model."""
+    a = psd_grid('exponential', 32, 32, 10.0, 10.0, 1.0, 1.0)
+    b = psd_grid('von_karman', 32, 32, 10.0, 10.0, 1.0, 1.0, hurst=0.5)
+    assert np.allclose(a, b)
+
+def test_custom_model_registration():
+    """Test if a registered model can be used by the generator."""
+    @register_psd_model('flat_test')
+    def flat(kx, ky, clx, cly):
+        return np.ones_like(kx)
+
+    try:
+        surface, _, _ = generate_random_gaussian_surface(N_x=32, h=0.5, model='flat_test', seed=4)
+        assert np.isclose(np.sqrt(np.mean(surface**2)), 0.5)
+    finally:
+        del PSD_MODELS['flat_test']
+
+def test_unknown_model():
+    """Test if an unknown model name is rejected."""
+    with pytest.raises(ValueError):
+        generate_random_gaussian_surface(N_x=16, model='lorentzian')
@@ -0,0 +1,118 @@
+"""
+Unit tests for the local generation service (run against localhost).
+"""
+
+import threading
+
+import numpy as np
+import pytest
+from stl import mesh
+
+from src.cli import build_parser
+from src.parametric_surface import generate_parametric_surface
+from src.service import RequestCoalescer, ServiceClient, make_server
+from src.spectral_surface import generate_random_gaussian_surface
+
+@pytest.fixture
+def server():
+    server = make_server(port=0, window=0.05, max_batch=4, warm=[('spectral', {'N_x': 16})])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _client(server):
+    return ServiceClient(f'http://127.0.0.1:{server.server_address[1]}', timeout=30.0)
+
+def test_surface_matches_generator(server):
+    """Test if a served surface equals the single generator call with the same seed."""
+    client = _client(server)
+    surface = client.surface('spectral', seed=3, N_x=32, N_y=24, clx=1.0)
+    heights, x, y = generate_random_gaussian_surface(N_x=32, N_y=24, clx=1.0, seed=3)
+    np.testing.assert_array_equal(surface.heights, heights)
+    np.testing.assert_allclose(surface.x, x)
+    np.testing.assert_allclose(surface.y, y)
+    assert surface.seed == 3
+
+    surface = client.surface('parametric', seed=5, N=6, num_points=21, dtype='float32')
+    S1, S2, f = generate_parametric_surface(N=6, num_points=21, seed=5, dtype=np.float32)
+    assert surface.heights.dtype == np.float32
+    np.testing.assert_allclose(surface.heights, f, rtol=1e-6, atol=1e-7)
+
+def test_concurrent_requests_are_batched(server):
+    """Test if concurrent requests with identical parameters share batched calls."""
+    client = _client(server)
+    results = {}
+
+    def request(seed):
+        results[seed] = client.surface('spectral', seed=seed, N_x=24, clx=0.8, model='gaussian')
+
+    threads = [threading.Thread(target=request, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    info = client.health()
+    assert info['requests'] == 8
+    assert info['batches'] < 8
+    for seed, surface in results.items():
+        expected = generate_random_gaussian_surface(N_x=24, clx=0.8, model='gaussian', seed=seed)[0]
+        np.testing.assert_allclose(surface.heights, expected, rtol=1e-12, atol=1e-15)
+
+def test_missing_seed_is_returned(server):
+    """Test if a request without a seed reports the fresh seed it used."""
+    client = _client(server)
+    first = client.surface('spectral', N_x=16)
+    again = client.surface('spectral', seed=first.seed, N_x=16)
+    np.testing.assert_array_equal(first.heights, again.heights)
+
+def test_stl(server, tmp_path):
+    """Test if the STL endpoint returns a readable solid and the achieved error."""
+    client = _client(server)
+    data, seed, error = client.stl('spectral', seed=1, N_x=12, N_y=10)
+    assert seed == 1 and error is None
+    path = tmp_path / 'surface.stl'
+    path.write_bytes(data)
+    assert len(mesh.Mesh.from_file(str(path)).vectors) == 4 * 11 * 9 + 4 * 11 + 4 * 9
+
+    _, _, error = client.stl('spectral', seed=1, N_x=12, N_y=10, tolerance=1e-4)
+    assert 0.0 <= error <= 1e-4
+
+def test_errors(server):
+    """Test if bad parameters and paths give errors instead of crashing the service."""
+    client = _client(server)
+    with pytest.raises(ValueError, match='400'):
+        client.surface('spectral', N_x=16, bogus=1)
+    with pytest.raises(ValueError, match='404'):
+        client.surface('fractal', N_x=16)
+    with pytest.raises(ValueError, match='500.*IndexError'):
+        client.surface('parametric', num_points=0)
+    with pytest.raises(ValueError, match='400.*exceeds the service limit'):
+        client.surface('spectral', N_x=10_000_000)
+    with pytest.raises(ValueError, match='400.*exceeds the service limit'):
+        client.stl('parametric', num_points=5000)
+    assert client.surface('spectral', seed=0, N_x=16).shape == (16, 16)
+    assert client.health()['status'] == 'ok'
+
+def test_coalescer_respects_max_batch():
+    """Test if a batch is closed as soon as it holds max_batch requests."""
+    coalescer = RequestCoalescer(window=1.0, max_batch=2)
+    out = {}
+
+    def request(seed):
+        out[seed] = coalescer.generate('spectral', {'N_x': 8}, seed)
+
+    threads = [threading.Thread(target=request, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10.0)
+    assert coalescer.info() == {'requests': 4, 'batches': 2}
+    np.testing.assert_array_equal(out[2], generate_random_gaussian_surface(N_x=8, seed=2)[0])
+
+def test_serve_command_line():
+    """Test if the serve subcommand parses its options."""
+    args = build_parser().parse_args(['serve', '--port', '0', '--warm', 'spectral:N_x=64,clx=0.5'])
+    assert args.port == 0 and args.warm == ['spectral:N_x=64,clx=0.5']
@@ -0,0 +1,90 @@
+"""
+Unit tests for STL export.
+"""
+
+import pytest
+import numpy as np
+from stl import mesh
+from src.stl_export import (STL_RECORD_DTYPE, export_to_stl, export_to_stl_streaming, stl_bytes, stl_triangle_count,
+                            surface_faces)
+
+def _grid(rows, cols):
+    x, y = np.meshgrid(np.linspace(0, 1, cols), np.linspace(0, 2, rows))
+    z = np.random.default_rng(0).random((rows, cols))
+    return x, y, z
+
+def test_face_count():
+    """Test if the closed solid has top, bottom and wall triangles."""
+    rows, cols = 5, 8
+    faces = surface_faces(rows, cols)
+    assert faces.shape == (4 * (rows - 1) * (cols - 1) + 4 * (rows - 1) + 4 * (cols - 1), 3)
+    assert len(faces) == stl_triangle_count(rows, cols)
+    assert faces.min() == 0 and faces.max() == 2 * rows * cols - 1
+
+def test_mesh_is_closed():
+    """Test if every edge is shared by exactly two triangles with opposite orientation."""
+    faces = surface_faces(4, 6)
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    directed = set(map(tuple, edges))
+    assert len(directed) == len(edges)
+    assert all((b, a) in directed for a, b in directed)
+
+def test_writers_match(tmp_path):
+    """Test if the direct binary writer produces the same records as numpy-stl."""
+    x, y, z = _grid(6, 9)
+    export_to_stl(x, y, z, tmp_path / "a.stl")
+    export_to_stl(x, y, z, tmp_path / "b.stl", writer='binary')
+
+    a = (tmp_path / "a.stl").read_bytes()
+    b = (tmp_path / "b.stl").read_bytes()
+    assert a[80:] == b[80:]
+
+    m = mesh.Mesh.from_file(str(tmp_path / "b.stl"))
+    assert np.allclose(m.vectors[0], [[x[0, 0], y[0, 0], z[0, 0]],
+                                      [x[0, 1], y[0, 1], z[0, 1]],
+                                      [x[1, 0], y[1, 0], z[1, 0]]])
+
+def test_unknown_writer(tmp_path):
+    """Test if an unknown writer is rejected."""
+    x, y, z = _grid(3, 3)
+    with pytest.raises(ValueError):
+        export_to_stl(x, y, z, tmp_path / "c.stl", writer='ascii')
+
+def _sorted_records(data):
+    records = np.frombuffer(data[84:], dtype=STL_RECORD_DTYPE)
+    return np.sort(records.view(np.void(STL_RECORD_DTYPE.itemsize)))
+
+def test_streaming_matches_in_memory(tmp_path):
+    """Test if the streaming writer emits the same triangles as export_to_stl."""
+    rows, cols = 11, 7
+    x, y, z = _grid(rows, cols)
+    export_to_stl(x, y, z, tmp_path / "a.stl", writer='binary')
+
+    heights = np.lib.format.open_memmap(tmp_path / "z.npy", mode='w+', dtype=z.dtype, shape=z.shape)
+    heights[:] = z
+    n = export_to_stl_streaming(x[0], y[:, 0], heights, tmp_path / "b.stl", band_rows=3)
+
+    a = (tmp_path / "a.stl").read_bytes()
+    b = (tmp_path / "b.stl").read_bytes()
+    assert len(a) == len(b)
+    assert np.frombuffer(b[80:84], dtype='<u4')[0] == n == len(surface_faces(rows, cols))
+    assert np.array_equal(_sorted_records(a), _sorted_records(b))
+
+def test_triangle_count_limit(tmp_path):
+    """Test if a grid with more triangles than the uint32 STL count is rejected before writing."""
+    n = 40000
+    z = np.broadcast_to(np.float32(0.0), (n, n))
+    axis = np.linspace(0.0, 1.0, n)
+    path = tmp_path / "huge.stl"
+    with pytest.raises(ValueError, match="binary STL limit"):
+        export_to_stl_streaming(axis, axis, z, filename=str(path))
+    assert not path.exists()
+    with pytest.raises(ValueError, match="binary STL limit"):
+        export_to_stl(axis, axis, z, filename=str(path), writer='binary')
+    assert not path.exists()
+
+def test_stl_bytes(tmp_path):
+    """Test if stl_bytes returns the file written by the binary writer."""
+    x, y, z = _grid(4, 5)
+    export_to_stl(x, y, z, tmp_path / "d.stl", writer='binary')
+    assert stl_bytes(x, y, z) == (tmp_path / "d.stl").read_bytes()
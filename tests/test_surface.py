@@ -0,0 +1,77 @@
+"""
+Unit tests for the Surface container.
+"""
+
+import pytest
+import numpy as np
+from src.parametric_surface import ParametricSurface, generate_parametric_surface, generate_parametric_surface_batch
+from src.spectral_surface import generate_random_gaussian_surface, generate_random_gaussian_surface_batch
+from src.stl_export import export_to_stl, stl_bytes
+from src.surface import Surface
+from src.visualization import plot_surface_2d, plot_surface_3d
+
+def test_generators_return_surface():
+    """Test if as_surface returns the same heights with 1-D axes and parameters."""
+    S1, S2, f = generate_parametric_surface(N=8, num_points=33, seed=3)
+    surface = generate_parametric_surface(N=8, num_points=33, seed=3, as_surface=True)
+    assert np.array_equal(surface.heights, f)
+    assert surface.x.shape == surface.y.shape == (33,)
+    assert np.array_equal(surface.X, S1) and np.array_equal(surface.Y, S2)
+    assert surface.params['N'] == 8 and surface.seed == 3
+
+    heights, x, y = generate_random_gaussian_surface(N_x=40, N_y=24, seed=5)
+    surface = generate_random_gaussian_surface(N_x=40, N_y=24, seed=5, as_surface=True)
+    assert np.array_equal(surface.heights, heights) and surface.shape == (24, 40)
+    assert surface.spacing == pytest.approx((x[1] - x[0], y[1] - y[0]))
+
+def test_coordinates_are_views():
+    """Test if the coordinate grids take no memory."""
+    surface = generate_random_gaussian_surface(N_x=256, seed=0, as_surface=True)
+    assert surface.X.strides == (0, 8) and surface.Y.strides[1] == 0
+    assert not surface.X.flags.writeable
+    assert surface.nbytes == surface.heights.nbytes + 2 * 256 * 8
+    X, Y = surface.meshgrid(sparse=True)
+    assert X.shape == (1, 256) and Y.shape == (256, 1)
+    with pytest.raises(AttributeError):
+        surface.extra = 1
+
+def test_batched_surface():
+    """Test if batched surfaces can be indexed by realization."""
+    batch = generate_parametric_surface_batch(4, num_points=17, seed=1, as_surface=True)
+    assert len(batch) == 4 and batch.heights.shape == (4, 17, 17)
+    assert np.array_equal(batch[2].heights, batch.heights[2])
+    batch = generate_random_gaussian_surface_batch(2, N_x=16, seed=1, as_surface=True)
+    assert batch[0].shape == (16, 16)
+
+def test_exporters_accept_surface(tmp_path):
+    """Test if a Surface exports and plots exactly like the meshgrid arguments."""
+    surface = ParametricSurface(N=6, num_points=21, seed=2).as_surface()
+    X, Y = np.meshgrid(surface.x, surface.y)
+    assert stl_bytes(surface) == stl_bytes(X, Y, surface.heights)
+
+    export_to_stl(surface, str(tmp_path / 'a.stl'), writer='binary')
+    export_to_stl(X, Y, surface.heights, filename=str(tmp_path / 'b.stl'), writer='binary')
+    assert (tmp_path / 'a.stl').read_bytes() == (tmp_path / 'b.stl').read_bytes()
+
+    fig = plot_surface_3d(surface, "Surface")
+    assert fig.layout.title.text == "Surface"
+    with pytest.raises(TypeError):
+        export_to_stl(X, filename=str(tmp_path / 'c.stl'))
+
+def test_plots_accept_surface_with_positional_arguments():
+    """Test if every argument after z is forwarded when a Surface is plotted positionally."""
+    surface = ParametricSurface(N=6, num_points=21, seed=2).as_surface()
+    fig = plot_surface_3d(surface, "T", "plasma", max_vertices=100)
+    assert fig.layout.title.text == "T"
+    assert fig.data[0].colorscale == plot_surface_3d(surface, colormap="plasma").data[0].colorscale
+    assert np.size(fig.data[0].z) <= 100
+
+    fig = plot_surface_2d(surface, "T2", "plasma")
+    ax = fig.axes[0]
+    assert ax.get_title() == "T2"
+    assert ax.collections[0].get_cmap().name == "plasma"
+
+def test_shape_validation():
+    """Test if mismatched heights and axes are rejected."""
+    with pytest.raises(ValueError):
+        Surface(np.zeros((3, 4)), np.arange(3), np.arange(4))
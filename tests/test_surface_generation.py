@@ -4,8 +4,9 @@ Unit tests for surface generation functions.
 
 import pytest
 import numpy as np
-from src.parametric_surface import generate_parametric_surface
-from src.spectral_surface import generate_random_gaussian_surface
+from src.parametric_surface import ParametricSurface, generate_parametric_surface
+from src.spectral_surface import (DEFAULT_KERNEL_CACHE_SIZE, generate_random_gaussian_surface, clear_kernel_cache,
+                                  kernel_cache_info, set_kernel_cache_size)
 
 def test_parametric_surface_shape():
     """Test if parametric surface has correct shape."""
@@ -25,6 +26,25 @@ def test_parametric_surface_parameters():
     # Check if surface values are within expected range
     assert np.abs(surface).max() < factor * N  # Rough upper bound
 
+def test_parametric_fft_matches_direct():
+    """Test if the FFT engine reproduces the direct double sum."""
+    for num_points in (101, 50, 7, 2):
+        np.random.seed(0)
+        _, _, f_fft = generate_parametric_surface(N=6, num_points=num_points, method='fft')
+        np.random.seed(0)
+        _, _, f_direct = generate_parametric_surface(N=6, num_points=num_points, method='direct')
+        assert np.allclose(f_fft, f_direct, rtol=0, atol=1e-12)
+
+def test_parametric_non_uniform_grid():
+    """Test if non-uniform sample coordinates fall back to the direct sum."""
+    s = np.sort(np.random.rand(20))
+    S1, S2, surface = generate_parametric_surface(N=4, s1=s, s2=s)
+    assert surface.shape == (20, 20)
+    assert np.allclose(S1[0], s)
+
+    with pytest.raises(ValueError):
+        generate_parametric_surface(N=4, s1=s, s2=s, method='fft')
+
 def test_spectral_surface_shape():
     """Test if spectral surface has correct shape."""
     N_x = 128
@@ -34,6 +54,35 @@ def test_spectral_surface_shape():
     assert len(x) == N_x
     assert len(y) == N_y
 
+def test_spectral_surface_matches_complex_convolution():
+    """Test if the real-FFT convolution matches the full complex convolution."""
+    N_x, N_y, rL, h, cl = 48, 30, 10.0, 0.001, 2.0
+    surface, x, y = generate_random_gaussian_surface(N_x=N_x, N_y=N_y, rL_x=rL, h=h, clx=cl, seed=3)
+
+    Z = h * np.random.default_rng(3).standard_normal((N_y, N_x))
+    X, Y = np.meshgrid(x, y)
+    F = np.exp(-(np.abs(X)/(cl/2.0) + np.abs(Y)/(cl/2.0)))
+    factor = np.sqrt(rL * rL) / (N_x * N_y * cl * cl)
+    expected = factor * np.real(np.fft.ifft2(np.fft.fft2(Z) * np.fft.fft2(F)))
+    assert np.allclose(surface, expected, rtol=0, atol=1e-12 * np.abs(expected).max())
+
+def test_spectral_kernel_cache():
+    """Test if repeated calls reuse the cached kernel and the size limit is honoured."""
+    clear_kernel_cache()
+    set_kernel_cache_size(2)
+    try:
+        generate_random_gaussian_surface(N_x=32)
+        generate_random_gaussian_surface(N_x=32)
+        assert kernel_cache_info()['hits'] == 1
+        assert kernel_cache_info()['misses'] == 1
+
+        generate_random_gaussian_surface(N_x=16)
+        generate_random_gaussian_surface(N_x=8)
+        assert kernel_cache_info()['size'] == 2
+    finally:
+        set_kernel_cache_size(DEFAULT_KERNEL_CACHE_SIZE)
+        clear_kernel_cache()
+
 def test_spectral_surface_rms():
     """Test if spectral surface has correct RMS height."""
     h = 0.001
@@ -85,4 +134,31 @@ def test_surface_reproducibility():
     np.random.seed(43)
     surface2, _, _ = generate_random_gaussian_surface()
     
-    assert not np.allclose(surface1, surface2) 
\ No newline at end of file
+    assert not np.allclose(surface1, surface2) 
+
+def test_parametric_surface_incremental_updates():
+    """Test if incremental updates give the same surface as a fresh object."""
+    surface = ParametricSurface(N=4, b=1.8, factor=0.01, num_points=33, seed=9)
+    initial = surface.heights.copy()
+
+    surface.update(N=7)
+    assert np.allclose(surface.heights, ParametricSurface(N=7, b=1.8, num_points=33, seed=9).heights)
+    surface.update(N=4)
+    assert np.allclose(surface.heights, initial)
+
+    surface.update(factor=0.03)
+    assert np.allclose(surface.heights, 3 * initial)
+
+    surface.update(N=6, b=2.2, factor=0.01)
+    fresh = ParametricSurface(N=6, b=2.2, num_points=33, seed=9)
+    assert np.allclose(surface.heights, fresh.heights)
+
+def test_parametric_surface_matches_direct_sum():
+    """Test if the stateful surface is the double sum of its modes."""
+    surface = ParametricSurface(N=3, b=1.5, factor=0.5, num_points=9, seed=1)
+    m, n, phase = (np.concatenate(a) for a in zip(*[surface._ring(r) for r in (1, 2, 3)]))
+    r = (m**2 + n**2)**(-1.5 / 2.0)
+    expected = sum(rk * np.cos(2.0 * np.pi * (mk * surface.S1 + nk * surface.S2) + pk)
+                   for mk, nk, rk, pk in zip(m, n, r, phase))
+    assert len(m) == (2 * 3)**2
+    assert np.allclose(surface.heights, 0.5 * expected)
@@ -0,0 +1,101 @@
+"""
+Tests for the chunked surface store and the sweep command line.
+"""
+
+import numpy as np
+import pytest
+
+from src.cli import main, parse_params
+from src.ensemble import task_seed
+from src.spectral_surface import generate_random_gaussian_surface
+from src.surface_store import SurfaceStore
+
+def _surface(rows=70, cols=50, seed=0):
+    z = np.random.default_rng(seed).standard_normal((rows, cols))
+    return z, np.linspace(0.0, 1.0, cols), np.linspace(-2.0, 2.0, rows)
+
+def test_round_trip(tmp_path):
+    """Test if heights, axes, parameters and a SeedSequence seed survive a round trip."""
+    z, x, y = _surface()
+    seed = np.random.SeedSequence(7, spawn_key=(1, 2))
+    with SurfaceStore(tmp_path / 'store', mode='w', chunk=16) as store:
+        store.write('a', z, x, y, params={'N_x': np.int64(50), 'clx': 2.0}, seed=seed, note='test')
+    store = SurfaceStore(tmp_path / 'store')
+    surface = store.read('a')
+    assert np.array_equal(surface.heights, z)
+    assert np.array_equal(surface.x, x) and np.array_equal(surface.y, y)
+    assert surface.params == {'N_x': 50, 'clx': 2.0}
+    assert surface.seed.entropy == 7 and surface.seed.spawn_key == (1, 2)
+    assert store.metadata('a')['note'] == 'test'
+    assert store.names() == ['a'] and 'a' in store and len(store) == 1
+
+def test_crop_reads_only_needed_tiles(tmp_path, monkeypatch):
+    """Test if a crop equals the slice of the full surface and loads only the tiles it touches."""
+    z, x, y = _surface()
+    store = SurfaceStore(tmp_path, mode='w', chunk=16, compress=False)
+    store.write('a', z.astype(np.float32), x, y)
+    loaded = []
+    tile = store._tile
+    monkeypatch.setattr(store, '_tile', lambda name, ti, tj: loaded.append((ti, tj)) or tile(name, ti, tj))
+
+    crop = store.read('a', rows=slice(20, 40), cols=slice(30, None))
+    assert crop.heights.dtype == np.float32
+    assert np.array_equal(crop.heights, z.astype(np.float32)[20:40, 30:])
+    assert np.array_equal(crop.x, x[30:]) and np.array_equal(crop.y, y[20:40])
+    assert sorted(loaded) == [(ti, tj) for ti in (1, 2) for tj in (1, 2, 3)]
+
+def test_incomplete_surface_is_not_listed(tmp_path):
+    """Test if a surface without meta.json (an interrupted write) is not listed or readable."""
+    store = SurfaceStore(tmp_path, mode='w', chunk=16)
+    (tmp_path / 'partial').mkdir()
+    assert store.names() == []
+    with pytest.raises(KeyError):
+        store.read('partial')
+
+def test_store_modes(tmp_path):
+    """Test if mode='w' refuses an existing store and mode='r' refuses writes."""
+    SurfaceStore(tmp_path, mode='w')
+    with pytest.raises(FileExistsError):
+        SurfaceStore(tmp_path, mode='w')
+    with pytest.raises(PermissionError):
+        SurfaceStore(tmp_path).write('a', np.zeros((2, 2)))
+    with pytest.raises(ValueError):
+        SurfaceStore(tmp_path, mode='a').write('../a', np.zeros((2, 2)))
+
+def test_writer_writes_in_background_and_raises(tmp_path):
+    """Test if the background writer stores every surface and re-raises write errors on close."""
+    store = SurfaceStore(tmp_path, mode='w', chunk=8)
+    with store.writer(max_pending=2) as writer:
+        for i in range(5):
+            writer.submit(f's{i}', np.full((10, 12), float(i)))
+    assert store.names() == [f's{i}' for i in range(5)]
+    assert store.read('s3').heights[0, 0] == 3.0
+
+    writer = store.writer()
+    writer.submit('bad', np.zeros((4, 4)), x=np.zeros(3))
+    with pytest.raises(ValueError):
+        writer.close()
+
+def test_parse_params():
+    """Test if --param values are parsed as Python literals."""
+    assert parse_params(['N_x=64,128', 'clx=2.0', 'kind=gaussian']) == {
+        'N_x': [64, 128], 'clx': [2.0], 'kind': ['gaussian']}
+
+def test_cli_sweep(tmp_path, capsys):
+    """Test if a CLI sweep stores every surface with a seed that regenerates it exactly."""
+    out = str(tmp_path / 'sweep')
+    assert main(['sweep', 'spectral', '--param', 'N_x=40', '--param', 'clx=1.0,2.0', '-n', '2',
+                 '--seed', '5', '--chunk', '16', '--out', out, '-q']) == 0
+    store = SurfaceStore(out)
+    assert store.names() == ['p0000_r000000', 'p0000_r000001', 'p0001_r000000', 'p0001_r000001']
+
+    meta = store.metadata('p0001_r000001')
+    assert meta['generator'] == 'spectral' and meta['params'] == {'N_x': 40, 'clx': 2.0}
+    assert meta['seed'].spawn_key == task_seed(5, 1, 1).spawn_key
+    surface = store.read('p0001_r000001')
+    z, x, y = generate_random_gaussian_surface(**surface.params, seed=surface.seed)
+    assert np.array_equal(surface.heights, z)
+    assert np.array_equal(surface.x, x) and np.array_equal(surface.y, y)
+
+    assert main(['info', out]) == 0
+    assert 'p0001_r000001' in capsys.readouterr().out
@@ -0,0 +1,93 @@
+"""
+Unit tests for time-evolving surface streams.
+"""
+
+import numpy as np
+import pytest
+
+from src.surface_store import SurfaceStore
+from src.surface_stream import SurfaceStream
+
+def _lag_correlation(frames):
+    frames = np.asarray(frames)
+    return np.mean(frames[1:] * frames[:-1]) / np.mean(frames**2)
+
+def test_expected_rms_with_psd_model():
+    """Test if frames of a PSD model stream have mean square height h^2 on average."""
+    h = 0.003
+    ms = [np.mean(SurfaceStream(N_x=32, N_y=24, h=h, clx=0.5, model='gaussian', seed=s).frame()**2)
+          for s in range(300)]
+    assert np.mean(ms) == pytest.approx(h**2, rel=0.05)
+
+def test_frames_stay_stationary():
+    """Test if the RMS height does not drift along the stream."""
+    stream = SurfaceStream(N_x=32, h=1.0, clx=0.5, model='exponential', correlation_time=3.0, seed=2)
+    frames = np.array(list(stream.frames(600)))
+    assert np.mean(frames[:300]**2) == pytest.approx(1.0, rel=0.1)
+    assert np.mean(frames[300:]**2) == pytest.approx(1.0, rel=0.1)
+
+def test_lag_correlation_is_ar1_coefficient():
+    """Test if frames dt apart correlate by exp(-dt / correlation_time)."""
+    stream = SurfaceStream(N_x=32, h=1.0, clx=0.5, model='gaussian', correlation_time=4.0, dt=2.0, seed=1)
+    assert _lag_correlation(list(stream.frames(1000))) == pytest.approx(np.exp(-0.5), abs=0.03)
+
+def test_correlation_time_limits():
+    """Test if correlation_time=inf freezes the surface and 0 gives independent frames."""
+    frozen = SurfaceStream(N_x=32, correlation_time=np.inf, seed=0)
+    first = next(frozen)
+    np.testing.assert_array_equal(next(frozen), first)
+    independent = SurfaceStream(N_x=32, clx=0.5, correlation_time=0.0, seed=0)
+    assert abs(_lag_correlation(list(independent.frames(400)))) < 0.05
+
+def test_dispersion_advances_phases():
+    """Test if a half-period phase advance negates the surface."""
+    stream = SurfaceStream(N_x=32, model='gaussian', correlation_time=np.inf, dt=1.0,
+                           dispersion=lambda k: np.full_like(k, np.pi), seed=3)
+    first = next(stream)
+    np.testing.assert_allclose(next(stream), -first, atol=1e-12 * np.abs(first).max())
+
+def test_scale_dependent_correlation_time():
+    """Test if a callable correlation_time decorrelates small scales faster."""
+    stream = SurfaceStream(N_x=32, model='gaussian', correlation_time=lambda k: 10.0 / (1.0 + k), seed=4)
+    assert stream._decay.shape == (32, 17)
+    assert stream._decay[0, 1] > stream._decay[16, 16]
+    assert next(stream).shape == (32, 32)
+
+def test_same_seed_same_stream():
+    """Test if a seed reproduces the stream and float32 follows float64."""
+    a = np.array(list(SurfaceStream(N_x=24, N_y=16, seed=9).frames(3)))
+    b = np.array(list(SurfaceStream(N_x=24, N_y=16, seed=9).frames(3)))
+    c = np.array(list(SurfaceStream(N_x=24, N_y=16, seed=9, dtype=np.float32).frames(3)))
+    np.testing.assert_array_equal(a, b)
+    assert c.dtype == np.float32
+    np.testing.assert_allclose(c, a, atol=1e-5 * np.abs(a).max())
+    assert SurfaceStream(N_x=24, N_y=16, seed=9).x.shape == (24,)
+
+def test_write_memmap(tmp_path):
+    """Test if frames written to a .npy memmap equal the iterated frames."""
+    frames = SurfaceStream(N_x=20, N_y=12, seed=5).write(tmp_path / 'frames.npy', 4)
+    assert isinstance(frames, np.memmap)
+    expected = np.array(list(SurfaceStream(N_x=20, N_y=12, seed=5).frames(4)))
+    np.testing.assert_array_equal(np.load(tmp_path / 'frames.npy'), expected)
+    with pytest.raises(ValueError):
+        SurfaceStream(N_x=20, N_y=12).write(np.empty((4, 20, 12)), 4)
+
+def test_write_store(tmp_path):
+    """Test if frames written to a surface store keep their order, time and seed."""
+    stream = SurfaceStream(N_x=20, N_y=12, dt=0.5, seed=6)
+    next(stream)
+    with SurfaceStore(str(tmp_path / 'store'), mode='w', chunk=8) as store:
+        stream.write(store, 3)
+    store = SurfaceStore(str(tmp_path / 'store'))
+    assert store.names() == ['frame_000001', 'frame_000002', 'frame_000003']
+    meta = store.metadata('frame_000002')
+    assert meta['time'] == 1.0 and meta['seed'] == 6
+    expected = list(SurfaceStream(N_x=20, N_y=12, dt=0.5, seed=6).frames(4))
+    np.testing.assert_array_equal(store.read('frame_000003').heights, expected[3])
+
+def test_invalid_parameters():
+    """Test if negative correlation times and non-positive time steps are rejected."""
+    with pytest.raises(ValueError):
+        SurfaceStream(correlation_time=-1.0)
+    with pytest.raises(ValueError):
+        SurfaceStream(dt=0.0)
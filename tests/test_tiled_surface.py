@@ -0,0 +1,63 @@
+"""
+Unit tests for tiled, out-of-core spectral surface generation.
+"""
+
+import pytest
+import numpy as np
+from scipy.signal import fftconvolve
+from src.tiled_surface import generate_random_gaussian_surface_tiled
+from src.spectral_surface import generate_random_gaussian_surface
+
+def test_tiles_join_seamlessly(tmp_path):
+    """Test if the result does not depend on the tile size."""
+    kwargs = dict(N_x=90, N_y=70, rL_x=10.0, clx=1.0, seed=8, noise_block=32)
+    a, x, y = generate_random_gaussian_surface_tiled(tmp_path / "a.npy", tile_size=16, **kwargs)
+    b, _, _ = generate_random_gaussian_surface_tiled(tmp_path / "b.npy", tile_size=1000, **kwargs)
+
+    assert a.shape == (70, 90)
+    assert len(x) == 90 and len(y) == 70
+    assert np.allclose(a, b, rtol=0, atol=1e-12 * np.abs(b).max())
+    assert np.array_equal(np.load(tmp_path / "a.npy"), a)
+
+def test_matches_full_linear_convolution():
+    """Test if the tiled result equals one linear convolution of the extended noise."""
+    N, rL, h, cl, tol = 40, 10.0, 0.001, 1.0, 1e-3
+    out = np.empty((N, N))
+    surface, _, _ = generate_random_gaussian_surface_tiled(out, N_x=N, rL_x=rL, h=h, clx=cl, seed=3,
+                                                           tile_size=13, noise_block=1000, kernel_tol=tol)
+    assert surface is out
+
+    dx = rL / (N - 1)
+    K = int(np.ceil(cl / 2.0 * np.log(1.0 / tol) / dx))
+    noise = np.random.default_rng(np.random.SeedSequence(3, spawn_key=(0, 0))).standard_normal(
+        (N + 2 * K, N + 2 * K))
+    k = np.exp(-np.abs(np.arange(-K, K + 1) * dx) / (cl / 2.0))
+    factor = np.sqrt(rL * rL) / (N * N * cl * cl)
+    expected = fftconvolve(h * noise, factor * np.outer(k, k), mode='valid')
+    assert np.allclose(surface, expected, rtol=0, atol=1e-10 * np.abs(expected).max())
+
+def test_statistics_match_in_memory_generator(tmp_path):
+    """Test if the tiled surface has the RMS of the in-memory generator."""
+    kwargs = dict(N_x=256, rL_x=20.0, h=0.001, clx=1.0)
+    tiled, _, _ = generate_random_gaussian_surface_tiled(tmp_path / "c.npy", seed=1, tile_size=64, **kwargs)
+    ref = [np.std(generate_random_gaussian_surface(seed=s, **kwargs)[0]) for s in range(8)]
+    assert np.abs(np.std(tiled) - np.mean(ref)) < 0.15 * np.mean(ref)
+
+def test_out_shape_mismatch():
+    """Test if a preallocated output of the wrong shape is rejected."""
+    with pytest.raises(ValueError):
+        generate_random_gaussian_surface_tiled(np.empty((4, 4)), N_x=8)
+
+def test_long_correlation_length_is_rejected(tmp_path):
+    """Test if a kernel margin far larger than the tile is rejected before allocating, naming a kernel_tol that fits."""
+    path = tmp_path / "d.npy"
+    with pytest.raises(ValueError, match="tile_size >= "):
+        generate_random_gaussian_surface_tiled(path, N_x=20000, clx=2.0, tile_size=1024)
+    assert not path.exists()
+
+    kwargs = dict(N_x=64, rL_x=10.0, clx=2.0, tile_size=8)
+    with pytest.raises(ValueError, match="kernel_tol >= ") as info:
+        generate_random_gaussian_surface_tiled(np.empty((64, 64)), **kwargs)
+    tol = float(str(info.value).split("kernel_tol >= ")[1].split(",")[0])
+    surface, _, _ = generate_random_gaussian_surface_tiled(np.empty((64, 64)), seed=0, kernel_tol=tol, **kwargs)
+    assert np.all(np.isfinite(surface))